@@ -6,7 +6,7 @@ from flask_bootstrap import Bootstrap
 
 from app.core.content import ApiResponse
 from app.core.jsonencoder import CustomJSONEncoder
-from config import CELERY_BROKER_URL, CELERY_RESULT_BACKEND
+from config import CELERY_BROKER_URL, CELERY_RESULT_BACKEND, TASK_SWEEP_INTERVAL
 
 celery = Celery(__name__, broker=CELERY_BROKER_URL, backend=CELERY_RESULT_BACKEND)
 
@@ -26,6 +26,8 @@ def create_app(config_filename, register_blueprints=True):
         from app.views.user import user_blueprint
         from app.views.company import company_blueprint
         from app.views.prediction import predict_blueprint
+        from app.views.training import training_blueprint
+        from app.views.backtest import backtest_blueprint
         from app.views.customer import customer_blueprint
         from app.views.datasource import datasource_blueprint
         from app.views.authentication import authentication_blueprint
@@ -35,6 +37,8 @@ def create_app(config_filename, register_blueprints=True):
         app.register_blueprint(company_blueprint, url_prefix='/company')
         app.register_blueprint(datasource_blueprint, url_prefix='/datasource')
         app.register_blueprint(predict_blueprint, url_prefix='/prediction')
+        app.register_blueprint(training_blueprint, url_prefix='/training')
+        app.register_blueprint(backtest_blueprint, url_prefix='/backtest')
         app.register_blueprint(customer_blueprint, url_prefix='/customer')
 
         @app.before_request
@@ -85,7 +89,8 @@ def create_app(config_filename, register_blueprints=True):
 
     app.json_encoder = CustomJSONEncoder
 
-    for folder in ['UPLOAD_FOLDER', 'TEMPORARY_CSV_FOLDER']:
+    for folder in ['UPLOAD_FOLDER', 'STAGING_FOLDER', 'ROW_INDEX_FOLDER', 'DATA_DICT_CACHE_FOLDER',
+                   'MODEL_REGISTRY_FOLDER', 'BACKTEST_FOLDER']:
         path = Path(app.config[folder])
         path.mkdir(parents=True, exist_ok=True)
 
@@ -98,4 +103,11 @@ def make_celery(app):
         backend=CELERY_RESULT_BACKEND,
         broker=CELERY_BROKER_URL
     )
+    # run by the beat embedded in the io worker
+    celery.conf.beat_schedule = {
+        'sweep-timed-out-tasks': {
+            'task': 'sweep_timed_out_tasks',
+            'schedule': TASK_SWEEP_INTERVAL,
+        },
+    }
     return celery
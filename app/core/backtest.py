@@ -0,0 +1,116 @@
+"""
+A backtest replays the oracle over past cutoffs: for every cutoff the oracle is trained on the data up to it,
+its predictions are lined up with the actual values of the target feature, and the errors are summarised.
+"""
+import datetime
+import math
+
+import numpy as np
+import pandas as pd
+
+SCORE_COLUMNS = ['cutoff', 'timestamp', 'symbol', 'value', 'lower', 'upper', 'actual']
+
+
+def get_cutoffs(start_time, end_time, step_days):
+    """
+    :return list: every step_days from start_time, end_time included
+    """
+    cutoffs = []
+    cutoff = start_time
+    while cutoff <= end_time:
+        cutoffs.append(cutoff)
+        cutoff += datetime.timedelta(days=step_days)
+    return cutoffs
+
+
+def split_cutoffs(cutoffs, chunks):
+    """
+    Deals the cutoffs out in turn: the later cutoffs train on more data, so each chunk gets its share of them
+
+    :return list: at most chunks lists of cutoffs, none of them empty
+    """
+    return [cutoffs[start::chunks] for start in range(min(chunks, len(cutoffs)))]
+
+
+def score_prediction(cutoff, datapoints, actuals, tolerance=None):
+    """
+    Lines every predicted value up with the actual value of the same symbol at the same time
+
+    :param datetime.date cutoff: the cutoff the oracle was trained up to
+    :param list datapoints: the interpreted prediction result
+    :param pd.DataFrame actuals: the time x symbol panel of the target feature
+    :param pd.Timedelta tolerance: how far an actual value can be from the predicted timestamp,
+                                   the timestamps have to match exactly if None
+    :return pd.DataFrame: one row per predicted value, with a missing actual when there's none in the datasource
+    """
+    rows = [
+        (point['timestamp'], value['symbol'], value['value'], value.get('lower'), value.get('upper'))
+        for point in datapoints for value in point['prediction']
+    ]
+    scores = pd.DataFrame(rows, columns=SCORE_COLUMNS[1:-1])
+    scores['timestamp'] = pd.to_datetime(scores['timestamp'], utc=True)
+    scores.insert(0, 'cutoff', pd.Timestamp(cutoff))
+
+    index = actuals.index if actuals.index.tz else actuals.index.tz_localize('UTC')
+    actuals = pd.DataFrame(actuals.values, index=index, columns=actuals.columns.astype(str))
+    actuals = actuals[~actuals.index.duplicated(keep='last')].sort_index()
+
+    rows = actuals.index.get_indexer(
+        scores['timestamp'], method='nearest' if tolerance is not None else None, tolerance=tolerance
+    )
+    columns = actuals.columns.get_indexer(scores['symbol'].astype(str))
+    found = (rows >= 0) & (columns >= 0)
+
+    scores['actual'] = np.nan
+    scores.loc[found, 'actual'] = actuals.values[rows[found], columns[found]]
+    return compact_scores(scores)
+
+
+def compact_scores(scores):
+    """
+    The scores of a year of weekly cutoffs run into the millions of rows: values are stored as float32
+    and symbols as categories
+    """
+    return scores.astype({
+        'symbol': 'category',
+        'value': 'float32',
+        'lower': 'float32',
+        'upper': 'float32',
+        'actual': 'float32',
+    })
+
+
+def compute_metrics(scores):
+    """
+    :param pd.DataFrame scores: as returned by score_prediction
+    :return dict: the mean absolute error, root mean squared error and mean error of the predicted values,
+                  and the share of actual values between the predicted bounds
+    """
+    scored = scores.dropna(subset=['value', 'actual'])
+    errors = scored['value'].astype('float64') - scored['actual'].astype('float64')
+    bounded = scored.dropna(subset=['lower', 'upper'])
+
+    metrics = {
+        'count': len(scored),
+        'missing_actuals': int(scores['actual'].isnull().sum()),
+        'mae': errors.abs().mean(),
+        'rmse': math.sqrt((errors ** 2).mean()) if len(errors) else None,
+        'bias': errors.mean(),
+        'coverage': (
+            (bounded['lower'] <= bounded['actual']) & (bounded['actual'] <= bounded['upper'])
+        ).mean(),
+    }
+    return {name: _as_number(value) for name, value in metrics.items()}
+
+
+def compute_metrics_by_cutoff(scores):
+    return [
+        dict(cutoff=cutoff.date().isoformat(), **compute_metrics(cutoff_scores))
+        for cutoff, cutoff_scores in scores.groupby('cutoff', sort=True)
+    ]
+
+
+def _as_number(value):
+    if value is None or pd.isnull(value):
+        return None
+    return float(value) if isinstance(value, (float, np.floating)) else int(value)
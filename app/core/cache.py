@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow
+import pyarrow.feather
+
+METADATA = 'metadata.json'
+INDEX = 'index.arrow'
+
+
+class DataDictCache:
+    """
+    An on-disk cache of interpreted data_dicts. Datasource versions never change, so the data_dict
+    of a version only needs to be built once per interpreter.
+
+    The panels of a data_dict share the same time index and entity columns, so every entry is stored
+    as a feature cube (time x entity x feature), one .npy file per dtype, with the index and the columns
+    on the side. Loading an entry maps the cubes read-only and returns DataFrame views over them:
+    the workers using the same version share the page cache instead of holding a copy each.
+
+    Reading an entry marks it as recently used: when the cache grows over its maximum size
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, folder, max_size):
+        self.folder = folder
+        self.max_size = max_size
+
+    @staticmethod
+    def make_key(upload_code, interpreter):
+        return f"{upload_code}_{interpreter.__class__.__name__}"
+
+    def get(self, key):
+        location = os.path.join(self.folder, key)
+        try:
+            with open(os.path.join(location, METADATA)) as metadata_file:
+                metadata = json.load(metadata_file)
+            index = pd.DatetimeIndex(
+                pyarrow.feather.read_table(os.path.join(location, INDEX)).to_pandas()['index'],
+                name=metadata['index_name']
+            )
+            columns = pd.Index(metadata['columns'], name=metadata['columns_name'])
+            cubes = {
+                dtype: np.load(os.path.join(location, f"{dtype}.npy"), mmap_mode='r')
+                for dtype in set(dtype for dtype, _ in metadata['features'].values())
+            }
+        except (OSError, ValueError, KeyError, pyarrow.ArrowException):
+            return None
+
+        os.utime(location)
+        # every slice of a fortran ordered cube is contiguous, so the DataFrames don't copy it
+        return {
+            feature: pd.DataFrame(cubes[dtype][:, :, position], index=index, columns=columns, copy=False)
+            for feature, (dtype, position) in metadata['features'].items()
+        }
+
+    def set(self, key, data_dict):
+        if not data_dict:
+            return
+        first_panel = next(iter(data_dict.values()))
+        index, columns = first_panel.index, first_panel.columns
+        if not all(panel.index.equals(index) and panel.columns.equals(columns) for panel in data_dict.values()):
+            logging.warning(f"The panels of {key} are not aligned, the data_dict won't be cached")
+            return
+
+        features = {}
+        features_by_dtype = {}
+        for feature, panel in data_dict.items():
+            dtype = np.result_type(*panel.dtypes).name if len(columns) else 'float64'
+            features[feature] = [dtype, len(features_by_dtype.setdefault(dtype, []))]
+            features_by_dtype[dtype].append(panel)
+
+        # the entry is written aside and renamed, so concurrent readers never see a partial one
+        temporary_location = tempfile.mkdtemp(dir=self.folder, prefix='.')
+        for dtype, panels in features_by_dtype.items():
+            cube = np.lib.format.open_memmap(
+                os.path.join(temporary_location, f"{dtype}.npy"), mode='w+', dtype=dtype,
+                shape=(len(index), len(columns), len(panels)), fortran_order=True
+            )
+            for position, panel in enumerate(panels):
+                cube[:, :, position] = panel.to_numpy(dtype=dtype)
+            cube.flush()
+            del cube
+
+        pyarrow.feather.write_feather(
+            pyarrow.table({'index': index}), os.path.join(temporary_location, INDEX), compression='uncompressed'
+        )
+        with open(os.path.join(temporary_location, METADATA), 'w') as metadata_file:
+            json.dump({
+                'index_name': index.name,
+                'columns': columns.tolist(),
+                'columns_name': columns.name,
+                'features': features,
+            }, metadata_file)
+
+        try:
+            os.rename(temporary_location, os.path.join(self.folder, key))
+        except OSError:
+            # another worker cached the same entry in the meantime
+            shutil.rmtree(temporary_location, ignore_errors=True)
+        self.evict()
+
+    def discard(self, upload_code):
+        discard_entries(self.folder, upload_code)
+
+    def evict(self):
+        evict_least_recently_used(self.folder, self.max_size)
+
+
+def discard_entries(folder, upload_code):
+    """
+    Removes the entries of a cache folder built from a datasource version, their names start with its upload_code
+    """
+    for key in os.listdir(folder):
+        if key.startswith(f"{upload_code}_"):
+            shutil.rmtree(os.path.join(folder, key), ignore_errors=True)
+
+
+def evict_least_recently_used(folder, max_size):
+    """
+    Removes the least recently used entries of a cache folder until it fits in max_size bytes.
+    Every entry is a directory, whose modification time is updated when it's used.
+    Directories starting with a dot are entries still being written.
+    """
+    entries = []
+    for key in os.listdir(folder):
+        location = os.path.join(folder, key)
+        if key.startswith('.') or not os.path.isdir(location):
+            continue
+        size = sum(_directory_size(location))
+        entries.append((os.stat(location).st_mtime, size, location))
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, location in sorted(entries):
+        if total_size <= max_size:
+            break
+        shutil.rmtree(location, ignore_errors=True)
+        total_size -= size
+
+
+def _directory_size(location):
+    for root, _, filenames in os.walk(location):
+        for filename in filenames:
+            yield os.path.getsize(os.path.join(root, filename))
@@ -0,0 +1,68 @@
+import json
+import logging
+import time
+
+import redis
+
+
+class TaskEvents:
+    """
+    Publishes the events of a task on its own Redis channel, so that the clients following the task
+    are told about every change as it happens instead of polling the database.
+    Nothing is stored: only the subscribers listening at the time of the event receive it.
+    """
+    CHANNEL_PREFIX = 'task_events'
+
+    def __init__(self, url):
+        self._redis = redis.StrictRedis.from_url(url)
+
+    @classmethod
+    def channel(cls, task_code):
+        return f"{cls.CHANNEL_PREFIX}:{task_code}"
+
+    def publish(self, task_code, event):
+        """
+        Publishing is best effort: the task carries on if the events can't be published,
+        its followers still find out about it by reading it
+        """
+        try:
+            self._redis.publish(self.channel(task_code), json.dumps(event))
+        except redis.RedisError as e:
+            logging.warning(f"Could not publish the event of task {task_code}: {e!r}")
+
+    def subscribe(self, task_code):
+        """
+        Subscribing has to happen before reading the task, or an event could be missed in between
+
+        :return TaskSubscription: the subscription to the events of the task, None if Redis can't be reached
+        """
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self.channel(task_code))
+        except redis.RedisError as e:
+            logging.warning(f"Could not subscribe to the events of task {task_code}: {e!r}")
+            pubsub.close()
+            return None
+        return TaskSubscription(pubsub)
+
+
+class TaskSubscription:
+
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    def get(self, timeout):
+        """
+        :return dict: the next event, None if there was none within timeout seconds
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            message = self._pubsub.get_message(timeout=remaining)
+            if message and message['type'] == 'message':
+                return json.loads(message['data'])
+
+    def close(self):
+        self._pubsub.close()
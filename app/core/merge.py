@@ -0,0 +1,142 @@
+import hashlib
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+ROW_INDEX_KEY = 'rows'
+ENTITY_ITEMSIZE = 64
+
+MergeResult = namedtuple('MergeResult', 'delta new changed unchanged')
+
+
+def row_keys(dataframe, entity_column=None):
+    """
+    The key of a row is its timestamp and, for datasources describing several entities
+    (e.g. stock tickers), the entity it refers to.
+
+    :return pd.MultiIndex: the (timestamp, entity) key of every row
+    """
+    if entity_column:
+        entities = dataframe[entity_column].astype(str).values
+    else:
+        entities = np.full(len(dataframe), '', dtype=object)
+    return pd.MultiIndex.from_arrays([dataframe.index, entities], names=['timestamp', 'entity'])
+
+
+def row_hashes(dataframe):
+    return pd.util.hash_pandas_object(dataframe, index=False).values
+
+
+def content_hash(delta, previous_content_hash=None):
+    """
+    The content hash of a version chains the hash of the version the upload was merged into
+    with the rows the upload added or changed: an upload with nothing new keeps the hash of the previous version.
+
+    :param pd.DataFrame delta: the new and changed rows of the upload
+    :param str previous_content_hash: the hash of the previous version, if any.
+        The upload code of a version created before the hashes stands for its content
+    :return str: the hex digest of the new version's content
+    """
+    if previous_content_hash and not len(delta):
+        return previous_content_hash
+
+    digest = hashlib.sha1((previous_content_hash or '').encode())
+    digest.update(','.join(str(column) for column in delta.columns).encode())
+    digest.update(pd.util.hash_pandas_object(delta, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def deduplicate(dataframe, entity_column=None):
+    """
+    Keeps the last occurrence of every key, so later uploads win over earlier ones.
+    """
+    return dataframe[~row_keys(dataframe, entity_column).duplicated(keep='last')]
+
+
+class RowIndex:
+    """
+    A persistent (timestamp, entity) -> row hash index of the current datasource version of a company.
+    It's stored as an append-only HDF5 table queryable by timestamp, so that an upload only needs
+    to look up the keys in its own date span to find out which of its rows are new or changed.
+
+    The index is stamped with the upload code of the version it describes: if the company's current
+    version is a different one (e.g. the latest version was deleted) the index must be rebuilt.
+    """
+
+    def __init__(self, location):
+        self.location = location
+
+    @property
+    def upload_code(self):
+        if not os.path.exists(self.location):
+            return None
+        with pd.HDFStore(self.location, mode='r') as hdf_store:
+            if ROW_INDEX_KEY not in hdf_store:
+                return None
+            return getattr(hdf_store.get_storer(ROW_INDEX_KEY).attrs, 'upload_code', None)
+
+    def lookup(self, start_date, end_date):
+        """
+        :return pd.Series: the latest hash of every key between start_date and end_date
+        """
+        if self.upload_code is None:
+            return pd.Series([], index=row_keys(pd.DataFrame(index=pd.DatetimeIndex([]))), dtype='uint64')
+
+        where = [
+            f"index >= '{pd.Timestamp(start_date).isoformat()}'",
+            f"index <= '{pd.Timestamp(end_date).isoformat()}'",
+        ]
+        with pd.HDFStore(self.location, mode='r') as hdf_store:
+            rows = hdf_store.select(ROW_INDEX_KEY, where=where)
+        hashes = pd.Series(rows['row_hash'].values, index=row_keys(rows, 'entity'))
+        return hashes[~hashes.index.duplicated(keep='last')]
+
+    def append(self, dataframe, entity_column, upload_code):
+        rows = pd.DataFrame(
+            {'entity': row_keys(dataframe, entity_column).get_level_values('entity'), 'row_hash': row_hashes(dataframe)},
+            index=dataframe.index.rename('timestamp')
+        )
+        with pd.HDFStore(self.location, mode='a') as hdf_store:
+            if len(rows):
+                hdf_store.append(ROW_INDEX_KEY, rows, min_itemsize={'entity': ENTITY_ITEMSIZE})
+            elif ROW_INDEX_KEY not in hdf_store:
+                return
+            hdf_store.get_storer(ROW_INDEX_KEY).attrs.upload_code = upload_code
+
+    def reset(self):
+        if os.path.exists(self.location):
+            os.remove(self.location)
+
+    def rebuild(self, dataframe, entity_column, upload_code):
+        self.reset()
+        self.append(dataframe, entity_column, upload_code)
+
+
+def merge_upload(dataframe, entity_column, row_index):
+    """
+    Compares an upload against the row index, in time proportional to the size of the upload.
+
+    :param pd.DataFrame dataframe: the uploaded rows
+    :param str entity_column: the column identifying the entity of a row, if any
+    :param RowIndex row_index: the index of the version the upload is merged into
+    :return MergeResult: the rows to store (new and changed ones) and how many rows fall in each class
+    """
+    dataframe = deduplicate(dataframe, entity_column)
+    if not len(dataframe):
+        return MergeResult(dataframe, 0, 0, 0)
+
+    existing_hashes = row_index.lookup(dataframe.index.min(), dataframe.index.max())
+    previous_hashes = existing_hashes.reindex(row_keys(dataframe, entity_column))
+
+    is_new = previous_hashes.isnull().values
+    is_unchanged = ~is_new & (previous_hashes.values == row_hashes(dataframe))
+    is_changed = ~is_new & ~is_unchanged
+
+    return MergeResult(
+        delta=dataframe[is_new | is_changed],
+        new=int(is_new.sum()),
+        changed=int(is_changed.sum()),
+        unchanged=int(is_unchanged.sum())
+    )
@@ -1,19 +1,19 @@
 import abc
 
-import pandas as pd
 from flask import json
 
 from app.core.jsonencoder import CustomJSONEncoder
 from app.core.schemas import (
     UserSchema, CompanySchema, PredictionTaskSchema, DataSourceSchema,
     CompanyConfigurationSchema, PredictionTaskStatusSchema, TrainingTaskSchema,
-    PredictionResultSchema)
+    PredictionResultSchema, IngestionTaskSchema, BacktestTaskSchema)
+from app.core.storage import read_segments
 from app.entities import (
     UserEntity, CompanyEntity, PredictionTaskEntity, PredictionResultEntity, DataSourceEntity,
-    CompanyConfigurationEntity, PredictionTaskStatusEntity, TrainingTaskEntity
+    CompanyConfigurationEntity, PredictionTaskStatusEntity, TrainingTaskEntity, IngestionTaskEntity,
+    IngestionTaskStatusEntity, BacktestTaskEntity, BacktestTaskStatusEntity
 )
 from app.entities.training import TrainingTaskStatusEntity
-from config import HDF5_STORE_INDEX
 
 
 class EntityCreationException(Exception):
@@ -96,10 +96,10 @@ class DataSource(BaseModel):
     SCHEMA = DataSourceSchema
     MODEL = DataSourceEntity
 
-    def get_file(self):
-        with pd.HDFStore(self.location) as hdf_store:
-            dataframe = hdf_store[HDF5_STORE_INDEX]
-            return dataframe
+    def get_file(self, columns=None, start_date=None, end_date=None):
+        return read_segments(
+            self.segments or [self.location], columns, start_date, end_date, getattr(self, 'entity_column', None)
+        )
 
 
 class PredictionResult(BaseModel):
@@ -120,3 +120,23 @@ class TrainingTask(BaseModel):
 class TrainingTaskStatus(BaseModel):
     SCHEMA = PredictionTaskStatusSchema
     MODEL = TrainingTaskStatusEntity
+
+
+class IngestionTask(BaseModel):
+    SCHEMA = IngestionTaskSchema
+    MODEL = IngestionTaskEntity
+
+
+class IngestionTaskStatus(BaseModel):
+    SCHEMA = PredictionTaskStatusSchema
+    MODEL = IngestionTaskStatusEntity
+
+
+class BacktestTask(BaseModel):
+    SCHEMA = BacktestTaskSchema
+    MODEL = BacktestTaskEntity
+
+
+class BacktestTaskStatus(BaseModel):
+    SCHEMA = PredictionTaskStatusSchema
+    MODEL = BacktestTaskStatusEntity
@@ -0,0 +1,151 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.core.merge import deduplicate
+
+PREVIEW_ROWS = 5
+
+
+def build_preview(dataframe):
+    """
+    A small summary of a datasource version, stored with it so that the pages showing
+    the historical data don't need to open its files.
+
+    :param pd.DataFrame dataframe: the sorted merged view of the version
+    :return dict: the row count, the date span, the first and last rows and the statistics of the numeric columns
+    """
+    return {
+        'row_count': len(dataframe),
+        'start_date': _to_utc(dataframe.index.min()).isoformat() if len(dataframe) else None,
+        'end_date': _to_utc(dataframe.index.max()).isoformat() if len(dataframe) else None,
+        'index_column': dataframe.index.name,
+        'head': _rows_to_json(dataframe.head(PREVIEW_ROWS)),
+        'tail': _rows_to_json(dataframe.tail(PREVIEW_ROWS)),
+        'statistics': {column: _column_statistics(dataframe[column]) for column in _numeric_columns(dataframe)},
+    }
+
+
+def update_preview(preview, removed_rows, added_rows, entity_column, read_column):
+    """
+    Updates the preview of a version with the rows an upload replaced, without reading the whole version.
+    Counts and sums are updated by difference; a minimum or maximum is only recomputed from the stored
+    column if the upload replaced the rows holding it.
+
+    :param dict preview: the preview of the previous version
+    :param pd.DataFrame removed_rows: the rows of the previous version in the date span of the upload
+    :param pd.DataFrame added_rows: the same date span in the new version
+    :param str entity_column: the column identifying the entity of a row, if any
+    :param callable read_column: returns a column of the new version as a pd.Series, given its name
+    :return dict: the preview of the new version
+    """
+    row_count = preview['row_count'] - len(removed_rows) + len(added_rows)
+    index_column = preview['index_column']
+    added_rows = added_rows.set_index(_to_utc_index(added_rows.index).rename(index_column))
+
+    statistics = {}
+    for column in _numeric_columns(added_rows):
+        previous = preview['statistics'].get(column)
+        if previous is None:
+            statistics[column] = _column_statistics(read_column(column))
+            continue
+
+        removed = _column_statistics(removed_rows[column]) if column in removed_rows else _column_statistics(None)
+        added = _column_statistics(added_rows[column])
+        count = previous['count'] - removed['count'] + added['count']
+        if _extreme_was_replaced(previous['min'], removed['min'], added['min'], np.less_equal):
+            minimum = _column_statistics(read_column(column))['min']
+        else:
+            minimum = _combine(previous['min'], added['min'], min)
+        if _extreme_was_replaced(previous['max'], removed['max'], added['max'], np.greater_equal):
+            maximum = _column_statistics(read_column(column))['max']
+        else:
+            maximum = _combine(previous['max'], added['max'], max)
+
+        statistics[column] = {
+            'count': count,
+            'sum': previous['sum'] - removed['sum'] + added['sum'],
+            'min': minimum,
+            'max': maximum,
+        }
+
+    def merge_rows(rows, keep):
+        merged = deduplicate(pd.concat([preview_to_dataframe(preview, rows), added_rows]), entity_column)
+        return _rows_to_json(keep(merged.sort_index(ascending=True)))
+
+    return {
+        'row_count': row_count,
+        'start_date': min(_to_utc(preview['start_date']), added_rows.index.min()).isoformat(),
+        'end_date': max(_to_utc(preview['end_date']), added_rows.index.max()).isoformat(),
+        'index_column': index_column,
+        'head': merge_rows('head', lambda dataframe: dataframe.head(PREVIEW_ROWS)),
+        'tail': merge_rows('tail', lambda dataframe: dataframe.tail(PREVIEW_ROWS)),
+        'statistics': statistics,
+    }
+
+
+def preview_to_dataframe(preview, rows):
+    """
+    :param dict preview: the preview of a datasource version
+    :param str rows: either 'head' or 'tail'
+    :return pd.DataFrame: the rows, ready to be rendered
+    """
+    rows = preview[rows]
+    index = pd.to_datetime(rows['index'], utc=True).rename(preview['index_column'])
+    return pd.DataFrame(rows['data'], index=index, columns=rows['columns'])
+
+
+def preview_statistics_to_dataframe(preview):
+    """
+    :return pd.DataFrame: the count, null count, mean, min and max of every numeric column
+    """
+    statistics = pd.DataFrame.from_dict(preview['statistics'], orient='index', columns=['count', 'sum', 'min', 'max'])
+    statistics['null count'] = preview['row_count'] - statistics['count']
+    statistics['mean'] = statistics['sum'] / statistics['count'].where(statistics['count'] > 0)
+    return statistics[['count', 'null count', 'mean', 'min', 'max']]
+
+
+def _numeric_columns(dataframe):
+    return [column for column in dataframe.columns if pd.api.types.is_numeric_dtype(dataframe[column])]
+
+
+def _column_statistics(series):
+    if series is None or not series.count():
+        return {'count': 0, 'sum': 0.0, 'min': None, 'max': None}
+    return {
+        'count': int(series.count()),
+        'sum': float(series.sum()),
+        'min': float(series.min()),
+        'max': float(series.max()),
+    }
+
+
+def _extreme_was_replaced(previous, removed, added, is_as_extreme):
+    # the rows holding the previous extreme value were overwritten, and nothing in the upload
+    # is at least as extreme: the new extreme is somewhere in the rest of the column
+    if previous is None or removed is None or removed != previous:
+        return False
+    return added is None or not is_as_extreme(added, previous)
+
+
+def _combine(first, second, function):
+    values = [value for value in (first, second) if value is not None]
+    return function(values) if values else None
+
+
+def _rows_to_json(dataframe):
+    return json.loads(dataframe.to_json(orient='split', date_format='iso'))
+
+
+def _to_utc(timestamp):
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize('UTC')
+    return timestamp.tz_convert('UTC')
+
+
+def _to_utc_index(index):
+    if index.tz is None:
+        return index.tz_localize('UTC')
+    return index.tz_convert('UTC')
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from app.core.cache import discard_entries, evict_least_recently_used
+
+
+class ModelRegistry:
+    """
+    Keeps the models trained by the oracles on disk, so that a prediction with the same configuration,
+    datasource version and training cutoff can load the model instead of training it again.
+
+    Every entry is the directory the oracle saved its model to. Loading an entry marks it as recently used:
+    when the registry grows over its maximum size the least recently used models are evicted.
+    """
+
+    def __init__(self, folder, max_size):
+        self.folder = folder
+        self.max_size = max_size
+
+    @staticmethod
+    def make_key(configuration, upload_code, training_cutoff):
+        """
+        :param dict configuration: the company configuration the oracle is built from
+        :param str upload_code: the datasource version the model is trained on
+        :param datetime.datetime training_cutoff: the start time of the training
+        :return str: the key of the model
+        """
+        configuration_hash = hashlib.sha1(
+            json.dumps(configuration, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return f"{upload_code}_{configuration_hash}_{training_cutoff:%Y%m%d%H%M%S}"
+
+    def get(self, key):
+        """
+        :return str: the location of the model saved with this key, None if there's none
+        """
+        location = os.path.join(self.folder, key)
+        if not os.path.isdir(location):
+            return None
+        os.utime(location)
+        return location
+
+    def reserve(self):
+        """
+        :return str: an empty location for the oracle to save a new model to, until it's registered
+        """
+        return tempfile.mkdtemp(dir=self.folder, prefix='.')
+
+    def register(self, location, key):
+        try:
+            os.rename(location, os.path.join(self.folder, key))
+        except OSError:
+            # another worker registered the same model in the meantime
+            shutil.rmtree(location, ignore_errors=True)
+        evict_least_recently_used(self.folder, self.max_size)
+
+    def remove(self, location):
+        shutil.rmtree(location, ignore_errors=True)
+
+    def discard(self, upload_code):
+        discard_entries(self.folder, upload_code)
@@ -1,7 +1,7 @@
 import re
 
 from attribdict import AttribDict
-from marshmallow import Schema, fields, validates, ValidationError, pre_load
+from marshmallow import Schema, fields, validate, validates, validates_schema, ValidationError, pre_load
 from marshmallow_enum import EnumField
 
 from app.entities.customer import UserPermissions
@@ -39,6 +39,42 @@ class PredictionRequestSchema(Schema):
     name = fields.String(required=True)
     start_time = fields.Date(required=True)
     end_time = fields.Date(required=True)
+    # predict with the model of the latest successful training of the datasource instead of training a new one
+    use_latest_training = fields.Boolean(missing=False)
+    # run the prediction even if an identical one was already made
+    force = fields.Boolean(missing=False)
+
+
+class PredictionWindowSchema(Schema):
+    start_time = fields.Date(required=True)
+    end_time = fields.Date(required=True)
+
+
+class BatchPredictionRequestSchema(Schema):
+    name = fields.String(required=True)
+    windows = fields.Nested(PredictionWindowSchema, many=True, required=True, validate=validate.Length(min=1))
+    use_latest_training = fields.Boolean(missing=False)
+    force = fields.Boolean(missing=False)
+
+
+class TaskStatusesRequestSchema(Schema):
+    task_codes = fields.List(fields.String(), required=True, validate=validate.Length(min=1, max=1000))
+
+
+class TrainingRequestSchema(Schema):
+    start_time = fields.Date(required=True)
+
+
+class BacktestRequestSchema(Schema):
+    # the oracle is trained and evaluated at every step_days from start_time to end_time
+    start_time = fields.Date(required=True)
+    end_time = fields.Date(required=True)
+    step_days = fields.Integer(missing=7, validate=validate.Range(min=1))
+
+    @validates_schema
+    def validate_time_range(self, data):
+        if 'start_time' in data and 'end_time' in data and data['start_time'] > data['end_time']:
+            raise ValidationError("The start time can't be after the end time", 'end_time')
 
 
 class PredictionResultSchema(BaseModelSchema):
@@ -63,16 +99,65 @@ class PredictionTaskSchema(BaseModelSchema):
     statuses = fields.Nested(PredictionTaskStatusSchema, many=True, default=[])
     prediction_request = fields.Nested(PredictionRequestSchema, allow_none=True)
     prediction_result = fields.Nested(PredictionResultSchema, allow_none=True)
+    batch_code = fields.String(allow_none=True)
+    training_task_code = fields.String(allow_none=True)
+    priority = fields.Integer()
+    dispatched_at = fields.DateTime(allow_none=True)
+    fingerprint = fields.String(allow_none=True)
+    leader_task_code = fields.String(allow_none=True)
+    started_at = fields.DateTime(allow_none=True)
+    finished_at = fields.DateTime(allow_none=True)
 
 
 class TrainingTaskSchema(BaseModelSchema):
     task_code = fields.String()
     company_id = fields.Integer()
+    user_id = fields.Integer()
     datasource_id = fields.Integer()
+    training_request = fields.Nested(TrainingRequestSchema, allow_none=True)
+    model_key = fields.String(allow_none=True)
     status = fields.String(allow_none=True)
+    is_completed = fields.Boolean()
+    started_at = fields.DateTime(allow_none=True)
+    finished_at = fields.DateTime(allow_none=True)
     statuses = fields.Nested(PredictionTaskStatusSchema, many=True)
 
 
+class BacktestTaskSchema(BaseModelSchema):
+    task_code = fields.String()
+    company_id = fields.Integer()
+    user_id = fields.Integer()
+    datasource_id = fields.Integer()
+    backtest_request = fields.Nested(BacktestRequestSchema, allow_none=True)
+    metrics = fields.Dict(allow_none=True)
+    result_location = fields.String(allow_none=True)
+    status = fields.String(allow_none=True)
+    is_completed = fields.Boolean()
+    statuses = fields.Nested(PredictionTaskStatusSchema, many=True, default=[])
+
+
+class IngestionTaskSchema(BaseModelSchema):
+    upload_code = fields.String()
+    company_id = fields.Integer()
+    user_id = fields.Integer()
+    filename = fields.String()
+    location = fields.String()
+    status = fields.String(allow_none=True)
+    is_completed = fields.Boolean()
+    statuses = fields.Nested(PredictionTaskStatusSchema, many=True, default=[])
+
+
+class DataSourceColumnStatisticsSchema(BaseModelSchema):
+    column = fields.String()
+    dtype = fields.String()
+    count = fields.Integer(allow_none=True)
+    null_count = fields.Integer(allow_none=True)
+    distinct_count = fields.Integer(allow_none=True)
+    min = fields.Float(allow_none=True)
+    max = fields.Float(allow_none=True)
+    mean = fields.Float(allow_none=True)
+
+
 class DataSourceSchema(BaseModelSchema):
     user_id = fields.Integer()
     company_id = fields.Integer()
@@ -85,6 +170,14 @@ class DataSourceSchema(BaseModelSchema):
     is_original = fields.Boolean(allow_none=True)
     features = fields.List(fields.String)
     target_feature = fields.String()
+    segments = fields.List(fields.String, allow_none=True)
+    entity_column = fields.String(allow_none=True)
+    preview = fields.Dict(allow_none=True)
+    row_count = fields.Integer(allow_none=True)
+    entities = fields.List(fields.String, allow_none=True)
+    frequency = fields.String(allow_none=True)
+    content_hash = fields.String(allow_none=True)
+    column_statistics = fields.Nested(DataSourceColumnStatisticsSchema, many=True, default=[])
     prediction_task_list = fields.Nested(PredictionTaskSchema, many=True)
     training_task_list = fields.Nested(TrainingTaskSchema, many=True)
 
@@ -109,6 +202,8 @@ class OracleConfigurationSchema(BaseModelSchema):
     datasource_interpreter = fields.String(required=True)
     prediction_result_interpreter = fields.String(required=True)
     upload_strategy = fields.String(missing='OnDemandPredictionStrategy', default='OnDemandPredictionStrategy')
+    upload_type = fields.String(validate=validate.OneOf([UploadTypes.FILESYSTEM.name, UploadTypes.PARQUET.name]))
+    max_concurrent_tasks = fields.Integer(validate=validate.Range(min=1))
 
 
 class CompanyConfigurationSchema(BaseModelSchema):
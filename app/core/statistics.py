@@ -0,0 +1,57 @@
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+
+def infer_frequency(index):
+    """
+    The sampling frequency of a datasource is the most common interval between consecutive timestamps.
+
+    :param pd.DatetimeIndex index: the index of an upload
+    :return str: the frequency as a pandas offset alias (e.g. '15min'), None if it can't be inferred
+    """
+    timestamps = index.unique().sort_values()
+    if len(timestamps) < 2:
+        return None
+    intervals = pd.Series(timestamps[1:] - timestamps[:-1])
+    return to_offset(intervals.value_counts().idxmax()).freqstr
+
+
+def finest_frequency(*frequencies):
+    frequencies = [frequency for frequency in frequencies if frequency]
+    if not frequencies:
+        return None
+    return min(frequencies, key=frequency_to_timedelta)
+
+
+def frequency_to_timedelta(frequency):
+    epoch = pd.Timestamp(0)
+    return epoch + to_offset(frequency) - epoch
+
+
+def build_column_statistics(preview, dtypes, entity_column=None, entities=None):
+    """
+    Builds the statistics catalog of a datasource version from its preview, one entry per column.
+
+    :param dict preview: the preview of the version, see app.core.preview
+    :param pd.Series dtypes: the type of every column
+    :param str entity_column: the column identifying the entity of a row, if any
+    :param list entities: the entities present in the version
+    :return list: the statistics of every column
+    """
+    column_statistics = []
+    for column, dtype in dtypes.items():
+        statistics = {'column': column, 'dtype': str(dtype)}
+        numeric_statistics = preview['statistics'].get(column)
+        if numeric_statistics:
+            count = numeric_statistics['count']
+            statistics.update({
+                'count': count,
+                'null_count': preview['row_count'] - count,
+                'min': numeric_statistics['min'],
+                'max': numeric_statistics['max'],
+                'mean': numeric_statistics['sum'] / count if count else None,
+            })
+        if column == entity_column and entities is not None:
+            statistics['distinct_count'] = len(entities)
+        column_statistics.append(statistics)
+    return column_statistics
@@ -0,0 +1,157 @@
+import abc
+import os
+
+import pandas as pd
+
+from app.core.merge import deduplicate
+from config import HDF5_STORE_INDEX
+
+
+class AbstractSegmentStorage(metaclass=abc.ABCMeta):
+    """
+    Every upload is stored in its own segment, so a new datasource version only costs
+    the size of the upload, not the size of the whole history.
+    A storage knows how to write and read back a single segment.
+    """
+    EXTENSION = ''
+
+    def location_for(self, basename):
+        return basename + self.EXTENSION
+
+    @abc.abstractmethod
+    def write(self, dataframe, location, entity_column=None):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def read(self, location, columns=None, start_date=None, end_date=None):
+        raise NotImplementedError
+
+
+class HDF5SegmentStorage(AbstractSegmentStorage):
+    EXTENSION = '.hdf5'
+
+    def write(self, dataframe, location, entity_column=None):
+        dataframe.to_hdf(location, key=HDF5_STORE_INDEX, format='table')
+
+    def read(self, location, columns=None, start_date=None, end_date=None):
+        with pd.HDFStore(location, mode='r') as hdf_store:
+            if not hdf_store.get_storer(HDF5_STORE_INDEX).is_table:
+                # files written before segmentation are stored in the fixed format, which can't be queried
+                return _select(hdf_store[HDF5_STORE_INDEX], columns, start_date, end_date)
+
+            where = []
+            if start_date is not None:
+                where.append(f"index >= '{pd.Timestamp(start_date).isoformat()}'")
+            if end_date is not None:
+                where.append(f"index <= '{pd.Timestamp(end_date).isoformat()}'")
+            return hdf_store.select(HDF5_STORE_INDEX, where=where or None, columns=columns)
+
+
+class ParquetSegmentStorage(AbstractSegmentStorage):
+    """
+    Stores a segment as a parquet dataset partitioned by month and, when the interpreter
+    declares one, by entity (e.g. the stock ticker), so that readers asking for a date range
+    only open the partitions they need.
+    """
+    MONTH_PARTITION = 'partition_month'
+    ENTITY_PARTITION = 'partition_entity'
+    MONTH_FORMAT = '%Y-%m'
+
+    def write(self, dataframe, location, entity_column=None):
+        import pyarrow
+        import pyarrow.parquet
+
+        index_name = dataframe.index.name
+        table = dataframe.reset_index()
+        table[self.MONTH_PARTITION] = table[index_name].dt.strftime(self.MONTH_FORMAT)
+        partition_columns = [self.MONTH_PARTITION]
+        if entity_column:
+            table[self.ENTITY_PARTITION] = table[entity_column].astype(str)
+            partition_columns.append(self.ENTITY_PARTITION)
+
+        pyarrow.parquet.write_to_dataset(
+            pyarrow.Table.from_pandas(table, preserve_index=False),
+            root_path=location,
+            partition_cols=partition_columns
+        )
+
+    def read(self, location, columns=None, start_date=None, end_date=None):
+        index_name = _read_index_name(location)
+
+        filters = []
+        if start_date is not None:
+            filters.append((self.MONTH_PARTITION, '>=', pd.Timestamp(start_date).strftime(self.MONTH_FORMAT)))
+            filters.append((index_name, '>=', pd.Timestamp(start_date)))
+        if end_date is not None:
+            filters.append((self.MONTH_PARTITION, '<=', pd.Timestamp(end_date).strftime(self.MONTH_FORMAT)))
+            filters.append((index_name, '<=', pd.Timestamp(end_date)))
+
+        read_columns = [index_name] + list(columns) if columns is not None else None
+        dataframe = pd.read_parquet(location, columns=read_columns, filters=filters or None)
+        dataframe = dataframe.drop(columns=[self.MONTH_PARTITION, self.ENTITY_PARTITION], errors='ignore')
+        return dataframe.set_index(index_name).sort_index(ascending=True)
+
+
+def _read_index_name(location):
+    import pyarrow.dataset
+
+    # the index is written as the first column of the dataset
+    pandas_metadata = pyarrow.dataset.dataset(location, format='parquet', partitioning='hive').schema.pandas_metadata
+    return pandas_metadata['columns'][0]['name']
+
+
+def _select(dataframe, columns=None, start_date=None, end_date=None):
+    if start_date is not None:
+        dataframe = dataframe[dataframe.index >= pd.Timestamp(start_date)]
+    if end_date is not None:
+        dataframe = dataframe[dataframe.index <= pd.Timestamp(end_date)]
+    if columns is not None:
+        dataframe = dataframe[list(columns)]
+    return dataframe
+
+
+def _concat(dataframes):
+    # each segment has its own categories, concatenating them would fall back to plain objects
+    categorical_columns = {
+        column: 'category' for column, dtype in dataframes[0].dtypes.items()
+        if dtype.name == 'category'
+    }
+    return pd.concat(dataframes).astype(categorical_columns)
+
+
+def get_storage_for_location(location):
+    if os.path.isdir(location):
+        return ParquetSegmentStorage()
+    return HDF5SegmentStorage()
+
+
+def read_segments(locations, columns=None, start_date=None, end_date=None, entity_column=None):
+    """
+    Rebuilds the merged view of a datasource version from its ordered list of segments.
+    Only the requested columns and dates are read from the segments that support it.
+    Rows are keyed on the index and the entity column: when a key appears in several
+    segments the most recent one wins.
+
+    :param list locations: the segment paths, oldest first
+    :param list columns: the columns to read, all of them if None
+    :param datetime start_date: the first date to read, inclusive
+    :param datetime end_date: the last date to read, inclusive
+    :param str entity_column: the column identifying the entity of a row, if any
+    :return pd.DataFrame: the merged and sorted dataframe
+    """
+    read_columns = columns
+    if columns is not None and entity_column and entity_column not in columns:
+        read_columns = list(columns) + [entity_column]
+
+    dataframes = [
+        get_storage_for_location(location).read(location, read_columns, start_date, end_date)
+        for location in locations
+    ]
+    if len(dataframes) == 1:
+        dataframe = dataframes[0]
+    else:
+        dataframe = deduplicate(_concat(dataframes), entity_column).sort_index(ascending=True)
+
+    if read_columns is not columns:
+        dataframe = dataframe.drop(columns=[entity_column])
+    return dataframe
@@ -1,7 +1,7 @@
 import importlib
 import string
 import uuid
-from functools import wraps
+from functools import lru_cache, wraps
 
 from flask import request, g, json, current_app, url_for, redirect, abort, flash
 
@@ -37,6 +37,7 @@ def generate_upload_code():
     return str(uuid.uuid4())
 
 
+@lru_cache(maxsize=None)
 def import_class(name):
     components = name.split('.')
     mod = importlib.import_module(".".join(components[:-1]))
@@ -3,6 +3,10 @@ from app.entities.customer import (
     UserEntity, CompanyEntity, CompanyConfigurationEntity,
     CustomerActionEntity, UserProfileEntity, Actions
 )
-from app.entities.datasource import DataSourceEntity
-from app.entities.prediction import PredictionTaskEntity, PredictionTaskStatusEntity, PredictionResultEntity, TaskStatusTypes
+from app.entities.datasource import DataSourceEntity, DataSourceColumnStatisticsEntity
+from app.entities.prediction import (
+    PredictionTaskEntity, PredictionTaskStatusEntity, PredictionResultEntity, TaskStatusTypes, TaskPriority
+)
 from app.entities.training import TrainingTaskEntity
+from app.entities.ingestion import IngestionTaskEntity, IngestionTaskStatusEntity
+from app.entities.backtest import BacktestTaskEntity, BacktestTaskStatusEntity
@@ -0,0 +1,93 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, JSON
+from sqlalchemy.orm import relationship
+from sqlalchemy.orm.exc import NoResultFound
+
+from app.database import db_session
+from app.entities import BaseEntity
+from app.entities.prediction import TaskStatusTypes, TaskPriority, COMPLETED_STATES
+
+
+class BacktestTaskStatusEntity(BaseEntity):
+    __tablename__ = 'backtest_task_status'
+
+    backtest_task_id = Column(Integer, ForeignKey('backtest_task.id'), nullable=False)
+    backtest_task = relationship('BacktestTaskEntity', back_populates='statuses')
+    state = Column(String(), index=True)
+    message = Column(String(), nullable=True)
+
+
+class BacktestTaskEntity(BaseEntity):
+    """
+    The evaluation of the company's oracle over a range of past cutoffs of a datasource version.
+    The accuracy metrics are kept here, every scored prediction is in the file at result_location.
+    """
+    __tablename__ = 'backtest_task'
+
+    INCLUDE_ATTRIBUTES = ('status', 'statuses', 'is_completed')
+
+    task_code = Column(String(60), unique=True, nullable=False)
+
+    company_id = Column(ForeignKey('company.id'), nullable=False)
+    company = relationship('CompanyEntity', foreign_keys=company_id)
+
+    user_id = Column(ForeignKey('user.id'), nullable=False)
+    user = relationship('UserEntity', foreign_keys=user_id)
+
+    datasource_id = Column(ForeignKey('data_source.id'), nullable=False)
+    datasource = relationship('DataSourceEntity', back_populates='backtest_task_list')
+
+    backtest_request = Column(JSON)
+    # the metrics of the whole backtest and of every cutoff, only set once the backtest is successful
+    metrics = Column(JSON, nullable=True)
+    result_location = Column(String(), nullable=True)
+
+    statuses = relationship('BacktestTaskStatusEntity', cascade='all, delete-orphan')
+
+    # backtests are dispatched along with the prediction tasks, after all of them
+    priority = TaskPriority.backtest.value
+    # when the backtest was sent to the workers, it's queued until then
+    dispatched_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+    @staticmethod
+    def get_by_task_code(task_code):
+        try:
+            backtest_task_entity = BacktestTaskEntity.query.filter(BacktestTaskEntity.task_code == task_code).one()
+            db_session.refresh(backtest_task_entity)
+            return backtest_task_entity
+        except NoResultFound:
+            return None
+
+    @staticmethod
+    def get_pending():
+        return BacktestTaskEntity.query.filter(
+            BacktestTaskEntity.dispatched_at.is_(None),
+            BacktestTaskEntity.is_not_completed()
+        ).order_by(BacktestTaskEntity.created_at).all()
+
+    @staticmethod
+    def get_running(dispatched_since):
+        return BacktestTaskEntity.query.filter(
+            BacktestTaskEntity.dispatched_at >= dispatched_since,
+            BacktestTaskEntity.is_not_completed()
+        ).all()
+
+    @staticmethod
+    def get_timed_out(dispatched_before):
+        return BacktestTaskEntity.query.filter(
+            BacktestTaskEntity.dispatched_at < dispatched_before,
+            BacktestTaskEntity.is_not_completed()
+        ).all()
+
+    @staticmethod
+    def is_not_completed():
+        return ~BacktestTaskEntity.statuses.any(BacktestTaskStatusEntity.state.in_(COMPLETED_STATES))
+
+    @property
+    def status(self):
+        if len(self.statuses):
+            return self.statuses[-1].state
+        return None
+
+    @property
+    def is_completed(self):
+        return self.status in [TaskStatusTypes.successful.value, TaskStatusTypes.failed.value]
@@ -5,7 +5,7 @@ from itsdangerous import (
     TimedJSONWebSignatureSerializer as Serializer, BadSignature, SignatureExpired
 )
 from passlib.apps import custom_app_context as pwd_context
-from sqlalchemy import (event, Column, String, JSON, ForeignKey, Boolean, Enum)
+from sqlalchemy import (event, Column, String, JSON, ForeignKey, Boolean, Enum, Index)
 from sqlalchemy.orm import relationship, validates
 from sqlalchemy.orm.exc import NoResultFound
 
@@ -73,13 +73,12 @@ class CompanyEntity(BaseEntity):
 
     @property
     def current_configuration(self):
-        if len(self.configuration):
-            return self.configuration[-1]
+        return CompanyConfigurationEntity.get_latest_by_company_id(self.id)
 
     @property
     def current_datasource(self):
-        if len(self.data_sources):
-            return self.data_sources[-1]
+        from app.entities.datasource import DataSourceEntity
+        return DataSourceEntity.get_latest_by_company_id(self.id)
 
 
 class UserEntity(BaseEntity):
@@ -158,6 +157,10 @@ class UserProfileEntity(BaseEntity):
 
 class CompanyConfigurationEntity(BaseEntity):
     __tablename__ = 'company_configuration'
+    # the current configuration of a company is its latest one
+    __table_args__ = (
+        Index('ix_company_configuration_company_id_id', 'company_id', 'id'),
+    )
 
     company_id = Column(ForeignKey('company.id'), nullable=False)
     company = relationship('CompanyEntity', foreign_keys=company_id)
@@ -182,6 +185,12 @@ class CompanyConfigurationEntity(BaseEntity):
             return None
         return configuration
 
+    @staticmethod
+    def get_latest_by_company_id(company_id):
+        return CompanyConfigurationEntity.query.filter(
+            CompanyConfigurationEntity.company_id == company_id
+        ).order_by(CompanyConfigurationEntity.id.desc()).first()
+
 
 def update_user_action(mapper, connection, self):
     action = CustomerActionEntity(
@@ -1,25 +1,29 @@
 import enum
 
-import pandas as pd
-from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, Boolean, Enum
+from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, Boolean, Enum, JSON, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy import event
 
+from app.core.storage import read_segments
 from app.database import local_session_scope
 from app.entities import BaseEntity, CustomerActionEntity, Actions
-from config import HDF5_STORE_INDEX
 
 
 class UploadTypes(enum.Enum):
     FILESYSTEM = 'filesystem'
     BLOBSTORE = 'blobstore'
+    PARQUET = 'parquet'
 
 
 class DataSourceEntity(BaseEntity):
-    INCLUDE_ATTRIBUTES = ('type', 'prediction_task_list')
+    INCLUDE_ATTRIBUTES = ('type', 'prediction_task_list', 'column_statistics')
 
     __tablename__ = 'data_source'
+    # the current datasource of a company is its latest version
+    __table_args__ = (
+        Index('ix_data_source_company_id_id', 'company_id', 'id'),
+    )
 
     user_id = Column(Integer, ForeignKey('user.id'), nullable=False)
     user = relationship('UserEntity', foreign_keys=user_id)
@@ -37,20 +41,54 @@ class DataSourceEntity(BaseEntity):
                                         cascade='all, delete-orphan')
     training_task_list = relationship('TrainingTaskEntity', back_populates='datasource',
                                       cascade='all, delete-orphan')
+    backtest_task_list = relationship('BacktestTaskEntity', back_populates='datasource',
+                                      cascade='all, delete-orphan')
 
     is_original = Column(Boolean, default=False)
     features = Column(String, nullable=True)
     target_feature = Column(String, nullable=True)
 
-    def get_file(self):
-        with pd.HDFStore(self.location) as hdf_store:
-            dataframe = hdf_store[HDF5_STORE_INDEX]
-            return dataframe
+    # ordered list of the segment files making up this version, oldest first.
+    # Versions created before segmentation only have their full file in location
+    segments = Column(JSON, nullable=True)
+    # the column identifying the entity of a row (e.g. the stock ticker), part of the row key with the index
+    entity_column = Column(String, nullable=True)
+    # head and tail rows, row count, date span and column statistics, see app.core.preview
+    preview = Column(JSON, nullable=True)
+
+    # the catalog of the version, so that questions about the data don't need its files
+    row_count = Column(Integer, nullable=True)
+    entities = Column(JSON, nullable=True)
+    frequency = Column(String, nullable=True)
+    # identical for two versions with the same content, see app.core.merge.content_hash
+    content_hash = Column(String(40), nullable=True)
+    column_statistics = relationship('DataSourceColumnStatisticsEntity', back_populates='data_source',
+                                     cascade='all, delete-orphan')
+
+    @property
+    def segment_locations(self):
+        return self.segments or [self.location]
+
+    def get_file(self, columns=None, start_date=None, end_date=None):
+        return read_segments(self.segment_locations, columns, start_date, end_date, self.entity_column)
 
     @staticmethod
     def get_for_user(user_id):
         return DataSourceEntity.query.filter(DataSourceEntity.user_id == str(user_id)).all()
 
+    @staticmethod
+    def get_by_id(datasource_id):
+        try:
+            return DataSourceEntity.query.filter(DataSourceEntity.id == datasource_id).one()
+        except NoResultFound:
+            return None
+
+    @staticmethod
+    def get_latest_by_company_id(company_id):
+        return DataSourceEntity.query.filter(
+            DataSourceEntity.company_id == company_id
+        ).order_by(DataSourceEntity.id.desc()).first()
+
     @staticmethod
     def get_by_upload_code(upload_code):
         try:
@@ -63,6 +101,22 @@ class DataSourceEntity(BaseEntity):
         return f"{upload_code}_{original_filename}"
 
 
+class DataSourceColumnStatisticsEntity(BaseEntity):
+    __tablename__ = 'data_source_column_statistics'
+
+    data_source_id = Column(Integer, ForeignKey('data_source.id'), nullable=False, index=True)
+    data_source = relationship('DataSourceEntity', back_populates='column_statistics')
+
+    column = Column(String, nullable=False)
+    dtype = Column(String, nullable=False)
+    count = Column(Integer, nullable=True)
+    null_count = Column(Integer, nullable=True)
+    distinct_count = Column(Integer, nullable=True)
+    min = Column(Float, nullable=True)
+    max = Column(Float, nullable=True)
+    mean = Column(Float, nullable=True)
+
+
 def update_user_action(mapper, connection, self):
     action = CustomerActionEntity(
         company_id=self.company_id,
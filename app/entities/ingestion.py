@@ -0,0 +1,60 @@
+from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
+from sqlalchemy.orm.exc import NoResultFound
+
+from app.database import db_session
+from app.entities import BaseEntity
+from app.entities.prediction import TaskStatusTypes
+
+
+class IngestionTaskStatusEntity(BaseEntity):
+    __tablename__ = 'ingestion_task_status'
+
+    ingestion_task_id = Column(Integer, ForeignKey('ingestion_task.id'), nullable=False)
+    ingestion_task = relationship('IngestionTaskEntity', back_populates='statuses')
+    state = Column(String(), index=True)
+    message = Column(String(), nullable=True)
+
+
+class IngestionTaskEntity(BaseEntity):
+    """
+    The processing of an uploaded file, from the staged file to the new datasource version.
+    The task is identified by the upload code the datasource version will be created with.
+    """
+    __tablename__ = 'ingestion_task'
+
+    INCLUDE_ATTRIBUTES = ('status', 'statuses', 'is_completed')
+
+    upload_code = Column(String(60), unique=True, nullable=False)
+
+    company_id = Column(ForeignKey('company.id'), nullable=False)
+    company = relationship('CompanyEntity', foreign_keys=company_id)
+
+    user_id = Column(ForeignKey('user.id'), nullable=False)
+    user = relationship('UserEntity', foreign_keys=user_id)
+
+    # the original name of the uploaded file and where it's staged until the ingestion is done
+    filename = Column(String(), nullable=False)
+    location = Column(String(), nullable=False)
+
+    statuses = relationship('IngestionTaskStatusEntity', cascade='all, delete-orphan')
+
+    @staticmethod
+    def get_by_upload_code(upload_code):
+        try:
+            ingestion_task_entity = IngestionTaskEntity.query.filter(
+                IngestionTaskEntity.upload_code == upload_code).one()
+            db_session.refresh(ingestion_task_entity)
+            return ingestion_task_entity
+        except NoResultFound:
+            return None
+
+    @property
+    def status(self):
+        if len(self.statuses):
+            return self.statuses[-1].state
+        return None
+
+    @property
+    def is_completed(self):
+        return self.status in [TaskStatusTypes.successful.value, TaskStatusTypes.failed.value]
@@ -1,6 +1,7 @@
+import datetime
 from enum import Enum
 
-from sqlalchemy import event, Column, String, ForeignKey, Integer, JSON
+from sqlalchemy import event, func, or_, Column, String, ForeignKey, Integer, JSON, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm.exc import NoResultFound
 
@@ -16,6 +17,30 @@ class TaskStatusTypes(Enum):
     failed = 'FAILED'
 
 
+COMPLETED_STATES = [TaskStatusTypes.successful.value, TaskStatusTypes.failed.value]
+RUNNING_STATES = [TaskStatusTypes.started.value, TaskStatusTypes.in_progress.value]
+
+
+def get_current_status_values(task_table, state, timestamp):
+    """
+    :return dict: the values of the current status columns of a task, once it gets a status in the given state
+    """
+    values = {'current_status': state}
+    if state in RUNNING_STATES:
+        values['started_at'] = func.coalesce(task_table.c.started_at, timestamp)
+    if state in COMPLETED_STATES:
+        values['finished_at'] = timestamp
+    return values
+
+
+class TaskPriority(Enum):
+    # requests made by a user go ahead of the ones started automatically, e.g. after an upload,
+    # and the backtests only get the slots nothing else is waiting for
+    backtest = -10
+    automatic = 0
+    interactive = 10
+
+
 class PredictionTaskEntity(BaseEntity):
     __tablename__ = 'prediction_task'
 
@@ -39,6 +64,24 @@ class PredictionTaskEntity(BaseEntity):
     prediction_result = relationship('PredictionResultEntity', uselist=False, back_populates='prediction_task',
                                      cascade='all, delete-orphan')
     prediction_request = Column(JSON)
+    # the tasks of a batch are dispatched together, sharing the data and the trained models
+    batch_code = Column(String(60), nullable=True, index=True)
+    # the model of this training task is used instead of training the oracle
+    training_task_code = Column(String(60), nullable=True)
+
+    priority = Column(Integer, nullable=False, default=TaskPriority.interactive.value)
+    # when the task was sent to the workers, it's queued until then
+    dispatched_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    # identical requests on the same datasource content and configuration have the same fingerprint
+    fingerprint = Column(String(40), nullable=True, index=True)
+    # a task submitted while an identical one is in flight isn't run, it gets the result of that task
+    leader_task_code = Column(String(60), nullable=True, index=True)
+
+    # the state of the latest status, and when the task started and finished running:
+    # set along with every new status, so that they can be queried without the status history
+    current_status = Column(String(), nullable=True, index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
 
     @staticmethod
     def get_by_task_code(task_code):
@@ -64,18 +107,99 @@ class PredictionTaskEntity(BaseEntity):
     def get_successful_by_company_id(company_id):
         return PredictionTaskEntity.query.filter(
             PredictionTaskEntity.company_id == company_id,
-            PredictionTaskEntity.statuses.any(state=TaskStatusTypes.successful.value)
+            PredictionTaskEntity.current_status == TaskStatusTypes.successful.value
+        ).all()
+
+    @staticmethod
+    def get_by_batch_code(batch_code):
+        return PredictionTaskEntity.query.filter(
+            PredictionTaskEntity.batch_code == batch_code
+        ).order_by(PredictionTaskEntity.id).all()
+
+    @staticmethod
+    def get_pending():
+        return PredictionTaskEntity.query.filter(
+            PredictionTaskEntity.dispatched_at.is_(None),
+            PredictionTaskEntity.leader_task_code.is_(None),
+            PredictionTaskEntity.is_not_completed()
+        ).order_by(PredictionTaskEntity.priority.desc(), PredictionTaskEntity.created_at).all()
+
+    @staticmethod
+    def get_running(dispatched_since):
+        return PredictionTaskEntity.query.filter(
+            PredictionTaskEntity.dispatched_at >= dispatched_since,
+            PredictionTaskEntity.is_not_completed()
+        ).all()
+
+    @staticmethod
+    def get_timed_out(dispatched_before):
+        return PredictionTaskEntity.query.filter(
+            PredictionTaskEntity.dispatched_at < dispatched_before,
+            PredictionTaskEntity.is_not_completed()
+        ).all()
+
+    @staticmethod
+    def get_statuses_by_task_codes(company_id, task_codes):
+        """
+        The current status of many tasks at once, in a single query and without loading their status history
+
+        :return list: a (task_code, status, has_result) row for every task of the company among task_codes
+        """
+        return db_session.query(
+            PredictionTaskEntity.task_code,
+            PredictionTaskEntity.current_status,
+            PredictionResultEntity.id.isnot(None).label('has_result')
+        ).outerjoin(
+            PredictionResultEntity, PredictionResultEntity.prediction_task_id == PredictionTaskEntity.id
+        ).filter(
+            PredictionTaskEntity.company_id == company_id,
+            PredictionTaskEntity.task_code.in_(task_codes)
         ).all()
 
+    @staticmethod
+    def get_in_flight_by_fingerprint(company_id, fingerprint, dispatched_since, excluded_task_code):
+        """
+        The oldest other task with this fingerprint which is queued or running, and isn't waiting for a task itself
+        """
+        return PredictionTaskEntity.query.filter(
+            PredictionTaskEntity.task_code != excluded_task_code,
+            PredictionTaskEntity.company_id == company_id,
+            PredictionTaskEntity.fingerprint == fingerprint,
+            PredictionTaskEntity.leader_task_code.is_(None),
+            or_(PredictionTaskEntity.dispatched_at.is_(None), PredictionTaskEntity.dispatched_at >= dispatched_since),
+            PredictionTaskEntity.is_not_completed()
+        ).order_by(PredictionTaskEntity.created_at).first()
+
+    @staticmethod
+    def get_latest_successful_by_fingerprint(company_id, fingerprint, excluded_task_code):
+        return PredictionTaskEntity.query.filter(
+            PredictionTaskEntity.task_code != excluded_task_code,
+            PredictionTaskEntity.company_id == company_id,
+            PredictionTaskEntity.fingerprint == fingerprint,
+            PredictionTaskEntity.current_status == TaskStatusTypes.successful.value,
+            PredictionTaskEntity.prediction_result.has()
+        ).order_by(PredictionTaskEntity.created_at.desc()).first()
+
+    @staticmethod
+    def get_by_leader_task_code(task_code):
+        return PredictionTaskEntity.query.filter(
+            PredictionTaskEntity.leader_task_code == task_code
+        ).order_by(PredictionTaskEntity.id).all()
+
+    @staticmethod
+    def is_not_completed():
+        return or_(
+            PredictionTaskEntity.current_status.is_(None),
+            PredictionTaskEntity.current_status.notin_(COMPLETED_STATES)
+        )
+
     @property
     def status(self):
-        if len(self.statuses):
-            return self.statuses[-1].state
-        return None
+        return self.current_status
 
     @property
     def is_completed(self):
-        return self.status in [TaskStatusTypes.successful.value, TaskStatusTypes.failed.value]
+        return self.current_status in COMPLETED_STATES
 
     @property
     def datasource_upload_code(self):
@@ -85,7 +209,7 @@ class PredictionTaskEntity(BaseEntity):
 class PredictionTaskStatusEntity(BaseEntity):
     __tablename__ = 'prediction_task_status'
 
-    prediction_task_id = Column(Integer, ForeignKey('prediction_task.id'), nullable=False)
+    prediction_task_id = Column(Integer, ForeignKey('prediction_task.id'), nullable=False, index=True)
     prediction_task = relationship('PredictionTaskEntity', back_populates='statuses')
     state = Column(String(), index=True)
     message = Column(String(), nullable=True)
@@ -100,7 +224,7 @@ class PredictionResultEntity(BaseEntity):
     task_code = Column(String(60), unique=True)
     result = Column(JSON)
 
-    prediction_task_id = Column(Integer, ForeignKey('prediction_task.id'), nullable=False)
+    prediction_task_id = Column(Integer, ForeignKey('prediction_task.id'), nullable=False, index=True)
     prediction_task = relationship('PredictionTaskEntity', back_populates='prediction_result')
 
     @staticmethod
@@ -121,4 +245,14 @@ def update_user_action(mapper, connection, self):
         session.add(action)
 
 
+def update_current_status(mapper, connection, self):
+    task_table = PredictionTaskEntity.__table__
+    connection.execute(
+        task_table.update().where(task_table.c.id == self.prediction_task_id).values(
+            **get_current_status_values(task_table, self.state, self.created_at or datetime.datetime.utcnow())
+        )
+    )
+
+
 event.listen(PredictionTaskEntity, 'after_insert', update_user_action)
+event.listen(PredictionTaskStatusEntity, 'after_insert', update_current_status)
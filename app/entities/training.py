@@ -1,9 +1,12 @@
-from sqlalchemy import event, Column, ForeignKey, Integer, String, JSON
+import datetime
+
+from sqlalchemy import event, Column, DateTime, ForeignKey, Integer, String, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm.exc import NoResultFound
 
 from app.database import local_session_scope
 from app.entities import BaseEntity, Actions, CustomerActionEntity
+from app.entities.prediction import COMPLETED_STATES, get_current_status_values
 
 
 class TrainingTaskStatusEntity(BaseEntity):
@@ -11,14 +14,14 @@ class TrainingTaskStatusEntity(BaseEntity):
 
     training_task_id = Column(Integer, ForeignKey('training_task.id'), nullable=False)
     training_task = relationship('TrainingTaskEntity', back_populates='statuses')
-    state = Column(String(10), index=True)
+    state = Column(String(), index=True)
     message = Column(JSON, nullable=True)
 
 
 class TrainingTaskEntity(BaseEntity):
     __tablename__ = 'training_task'
 
-    INCLUDE_ATTRIBUTES = ('task_code', 'statuses', 'datasource_id', 'datasource', 'status')
+    INCLUDE_ATTRIBUTES = ('task_code', 'statuses', 'datasource_id', 'datasource', 'status', 'is_completed')
 
     task_code = Column(String(60), unique=True, nullable=False)
     statuses = relationship('TrainingTaskStatusEntity', cascade='all, delete-orphan')
@@ -32,6 +35,15 @@ class TrainingTaskEntity(BaseEntity):
     datasource_id = Column(ForeignKey('data_source.id'), nullable=False)
     datasource = relationship('DataSourceEntity', back_populates='training_task_list')
 
+    training_request = Column(JSON)
+    # the key of the trained model in the registry, only set once the training is successful
+    model_key = Column(String, nullable=True)
+
+    # set along with every new status, see PredictionTaskEntity
+    current_status = Column(String(), nullable=True, index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
     @staticmethod
     def get_by_task_code(task_code):
         try:
@@ -39,10 +51,20 @@ class TrainingTaskEntity(BaseEntity):
         except NoResultFound:
             return None
 
+    @staticmethod
+    def get_latest_successful_by_datasource_id(datasource_id):
+        return TrainingTaskEntity.query.filter(
+            TrainingTaskEntity.datasource_id == datasource_id,
+            TrainingTaskEntity.model_key.isnot(None)
+        ).order_by(TrainingTaskEntity.created_at.desc()).first()
+
     @property
     def status(self):
-        if len(self.statuses):
-            return self.statuses[-1].state
+        return self.current_status
+
+    @property
+    def is_completed(self):
+        return self.current_status in COMPLETED_STATES
 
 
 def update_user_action(mapper, connection, self):
@@ -55,4 +77,14 @@ def update_user_action(mapper, connection, self):
         session.add(action)
 
 
+def update_current_status(mapper, connection, self):
+    task_table = TrainingTaskEntity.__table__
+    connection.execute(
+        task_table.update().where(task_table.c.id == self.training_task_id).values(
+            **get_current_status_values(task_table, self.state, self.created_at or datetime.datetime.utcnow())
+        )
+    )
+
+
 event.listen(TrainingTaskEntity, 'after_insert', update_user_action)
+event.listen(TrainingTaskStatusEntity, 'after_insert', update_current_status)
@@ -2,6 +2,9 @@ import abc
 from collections import namedtuple
 
 import pandas as pd
+import pyarrow
+
+from config import CSV_CHUNK_SIZE
 
 InterpreterResult = namedtuple('InterpreterResult', 'result errors')
 
@@ -9,21 +12,73 @@ InterpreterResult = namedtuple('InterpreterResult', 'result errors')
 class AbstractDataSourceInterpreter(metaclass=abc.ABCMeta):
     COLUMNS = []
     INDEX_COLUMN = ''
+    ENTITY_COLUMN = None
+    # the type of each column, applied while parsing: columns not listed here are inferred by pandas
+    DTYPES = {}
+    CHUNK_SIZE = CSV_CHUNK_SIZE
 
     def __init__(self):
         self.errors = []
 
-    def from_csv_to_dataframe(self, csv_file):
+    def validate(self, dataframe):
+        errors = []
+        if not list(dataframe.columns) == self.COLUMNS:
+            errors.append('Invalid columns!')
+        if len(dataframe[dataframe.index >= pd.Timestamp.now(tz=getattr(dataframe.index, 'tz', None))]) > 0:
+            errors.append('Contains data in the future!')
+        return errors
+
+    def iter_csv_chunks(self, csv_file):
+        """
+        Parses the csv file CHUNK_SIZE rows at a time, so that the memory used by the parser
+        doesn't depend on the size of the upload. Every chunk is validated as soon as it's parsed
+        and the iteration stops at the first invalid one, leaving the errors in self.errors.
+
+        :param csv_file: a path or a file-like object
+        :return: a generator of validated dataframe chunks
+        """
+        reader = None
         try:
-            dataframe = pd.read_csv(csv_file, sep=',', index_col=self.INDEX_COLUMN, parse_dates=True)
+            reader = pd.read_csv(
+                csv_file, sep=',', index_col=self.INDEX_COLUMN, parse_dates=True, chunksize=self.CHUNK_SIZE,
+                dtype=self.DTYPES
+            )
+            for chunk in reader:
+                errors = self.validate(chunk)
+                if errors:
+                    self.errors.extend(errors)
+                    return
+                yield chunk
         except Exception as e:
-            dataframe = None
             self.errors.append(str(e))
-        else:
-            if not list(dataframe.columns) == self.COLUMNS:
-                self.errors.append('Invalid columns!')
-            if len(dataframe[dataframe.index >= pd.Timestamp.now()]) > 0:
-                self.errors.append('Contains data in the future!')
+        finally:
+            if reader is not None:
+                reader.close()
+
+    def from_csv_to_dataframe(self, csv_file):
+        """
+        Every chunk is moved to an Arrow table as soon as it's parsed. The tables are converted to a single
+        dataframe at the end, releasing each of their columns once it's converted: the parsed chunks
+        and the whole dataframe are never in memory together.
+        """
+        categorical_columns = [column for column, dtype in self.DTYPES.items() if dtype == 'category']
+        tables = []
+        for chunk in self.iter_csv_chunks(csv_file):
+            # every chunk has its own categories, so categorical columns are restored from their values at the end
+            chunk = chunk.astype({column: object for column in categorical_columns if column in chunk})
+            tables.append(pyarrow.Table.from_pandas(chunk))
+        if self.errors:
+            return InterpreterResult(None, self.errors)
+        if not tables:
+            self.errors.append('No data found!')
+            return InterpreterResult(None, self.errors)
+
+        table = pyarrow.concat_tables(tables)
+        del tables, chunk
+        dataframe = table.to_pandas(
+            categories=[column for column in categorical_columns if column in table.column_names],
+            split_blocks=True, self_destruct=True
+        )
         return InterpreterResult(dataframe, self.errors)
 
     @abc.abstractmethod
@@ -36,6 +91,18 @@ class GymDataSourceInterpreter(AbstractDataSourceInterpreter):
                'temperature', 'is_start_of_semester', 'is_during_semester', 'month',
                'hour']
     INDEX_COLUMN = 'date'
+    DTYPES = {
+        'number_people': 'int32',
+        'timestamp': 'int32',
+        'day_of_week': 'int8',
+        'is_weekend': 'int8',
+        'is_holiday': 'int8',
+        'temperature': 'float32',
+        'is_start_of_semester': 'int8',
+        'is_during_semester': 'int8',
+        'month': 'int8',
+        'hour': 'int8',
+    }
 
     def from_dataframe_to_data_dict(self, dataframe):
         cols = dataframe.columns
@@ -63,9 +130,28 @@ class StockDataSourceInterpreter(AbstractDataSourceInterpreter):
                '12 Month Return', '24 Month Return', '36 Month Return', 'Resource',
                'Financial']
     INDEX_COLUMN = 'DateStamps'
+    ENTITY_COLUMN = 'Ticker'
+    # Resource and Financial are 0/1 flags, kept as floats like the other features since a missing value
+    # wouldn't fit an integer column. Share counts are too large for the precision of a float32
+    DTYPES = dict(
+        {column: 'float32' for column in COLUMNS},
+        Ticker='category',
+        Shares='float64'
+    )
 
     def from_dataframe_to_data_dict(self, dataframe):
-        dataframe.index = dataframe.index.map(lambda t: t.replace(hour=7))
-        dataframe.index = dataframe.index.tz_localize('UTC')
-        features = set(dataframe.columns) - {'DateStamps', 'Ticker'}
-        return {feature: dataframe.pivot(columns='Ticker', values=feature) for feature in features}
+        """
+        Reshapes the long (date, ticker) rows into one time x ticker panel per feature.
+        Every date is moved to 07:00 UTC, and all the panels come from a single unstack.
+        """
+        index = dataframe.index
+        index = index - pd.to_timedelta(index.hour, unit='h') + pd.Timedelta(hours=7)
+        features = [column for column in dataframe.columns if column not in {'DateStamps', 'Ticker'}]
+
+        rows = dataframe[features]
+        rows.index = pd.MultiIndex.from_arrays(
+            [index.tz_localize('UTC'), dataframe['Ticker'].astype(str)], names=[dataframe.index.name, 'Ticker']
+        )
+        panel = rows.unstack('Ticker')
+
+        return {feature: panel[feature] for feature in features}
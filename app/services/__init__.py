@@ -1,3 +1,3 @@
 from app.services import (
-    user, company, prediction, datasource, oracle, email, superuser, training, strategies
+    user, company, prediction, datasource, oracle, email, superuser, training, strategies, ingestion, backtest
 )
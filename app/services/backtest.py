@@ -0,0 +1,103 @@
+import os
+
+import pyarrow
+import pyarrow.feather
+
+from app import services
+from app.core.backtest import get_cutoffs, split_cutoffs
+from app.core.models import BacktestTask, BacktestTaskStatus
+from app.core.schemas import BacktestRequestSchema
+from app.entities import TaskStatusTypes
+from app.entities.backtest import BacktestTaskEntity, BacktestTaskStatusEntity
+from config import BACKTEST_CHUNKS, BACKTEST_FOLDER
+
+
+def create_new_task(task_code, company_id, user_id, datasource_id, backtest_request):
+    backtest_task = BacktestTask(
+        task_code=task_code,
+        company_id=company_id,
+        user_id=user_id,
+        datasource_id=datasource_id,
+        backtest_request=backtest_request
+    )
+    backtest_task = insert(backtest_task)
+    set_task_status(backtest_task, TaskStatusTypes.queued)
+    return backtest_task
+
+
+def insert(backtest_task):
+    model = backtest_task.to_model()
+    model.save()
+    return BacktestTask.from_model(model)
+
+
+def get_task_by_code(task_code):
+    model = BacktestTaskEntity.get_by_task_code(task_code)
+    return BacktestTask.from_model(model)
+
+
+def set_task_status(backtest_task, status, message=None):
+    model = BacktestTaskStatusEntity(
+        backtest_task_id=backtest_task.id,
+        state=status.value,
+        message=message
+    )
+    model.save()
+    if status in (TaskStatusTypes.successful, TaskStatusTypes.failed):
+        # a slot was freed
+        services.prediction.dispatch_predictions()
+    return BacktestTaskStatus.from_model(model)
+
+
+def set_result(backtest_task, metrics, result_location):
+    model = backtest_task._model
+    model.update(metrics=metrics, result_location=result_location)
+    return BacktestTask.from_model(model)
+
+
+def get_result_location(task_code):
+    return os.path.join(BACKTEST_FOLDER, f"{task_code}.backtest")
+
+
+def get_scores(backtest_task):
+    """
+    :return pd.DataFrame: every prediction of the backtest with the actual value it was scored against
+    """
+    if not backtest_task.result_location:
+        return None
+    return pyarrow.feather.read_table(backtest_task.result_location, memory_map=True).to_pandas()
+
+
+def delete_results(datasource_model):
+    for backtest_task in datasource_model.backtest_task_list:
+        if backtest_task.result_location and os.path.exists(backtest_task.result_location):
+            os.remove(backtest_task.result_location)
+
+
+def queue_backtest(backtest_task):
+    """
+    Queues the backtest: it's sent to the workers by dispatch_predictions, taking a single slot,
+    once there's a slot no prediction task is waiting for
+    """
+    services.prediction.dispatch_predictions()
+
+
+def start_backtest(backtest_task):
+    """
+    Splits the cutoffs of the backtest between BACKTEST_CHUNKS tasks running one after the other,
+    each one loading the datasource once for all of its cutoffs. The scores are gathered by a last task.
+    A chunk is only sent to the workers once the previous one is done: the predictions dispatched
+    in the meantime don't wait for the whole backtest.
+    """
+    from celery import chain
+    from app.tasks.backtest import backtest_task as run_backtest_task, store_backtest_task
+
+    backtest_request, _ = BacktestRequestSchema().load(backtest_task.backtest_request)
+    cutoffs = get_cutoffs(backtest_request['start_time'], backtest_request['end_time'], backtest_request['step_days'])
+
+    chunks = [[cutoff.isoformat() for cutoff in chunk] for chunk in split_cutoffs(cutoffs, BACKTEST_CHUNKS)]
+    # the first task starts the list of the staged scores, every next one adds its own
+    stages = [run_backtest_task.s([], backtest_task.task_code, chunks[0])]
+    stages.extend(run_backtest_task.s(backtest_task.task_code, chunk) for chunk in chunks[1:])
+    stages.append(store_backtest_task.s(backtest_task.task_code))
+    return chain(*stages).apply_async()
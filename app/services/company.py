@@ -1,5 +1,7 @@
 from app.core.models import Company, CompanyConfiguration
 from app.entities import CompanyEntity, CompanyConfigurationEntity
+from app.entities.datasource import UploadTypes
+from config import MAX_CONCURRENT_TASKS_PER_COMPANY
 
 
 def get_for_email(email):
@@ -39,3 +41,14 @@ def get_datasource_interpreter(company_configuration):
     from app.interpreters import datasource
     interpeter = getattr(datasource, company_configuration.configuration['datasource_interpreter'])
     return interpeter()
+
+
+def get_upload_type(company_configuration):
+    upload_type = company_configuration.configuration.get('upload_type') or UploadTypes.FILESYSTEM.name
+    return UploadTypes[upload_type]
+
+
+def get_max_concurrent_tasks(company_configuration):
+    if not company_configuration:
+        return MAX_CONCURRENT_TASKS_PER_COMPANY
+    return company_configuration.configuration.get('max_concurrent_tasks') or MAX_CONCURRENT_TASKS_PER_COMPANY
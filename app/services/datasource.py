@@ -1,5 +1,23 @@
+import datetime
+import logging
+import os
+
+from sqlalchemy import text
+
+from app import services
+from app.core.cache import DataDictCache
+from app.core.merge import RowIndex, merge_upload, content_hash
 from app.core.models import DataSource
-from app.entities import DataSourceEntity
+from app.core.preview import build_preview, update_preview
+from app.core.statistics import build_column_statistics, infer_frequency, finest_frequency
+from app.core.storage import HDF5SegmentStorage, ParquetSegmentStorage, read_segments
+from app.database import db_session
+from app.entities import DataSourceEntity, DataSourceColumnStatisticsEntity
+from app.entities.datasource import UploadTypes
+from config import UPLOAD_FOLDER, ROW_INDEX_FOLDER, DATA_DICT_CACHE_FOLDER, DATA_DICT_CACHE_SIZE
+
+# the namespace of the database locks held while creating a version, one lock for every company
+VERSION_LOCK_NAMESPACE = 1702
 
 
 def get_by_upload_code(upload_code):
@@ -9,21 +27,222 @@ def get_by_upload_code(upload_code):
     return DataSource.from_model(model)
 
 
+def get_by_id(datasource_id):
+    model = DataSourceEntity.get_by_id(datasource_id)
+    if not model:
+        return None
+    return DataSource.from_model(model)
+
+
+def get_current(company_id):
+    model = DataSourceEntity.get_latest_by_company_id(company_id)
+    if not model:
+        return None
+    return DataSource.from_model(model)
+
+
 def generate_filename(upload_code, filename):
     return DataSourceEntity.generate_filename(upload_code, filename)
 
 
-def insert(upload):
+def insert(upload, column_statistics=()):
     model = upload.to_model()
+    model.column_statistics = [DataSourceColumnStatisticsEntity(**statistics) for statistics in column_statistics]
     model.save()
     return DataSource.from_model(model)
 
 
 def delete(datasource):
     model = datasource._model
+    services.backtest.delete_results(model)
     model.delete()
+    get_data_dict_cache().discard(datasource.upload_code)
+    services.oracle.get_model_registry().discard(datasource.upload_code)
 
 
-def get_dataframe(datasource):
+def get_dataframe(datasource, columns=None, start_date=None, end_date=None):
     model = DataSourceEntity.get_by_upload_code(datasource.upload_code)
-    return model.get_file()
+    return model.get_file(columns, start_date, end_date)
+
+
+def get_data_dict_cache():
+    return DataDictCache(DATA_DICT_CACHE_FOLDER, DATA_DICT_CACHE_SIZE)
+
+
+def get_data_dict(datasource, interpreter):
+    """
+    Returns the data_dict of a datasource version as built by the interpreter,
+    from the cache if it was already built for the same version
+    """
+    cache = get_data_dict_cache()
+    key = cache.make_key(datasource.upload_code, interpreter)
+
+    data_dict = cache.get(key)
+    if data_dict is None:
+        logging.debug(f"No cached data_dict for {key}")
+        data_dict = interpreter.from_dataframe_to_data_dict(get_dataframe(datasource))
+        cache.set(key, data_dict)
+        # prefer the mapped panels, so that the copy built here can be released
+        data_dict = cache.get(key) or data_dict
+    return data_dict
+
+
+def get_segment_storage(upload_type):
+    storages = {
+        UploadTypes.FILESYSTEM: HDF5SegmentStorage,
+        UploadTypes.PARQUET: ParquetSegmentStorage,
+    }
+    return storages[upload_type]()
+
+
+def get_row_index(company_id, current_datasource):
+    """
+    Returns the row index of the company, rebuilding it from the current datasource version
+    if it doesn't describe it (e.g. the latest version was deleted, or it was created before the index existed)
+    """
+    row_index = RowIndex(os.path.join(ROW_INDEX_FOLDER, f"{company_id}.hdf5"))
+
+    if not current_datasource:
+        row_index.reset()
+    elif row_index.upload_code != current_datasource.upload_code:
+        row_index.rebuild(
+            get_dataframe(current_datasource), current_datasource.entity_column, current_datasource.upload_code
+        )
+    return row_index
+
+
+def create_version(dataframe, user_id, company, company_configuration, upload_code, filename):
+    """
+    Creates a new datasource version on top of the company's current one.
+    The upload is merged against the company's row index: only the new and changed rows
+    are written to disk, and the new version shares the segments of the previous one.
+    The versions of a company are created one at a time, each on top of the one created before it.
+
+    :param pd.DataFrame dataframe: the validated upload
+    :param int user_id: the uploader
+    :param Company company: the company owning the datasource
+    :param CompanyConfiguration company_configuration: the configuration the upload was validated with
+    :param str upload_code: the code of the new version
+    :param str filename: the name of the file to store the upload in
+    :return DataSource: the new version
+    """
+    upload_type = services.company.get_upload_type(company_configuration)
+    interpreter = services.company.get_datasource_interpreter(company_configuration)
+    storage = get_segment_storage(upload_type)
+
+    entity_column = interpreter.ENTITY_COLUMN
+    # held until the version is inserted: another upload of the company waits for it, instead of
+    # merging on top of the same current version and writing the row index at the same time
+    db_session.execute(
+        text('SELECT pg_advisory_xact_lock(:namespace, :key)'),
+        {'namespace': VERSION_LOCK_NAMESPACE, 'key': company.id}
+    )
+    # the company may have been read before the last version was created
+    current_datasource = get_current(company.id)
+    row_index = get_row_index(company.id, current_datasource)
+
+    dataframe = dataframe.sort_index(ascending=True)
+    merge = merge_upload(dataframe, entity_column, row_index)
+    logging.debug(
+        f"Upload {upload_code}: {merge.new} new rows, {merge.changed} changed rows, {merge.unchanged} unchanged rows"
+    )
+
+    location = storage.location_for(os.path.join(UPLOAD_FOLDER, filename))
+    storage.write(merge.delta, location, entity_column=entity_column)
+    row_index.append(merge.delta, entity_column, upload_code)
+
+    # an upload with nothing new still gets its file, but there's no need to read it back
+    segments = [location] if len(merge.delta) else []
+    start_date = _as_utc(dataframe.index[0].to_pydatetime())
+    end_date = _as_utc(dataframe.index[-1].to_pydatetime())
+
+    if current_datasource:
+        segments = (current_datasource.segments or [current_datasource.location]) + segments
+        start_date = min(start_date, _as_utc(current_datasource.start_date))
+        end_date = max(end_date, _as_utc(current_datasource.end_date))
+
+    preview = get_version_preview(current_datasource, merge.delta, segments, entity_column)
+    entities = get_version_entities(current_datasource, dataframe, entity_column)
+    frequency = finest_frequency(getattr(current_datasource, 'frequency', None), infer_frequency(dataframe.index))
+    # versions created before the hashes are told apart by their upload code, as in the prediction fingerprints
+    previous_hash = (current_datasource.content_hash or current_datasource.upload_code) if current_datasource else None
+    version_hash = content_hash(merge.delta, previous_hash)
+
+    upload = DataSource(
+        user_id=user_id,
+        company_id=company.id,
+        upload_code=upload_code,
+        type=upload_type,
+        location=location,
+        filename=filename,
+        start_date=start_date,
+        end_date=end_date,
+        is_original=current_datasource is None,
+        features=', '.join(dataframe.columns),
+        target_feature=company_configuration.configuration.target_feature,
+        segments=segments,
+        entity_column=entity_column,
+        preview=preview,
+        row_count=preview['row_count'],
+        entities=entities,
+        frequency=frequency,
+        content_hash=version_hash,
+    )
+    column_statistics = build_column_statistics(preview, dataframe.dtypes, entity_column, entities)
+
+    return insert(upload, column_statistics)
+
+
+def get_version_preview(previous_datasource, delta, segments, entity_column):
+    """
+    Computes the preview of a new version from the one of the previous version,
+    reading only the date span touched by the upload.
+
+    :param DataSource previous_datasource: the version the upload was merged into, if any
+    :param pd.DataFrame delta: the new and changed rows of the upload
+    :param list segments: the segments of the new version
+    :param str entity_column: the column identifying the entity of a row, if any
+    :return dict: the preview of the new version
+    """
+    if not previous_datasource or not previous_datasource.preview:
+        return build_preview(read_segments(segments, entity_column=entity_column))
+    if not len(delta):
+        return previous_datasource.preview
+
+    start_date, end_date = delta.index.min(), delta.index.max()
+    return update_preview(
+        previous_datasource.preview,
+        removed_rows=get_dataframe(previous_datasource, start_date=start_date, end_date=end_date),
+        added_rows=read_segments(segments, start_date=start_date, end_date=end_date, entity_column=entity_column),
+        entity_column=entity_column,
+        read_column=lambda column: read_segments(segments, columns=[column], entity_column=entity_column)[column]
+    )
+
+
+def get_version_entities(previous_datasource, dataframe, entity_column):
+    """
+    Rows are never removed by an upload, so the entities of a version are the ones of
+    the previous version and the ones in the upload
+    """
+    if not entity_column:
+        return None
+
+    entities = set(dataframe[entity_column].astype(str).unique())
+    if previous_datasource:
+        previous_entities = previous_datasource.entities
+        if previous_entities is None:
+            previous_entities = get_dataframe(previous_datasource, columns=[entity_column])[entity_column].unique()
+        entities.update(str(entity) for entity in previous_entities)
+    return sorted(entities)
+
+
+def get_column_statistics(datasource):
+    return DataSourceColumnStatisticsEntity.query.filter(
+        DataSourceColumnStatisticsEntity.data_source_id == datasource.id
+    ).order_by(DataSourceColumnStatisticsEntity.id).all()
+
+
+def _as_utc(date):
+    if date.tzinfo is None:
+        return date.replace(tzinfo=datetime.timezone.utc)
+    return date.astimezone(datetime.timezone.utc)
@@ -0,0 +1,95 @@
+import os
+
+import pyarrow
+import pyarrow.feather
+
+from app import services
+from app.core.models import IngestionTask, IngestionTaskStatus
+from app.entities import IngestionTaskEntity, TaskStatusTypes
+from config import STAGING_FOLDER
+
+
+def get_task_by_code(upload_code):
+    model = IngestionTaskEntity.get_by_upload_code(upload_code)
+    return IngestionTask.from_model(model)
+
+
+def insert_task(ingestion_task):
+    model = ingestion_task.to_model()
+    model.save()
+    return IngestionTask.from_model(model)
+
+
+def insert_status(status):
+    model = status.to_model()
+    model.save()
+    return IngestionTaskStatus.from_model(model)
+
+
+def set_task_status(task, status, message=None):
+    task_status = services.ingestion.insert_status(
+        IngestionTaskStatus(
+            ingestion_task_id=task.id,
+            state=status.value,
+            message=message
+        )
+    )
+    return task_status
+
+
+STAGED_CSV_EXTENSION = '.csv'
+STAGED_DATAFRAME_EXTENSION = '.arrow'
+
+
+def get_staging_location(upload_code, extension=STAGED_CSV_EXTENSION):
+    return os.path.join(STAGING_FOLDER, f"{upload_code}{extension}")
+
+
+def stage_upload(uploaded_file, upload_code):
+    """
+    Saves the uploaded file where the ingestion task can pick it up
+    """
+    location = get_staging_location(upload_code)
+    uploaded_file.save(location)
+    uploaded_file.close()
+    return location
+
+
+def stage_dataframe(dataframe, upload_code):
+    """
+    Saves an already validated upload as an uncompressed Arrow IPC (feather) file:
+    loading it back is a memory map rather than a parse, and the column types are preserved
+    """
+    location = get_staging_location(upload_code, STAGED_DATAFRAME_EXTENSION)
+    pyarrow.feather.write_feather(pyarrow.Table.from_pandas(dataframe), location, compression='uncompressed')
+    return location
+
+
+def load_staged_upload(location, interpreter):
+    """
+    :return tuple: the staged dataframe and the list of errors found while parsing it
+    """
+    if location.endswith(STAGED_DATAFRAME_EXTENSION):
+        return pyarrow.feather.read_table(location, memory_map=True).to_pandas(), []
+    return interpreter.from_csv_to_dataframe(location)
+
+
+def start_ingestion(upload_code, company_id, user_id, filename, location):
+    """
+    Queues the ingestion of a staged file: the datasource version will be created
+    with the given upload code once the file is parsed and merged.
+    """
+    from app.tasks.ingest import ingestion_task
+
+    task = insert_task(
+        IngestionTask(
+            upload_code=upload_code,
+            company_id=company_id,
+            user_id=user_id,
+            filename=filename,
+            location=location
+        )
+    )
+    set_task_status(task, TaskStatusTypes.queued)
+    ingestion_task.apply_async((upload_code,))
+    return task
@@ -1,9 +1,16 @@
+import gc
 import logging
+import sys
 
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.registry import ModelRegistry
 from app.core.utils import import_class
+from app.entities import CompanyConfigurationEntity
+from config import MODEL_REGISTRY_FOLDER, MODEL_REGISTRY_SIZE
 
 
-def get_oracle_for_configuration(company_configuration):
+def get_oracle_for_configuration(company_configuration, model_save_path=None):
     oracle_class = company_configuration.configuration['oracle_class']
     calendar_name = company_configuration.configuration['calendar_name']
 
@@ -12,13 +19,103 @@ def get_oracle_for_configuration(company_configuration):
     except ImportError:
         raise ImportError("No available oracle found for %s", oracle_class)
 
+    oracle_configuration = dict(company_configuration.configuration['oracle'])
+    if model_save_path:
+        # the oracle saves to and loads from the path of its model configuration
+        oracle_configuration['model'] = dict(oracle_configuration.get('model') or {}, model_save_path=model_save_path)
+
     return oracle(
         calendar_name=calendar_name,
         scheduling_configuration=company_configuration.configuration['scheduling'],
-        oracle_configuration=company_configuration.configuration['oracle']
+        oracle_configuration=oracle_configuration
+    )
+
+
+def get_model_registry():
+    return ModelRegistry(MODEL_REGISTRY_FOLDER, MODEL_REGISTRY_SIZE)
+
+
+def get_model_key(company_configuration, upload_code, prediction_request):
+    return ModelRegistry.make_key(
+        company_configuration.configuration, upload_code, prediction_request['start_time']
     )
 
 
+def load_trained_oracle(company_configuration, model_key):
+    """
+    Builds the oracle of the configuration and loads the model registered with model_key
+
+    :return: the oracle, None if there's no model for this key
+    """
+    registry = get_model_registry()
+    location = registry.get(model_key)
+    if not location:
+        return None
+
+    oracle = get_oracle_for_configuration(company_configuration, model_save_path=location)
+    try:
+        oracle.load()
+    except Exception as e:
+        logging.warning(f"Could not load the model {model_key}, it will be trained again: {e!r}")
+        registry.remove(location)
+        return None
+    logging.debug(f"Loaded the trained model {model_key}")
+    return oracle
+
+
+def train_and_register(company_configuration, model_key, prediction_request, data_dict):
+    """
+    Builds the oracle of the configuration, trains it and saves the model in the registry
+
+    :return: the trained oracle
+    """
+    registry = get_model_registry()
+    location = registry.reserve()
+    oracle = get_oracle_for_configuration(company_configuration, model_save_path=location)
+    train(oracle, prediction_request, data_dict)
+
+    try:
+        oracle.save()
+    except NotImplementedError:
+        logging.debug(f"{oracle} can't save its model, it won't be registered")
+        registry.remove(location)
+    else:
+        registry.register(location, model_key)
+    return oracle
+
+
+def preload_oracles():
+    """
+    Imports the oracle and result interpreter classes of every company configuration,
+    so that the first task of a worker process doesn't pay for the imports
+    """
+    try:
+        company_configurations = CompanyConfigurationEntity.query.all()
+    except SQLAlchemyError as e:
+        logging.warning(f"Could not read the company configurations to preload: {e!r}")
+        return
+
+    for company_configuration in company_configurations:
+        configuration = company_configuration.configuration or {}
+        for class_name in (configuration.get('oracle_class'), configuration.get('prediction_result_interpreter')):
+            if not class_name:
+                continue
+            try:
+                import_class(class_name)
+            except (ImportError, AttributeError) as e:
+                logging.warning(f"Could not preload {class_name}: {e!r}")
+
+
+def reset_oracle_session():
+    """
+    Frees what an oracle left behind once its task is done, so the worker process can be reused
+    """
+    tensorflow = sys.modules.get('tensorflow')
+    if tensorflow is not None:
+        tensorflow.reset_default_graph()
+    gc.collect()
+
+
 def train(oracle, prediction_request, data_dict):
     start_time = prediction_request['start_time']
     logging.debug(f"Start training {oracle}, start time {start_time}")
@@ -1,10 +1,26 @@
 import datetime
+import hashlib
+import json
 import logging
 import uuid
+from collections import Counter
+from functools import lru_cache
+
+from sqlalchemy import text
 
 from app import services
+from app.core.events import TaskEvents
 from app.core.models import PredictionTask, PredictionResult, PredictionTaskStatus
-from app.entities import PredictionTaskEntity, PredictionResultEntity
+from app.core.utils import json_reload
+from app.database import db_session
+from app.entities import PredictionTaskEntity, PredictionResultEntity, TaskStatusTypes, TaskPriority
+from app.entities.backtest import BacktestTaskEntity
+from app.entities.prediction import COMPLETED_STATES
+from app.entities.customer import CompanyEntity
+from config import PREDICTION_DISPATCH_LIMIT, PREDICTION_TASK_TIMEOUT, TASK_EVENTS_URL
+
+# the key of the database lock held while dispatching, so that two processes don't dispatch the same slots
+DISPATCH_LOCK_KEY = 1701
 
 
 def get_task_by_code(task_code):
@@ -17,6 +33,25 @@ def get_task_for_datasource_id(datasource_id):
     return PredictionTask.from_models(*models)
 
 
+def get_tasks_by_batch_code(batch_code):
+    models = PredictionTaskEntity.get_by_batch_code(batch_code)
+    return PredictionTask.from_models(*models)
+
+
+def get_statuses_by_task_codes(company_id, task_codes):
+    """
+    :return dict: the status, completion and whether there's a result, for each task of the company among task_codes
+    """
+    return {
+        task_code: {
+            'status': status,
+            'is_completed': status in COMPLETED_STATES,
+            'has_result': has_result,
+        }
+        for task_code, status, has_result in PredictionTaskEntity.get_statuses_by_task_codes(company_id, task_codes)
+    }
+
+
 def get_result_by_code(task_code):
     model = PredictionResultEntity.get_for_task(task_code)
     return PredictionResult.from_model(model)
@@ -64,27 +99,290 @@ def set_task_status(task, status, message=None):
             message=message
         )
     )
+    publish_status(task.task_code, task_status)
+    if status in (TaskStatusTypes.successful, TaskStatusTypes.failed):
+        complete_followers(task, status, message)
+        # a slot was freed
+        dispatch_predictions()
     return task_status
 
 
-def create_prediction_task(task_name, task_code, company_id, user_id, datasource_id):
+def complete_followers(task, status, message=None):
+    """
+    Gives the outcome of a task to the identical tasks which were waiting for it
+    """
+    followers = PredictionTaskEntity.get_by_leader_task_code(task.task_code)
+    if not followers:
+        return
+
+    result = PredictionResultEntity.get_for_task(task.task_code) if status == TaskStatusTypes.successful else None
+    if status == TaskStatusTypes.successful and not result:
+        status, message = TaskStatusTypes.failed, 'The identical prediction task stored no result'
+
+    for follower in followers:
+        if result:
+            insert_result(PredictionResult(
+                company_id=follower.company_id,
+                task_code=follower.task_code,
+                result=result.result,
+                prediction_task_id=follower.id
+            ))
+        task_status = insert_status(
+            PredictionTaskStatus(prediction_task_id=follower.id, state=status.value, message=message)
+        )
+        publish_status(follower.task_code, task_status)
+
+
+@lru_cache(maxsize=None)
+def get_task_events():
+    return TaskEvents(TASK_EVENTS_URL)
+
+
+def get_status_event(task_status):
+    """
+    :return dict: what the clients following the task are told about a new status
+    """
+    return {
+        'id': task_status.id,
+        'state': task_status.state,
+        'message': task_status.message,
+        'created_at': task_status.created_at.isoformat() if task_status.created_at else None,
+        'is_completed': task_status.state in COMPLETED_STATES,
+    }
+
+
+def publish_status(task_code, task_status):
+    get_task_events().publish(task_code, get_status_event(task_status))
+
+
+def create_prediction_task(task_name, task_code, company_id, user_id, datasource_id,
+                           priority=TaskPriority.interactive, batch_code=None):
     task = services.prediction.insert_task(
         PredictionTask(name=task_name,
                        task_code=task_code,
                        company_id=company_id,
                        user_id=user_id,
-                       datasource_id=datasource_id)
+                       datasource_id=datasource_id,
+                       priority=priority.value,
+                       batch_code=batch_code)
     )
     return task
 
 
-def generate_task_code():
-    return str(uuid.uuid4())
+def get_fingerprint(company_configuration, datasource, prediction_request, training_task_code=None):
+    """
+    Two predictions are identical when they're made with the same configuration, on the same datasource content,
+    for the same window and with the same trained model: the name of the task is only a label
+    """
+    identity = json.dumps({
+        'configuration': company_configuration.configuration,
+        # versions created before the content hash existed are only identical to themselves
+        'datasource': datasource.content_hash or datasource.upload_code,
+        'start_time': prediction_request['start_time'],
+        'end_time': prediction_request['end_time'],
+        'training_task_code': training_task_code,
+    }, sort_keys=True, default=str)
+    return hashlib.sha1(identity.encode()).hexdigest()
 
 
-def add_prediction_request(prediction_task, prediction_request):
-    prediction_task = get_task_by_code(prediction_task.task_code)
-    model = prediction_task._model
-    model.prediction_request = prediction_request
-    model.save()
-    return PredictionTask.from_model(model)
+def queue_prediction(task_code, prediction_request, training_task_code=None):
+    """
+    Stores the request of a prediction task, which can then be dispatched
+    """
+    model = PredictionTaskEntity.get_by_task_code(task_code)
+    fingerprint = get_fingerprint(
+        model.company.current_configuration, model.datasource, prediction_request, training_task_code
+    )
+    model.update(
+        prediction_request=json_reload(prediction_request),
+        training_task_code=training_task_code,
+        fingerprint=fingerprint
+    )
+
+
+def start_prediction(task_code, prediction_request, training_task_code=None, force=False):
+    """
+    Queues the prediction task: it's sent to the workers by dispatch_predictions as soon as there's a slot for it.
+    Unless forced, the task is completed straight away with the result of an identical successful task,
+    or waits for the result of an identical task already queued or running.
+    """
+    queue_prediction(task_code, prediction_request, training_task_code)
+    if not force and (reuse_completed_result(task_code) or follow_in_flight_task(task_code)):
+        return
+    dispatch_predictions()
+
+
+def reuse_completed_result(task_code):
+    """
+    Completes a queued task with a copy of the result of the latest successful identical task, if there's one
+
+    :return str: the code of the task the result comes from, None if the task has to run
+    """
+    model = PredictionTaskEntity.get_by_task_code(task_code)
+    previous_task = PredictionTaskEntity.get_latest_successful_by_fingerprint(
+        model.company_id, model.fingerprint, task_code
+    )
+    if not previous_task:
+        return None
+
+    logging.debug(f"Prediction task {task_code} reuses the result of the identical task {previous_task.task_code}")
+    insert_result(PredictionResult(
+        company_id=model.company_id,
+        task_code=task_code,
+        result=previous_task.prediction_result.result,
+        prediction_task_id=model.id
+    ))
+    set_task_status(
+        model, TaskStatusTypes.successful, message=f'Result of the identical prediction task {previous_task.task_code}'
+    )
+    return previous_task.task_code
+
+
+def follow_in_flight_task(task_code):
+    """
+    Attaches a queued task to the identical task in flight, if there's one
+
+    :return str: the code of the task it now waits for, None if it has to run
+    """
+    # the dispatch lock, so that the task isn't dispatched meanwhile and two identical tasks don't follow each other
+    db_session.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': DISPATCH_LOCK_KEY})
+    dispatched_since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+        seconds=PREDICTION_TASK_TIMEOUT
+    )
+
+    model = PredictionTaskEntity.get_by_task_code(task_code)
+    leader = None
+    if model.dispatched_at is None:
+        leader = PredictionTaskEntity.get_in_flight_by_fingerprint(
+            model.company_id, model.fingerprint, dispatched_since, task_code
+        )
+    if leader:
+        logging.debug(f"Prediction task {task_code} waits for the identical task {leader.task_code}")
+        model.leader_task_code = leader.task_code
+    # releases the lock
+    db_session.commit()
+    return leader.task_code if leader else None
+
+
+def start_batch_prediction(task_codes, prediction_requests, training_task_code=None, force=False):
+    """
+    Queues the prediction tasks of a batch, they're dispatched together as soon as there's a slot for them.
+    Unless forced, the tasks identical to a successful one are completed with its result and aren't run.
+    """
+    for task_code, prediction_request in zip(task_codes, prediction_requests):
+        queue_prediction(task_code, prediction_request, training_task_code)
+        if not force:
+            reuse_completed_result(task_code)
+    dispatch_predictions()
+
+
+def dispatch_predictions():
+    """
+    Sends the queued prediction tasks to the workers, while there are free slots.
+    At most PREDICTION_DISPATCH_LIMIT tasks run at once, and each company has its own maximum of concurrent tasks;
+    the tasks of a batch run together and take a single slot, and so does a backtest.
+    The next task is the one with the highest priority, from the company with the fewest running tasks,
+    and then the oldest: a company submitting a burst of tasks doesn't hold the workers for everyone else.
+    """
+    db_session.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': DISPATCH_LOCK_KEY})
+    now = datetime.datetime.now(datetime.timezone.utc)
+    dispatched_since = now - datetime.timedelta(seconds=PREDICTION_TASK_TIMEOUT)
+
+    running_tasks = PredictionTaskEntity.get_running(dispatched_since)
+    running_units = set((task.company_id, task.batch_code or task.task_code) for task in running_tasks)
+    running_units.update((task.company_id, task.task_code) for task in BacktestTaskEntity.get_running(dispatched_since))
+    running_by_company = Counter(company_id for company_id, _ in running_units)
+    free_slots = PREDICTION_DISPATCH_LIMIT - len(running_units)
+
+    pending_units = {}
+    for task in PredictionTaskEntity.get_pending() if free_slots > 0 else []:
+        pending_units.setdefault(task.batch_code or task.task_code, []).append(task)
+    pending_units = [tasks for tasks in pending_units.values() if all(task.prediction_request for task in tasks)]
+    if free_slots > 0:
+        pending_units.extend([backtest_task] for backtest_task in BacktestTaskEntity.get_pending())
+    max_concurrent_tasks = {
+        company_id: services.company.get_max_concurrent_tasks(CompanyEntity.get_by_id(company_id).current_configuration)
+        for company_id in set(tasks[0].company_id for tasks in pending_units)
+    }
+
+    dispatched_units = []
+    while free_slots > 0:
+        candidates = [
+            tasks for tasks in pending_units
+            if running_by_company[tasks[0].company_id] < max_concurrent_tasks[tasks[0].company_id]
+        ]
+        if not candidates:
+            break
+        tasks = min(candidates, key=lambda tasks: (
+            -max(task.priority for task in tasks),
+            running_by_company[tasks[0].company_id],
+            min(task.created_at for task in tasks)
+        ))
+        for task in tasks:
+            task.dispatched_at = now
+        pending_units.remove(tasks)
+        running_by_company[tasks[0].company_id] += 1
+        free_slots -= 1
+        dispatched_units.append(tasks)
+    # releases the lock
+    db_session.commit()
+
+    for tasks in dispatched_units:
+        task_codes = [task.task_code for task in tasks]
+        try:
+            if isinstance(tasks[0], BacktestTaskEntity):
+                logging.debug(f"Dispatching backtest {task_codes[0]} of company {tasks[0].company_id}")
+                services.backtest.start_backtest(tasks[0])
+            else:
+                logging.debug(f"Dispatching prediction tasks {task_codes} of company {tasks[0].company_id}")
+                _run_prediction(
+                    [(task.task_code, task.prediction_request) for task in tasks],
+                    tasks[0].company_id, tasks[0].datasource_upload_code, tasks[0].training_task_code
+                )
+        except Exception as e:
+            # the tasks never reached the workers: they're queued again, for the next dispatch
+            logging.warning(f"Could not dispatch tasks {task_codes}, they stay queued: {e!r}")
+            db_session.rollback()
+            for task in tasks:
+                task.dispatched_at = None
+            db_session.commit()
+
+
+def fail_timed_out_tasks():
+    """
+    Fails the prediction tasks and backtests running for longer than PREDICTION_TASK_TIMEOUT: their worker was lost
+    before it could report it. The tasks waiting for them are completed, and their slots are dispatched again.
+    """
+    dispatched_before = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+        seconds=PREDICTION_TASK_TIMEOUT
+    )
+    message = 'The task timed out'
+    for task in PredictionTaskEntity.get_timed_out(dispatched_before):
+        logging.warning(f"Prediction task {task.task_code} timed out")
+        set_task_status(task, TaskStatusTypes.failed, message=message)
+    for backtest_task in BacktestTaskEntity.get_timed_out(dispatched_before):
+        logging.warning(f"Backtest {backtest_task.task_code} timed out")
+        services.backtest.set_task_status(backtest_task, TaskStatusTypes.failed, message=message)
+    # a dispatch may have been missed meanwhile, e.g. when a slot was freed by a lost task
+    dispatch_predictions()
+
+
+def _run_prediction(prediction_requests, company_id, upload_code, training_task_code=None):
+    """
+    Runs the prediction pipeline: the training stage is skipped when predicting with the model
+    of an earlier training task
+    """
+    from celery import chain
+    from app.tasks.predict import (
+        prepare_prediction_task, train_prediction_task, predict_prediction_task, store_prediction_task
+    )
+
+    stages = [prepare_prediction_task.s(prediction_requests, company_id, upload_code, training_task_code)]
+    if not training_task_code:
+        stages.append(train_prediction_task.s())
+    stages.extend([predict_prediction_task.s(), store_prediction_task.s()])
+    return chain(*stages).apply_async()
+
+
+def generate_task_code():
+    return str(uuid.uuid4())
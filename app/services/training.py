@@ -3,11 +3,13 @@ from app.entities import TaskStatusTypes
 from app.entities.training import TrainingTaskEntity, TrainingTaskStatusEntity
 
 
-def create_new_task(task_code, company_id, datasource_id):
+def create_new_task(task_code, company_id, user_id, datasource_id, training_request=None):
     training_task = TrainingTask(
         task_code=task_code,
         company_id=company_id,
-        datasource_id=datasource_id
+        user_id=user_id,
+        datasource_id=datasource_id,
+        training_request=training_request
     )
     training_task = insert(training_task)
     create_task_status(training_task.id, TaskStatusTypes.queued)
@@ -25,6 +27,17 @@ def get_for_task_code(task_code):
     return TrainingTask.from_model(model)
 
 
+def get_latest_successful_for_datasource(datasource_id):
+    model = TrainingTaskEntity.get_latest_successful_by_datasource_id(datasource_id)
+    return TrainingTask.from_model(model)
+
+
+def set_model_key(training_task, model_key):
+    model = training_task._model
+    model.update(model_key=model_key)
+    return TrainingTask.from_model(model)
+
+
 def create_task_status(task_id, state, message=None):
     training_task_status = TrainingTaskStatusEntity(
         training_task_id=task_id,
@@ -67,6 +67,39 @@ var DatasourceRefresh = {
 
 var PredictionStatusRefresh = {
 
+    listen: function () {
+
+        if (!window.EventSource) {
+            setInterval(PredictionStatusRefresh.refreshStatuses, 1000);
+            return
+        }
+
+        var $prediction_table = $('table.prediction-log');
+        var $task_code = $prediction_table.attr("id");
+        var $created_at = moment($prediction_table.data("created-at"));
+        var $first_status = true;
+
+        var source = new EventSource('/prediction/' + $task_code + '/events');
+        source.addEventListener('status', function (event) {
+            var status = JSON.parse(event.data);
+            if ($first_status) {
+                // the stream starts with every status of the task
+                $prediction_table.find('tbody tr').remove();
+                $first_status = false;
+            }
+            $prediction_table.find('tbody').append(PredictionStatusRefresh.buildRow(status));
+            if (status.is_completed) {
+                source.close();
+                $('#status-spinner').hide();
+                location.reload();
+            }
+        });
+
+        setInterval(function () {
+            $duration = moment.duration(moment() - $created_at);
+            $("#elapsed-prediction-time").html($duration.format('hh:mm:ss'));
+        }, 1000);
+    },
     refreshStatuses: function () {
 
         var $prediction_table = $('table.prediction-log');
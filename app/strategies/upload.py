@@ -4,7 +4,7 @@ import logging
 
 from app import services
 from app.core.models import DataSource, CompanyConfiguration
-from app.entities import TaskStatusTypes
+from app.entities import TaskStatusTypes, TaskPriority
 from config import MAXIMUM_DAYS_FORECAST
 
 
@@ -38,11 +38,8 @@ class TrainAndPredictOnUploadStrategy(AbstractUploadStrategy):
     """
 
     def run(self, datasource: DataSource, company_configuration: CompanyConfiguration):
-        from app.tasks.predict import training_and_prediction_task
-
         now = datetime.datetime.now().isoformat()
         datasource_id = datasource.id
-        datasource_upload_code = datasource.upload_code
         user_id = datasource.user_id
         company_id = company_configuration.company_id
 
@@ -60,12 +57,11 @@ class TrainAndPredictOnUploadStrategy(AbstractUploadStrategy):
             company_id=company_id,
             user_id=user_id,
             datasource_id=datasource_id,
+            priority=TaskPriority.automatic
         )
         services.prediction.set_task_status(prediction_task, TaskStatusTypes.queued)
 
-        training_and_prediction_task.apply_async(
-            (task_code, company_id, datasource_upload_code, prediction_request)
-        )
+        services.prediction.start_prediction(task_code, prediction_request)
 
         logging.debug(
             f"Automatically triggered train task for company id {company_id}, with code {task_code}"
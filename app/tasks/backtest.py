@@ -0,0 +1,151 @@
+"""
+A backtest trains and evaluates the oracle at every cutoff of a date range. The cutoffs are split between
+several tasks on the machine learning queue, run one after the other, and each of them loads the datasource once
+for all of its cutoffs. Every task stages the scores of its cutoffs, and the last task gathers them into the result.
+"""
+import datetime
+import glob
+import logging
+import os
+
+import pandas as pd
+import pyarrow
+import pyarrow.feather
+
+from app import interpreters
+from app import services
+from app.core.backtest import score_prediction, compact_scores, compute_metrics, compute_metrics_by_cutoff
+from app.core.statistics import frequency_to_timedelta
+from app.entities import TaskStatusTypes
+from app.services.backtest import set_task_status
+from app.tasks.base import BaseDBTask, BaseOracleTask
+from config import CELERY_IO_QUEUE, CELERY_ML_QUEUE, STAGING_FOLDER
+
+logging.basicConfig(level=logging.DEBUG)
+
+STAGED_SCORES_EXTENSION = '.backtest'
+
+
+class BacktestTask(BaseOracleTask):
+    """
+    Trains the oracle at each of the given cutoffs, unless the registry already has the model,
+    and scores its predictions against the actual values of the target feature
+    """
+    name = 'backtest_task'
+    queue = CELERY_ML_QUEUE
+
+    def run(self, locations, task_code, cutoffs):
+        """
+        :param list locations: the scores staged by the previous tasks of the backtest
+        :param list cutoffs: the share of the backtest's cutoffs of this task, as iso formatted dates
+        :return list: the locations of the staged scores, with the ones of this task
+        """
+        backtest_task = services.backtest.get_task_by_code(task_code)
+        if not backtest_task or backtest_task.is_completed:
+            logging.warning("Backtest %s was stopped, skipping cutoffs %s", task_code, cutoffs)
+            return locations
+
+        datasource = services.datasource.get_by_id(backtest_task.datasource_id)
+        company_configuration = services.company.get_by_id(backtest_task.company_id).current_configuration
+        interpreter = services.company.get_datasource_interpreter(company_configuration)
+        prediction_result_interpreter = interpreters.prediction.get_prediction_interpreter(company_configuration)
+
+        data_dict = services.datasource.get_data_dict(datasource, interpreter)
+        actuals = data_dict[company_configuration.configuration.target_feature]
+        tolerance = frequency_to_timedelta(datasource.frequency) if datasource.frequency else None
+
+        set_task_status(
+            backtest_task, TaskStatusTypes.in_progress,
+            message=f'Backtesting {len(cutoffs)} cutoffs from {cutoffs[0]}'
+        )
+
+        scores = []
+        for cutoff in cutoffs:
+            prediction_request = {'start_time': datetime.datetime.strptime(cutoff, '%Y-%m-%d').date()}
+            model_key = services.oracle.get_model_key(company_configuration, datasource.upload_code, prediction_request)
+
+            oracle = services.oracle.load_trained_oracle(company_configuration, model_key)
+            if oracle is None:
+                oracle = services.oracle.train_and_register(
+                    company_configuration=company_configuration,
+                    model_key=model_key,
+                    prediction_request=prediction_request,
+                    data_dict=data_dict
+                )
+            oracle_prediction_result = services.oracle.predict(
+                oracle=oracle,
+                prediction_request=prediction_request,
+                data_dict=data_dict
+            )
+
+            interpreted_prediction_result = prediction_result_interpreter(oracle_prediction_result)
+            if isinstance(interpreted_prediction_result, dict):
+                interpreted_prediction_result = interpreted_prediction_result['datapoints']
+            scores.append(
+                score_prediction(prediction_request['start_time'], interpreted_prediction_result, actuals, tolerance)
+            )
+
+            # the next cutoff builds its own oracle
+            del oracle
+            services.oracle.reset_oracle_session()
+
+        location = os.path.join(STAGING_FOLDER, f"{task_code}-{self.request.id}{STAGED_SCORES_EXTENSION}")
+        write_scores(pd.concat(scores, ignore_index=True), location)
+        return locations + [location]
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        task_code = args[1]
+        backtest_task = services.backtest.get_task_by_code(task_code)
+        if backtest_task and not backtest_task.is_completed:
+            set_task_status(backtest_task, TaskStatusTypes.failed)
+        # the previous tasks of the backtest staged their scores already
+        for location in glob.glob(os.path.join(STAGING_FOLDER, f"{task_code}-*{STAGED_SCORES_EXTENSION}")):
+            os.remove(location)
+        logging.debug(f'Backtest {task_code} raised exception: {einfo.exception!r}\n{einfo.traceback!r}')
+
+
+class StoreBacktestTask(BaseDBTask):
+    """
+    Gathers the scores staged by every task of the backtest into a single file, and stores their metrics
+    """
+    name = 'backtest_store_task'
+    queue = CELERY_IO_QUEUE
+
+    def run(self, locations, task_code):
+        backtest_task = services.backtest.get_task_by_code(task_code)
+        locations = [location for location in locations if location]
+        if not backtest_task or backtest_task.is_completed or not locations:
+            for location in locations:
+                os.remove(location)
+            return
+
+        scores = pd.concat(
+            [pyarrow.feather.read_table(location).to_pandas() for location in locations], ignore_index=True
+        )
+        scores = compact_scores(scores.sort_values(['cutoff', 'timestamp', 'symbol']).reset_index(drop=True))
+
+        result_location = services.backtest.get_result_location(task_code)
+        write_scores(scores, result_location)
+        for location in locations:
+            os.remove(location)
+
+        metrics = compute_metrics(scores)
+        metrics['cutoffs'] = compute_metrics_by_cutoff(scores)
+        services.backtest.set_result(backtest_task, metrics, result_location)
+
+        logging.info("*** BACKTEST FINISHED! %s", task_code)
+        set_task_status(backtest_task, TaskStatusTypes.successful)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        task_code = args[1]
+        backtest_task = services.backtest.get_task_by_code(task_code)
+        set_task_status(backtest_task, TaskStatusTypes.failed)
+        logging.debug(f'Backtest {task_code} raised exception: {einfo.exception!r}\n{einfo.traceback!r}')
+
+
+def write_scores(scores, location):
+    pyarrow.feather.write_feather(pyarrow.Table.from_pandas(scores, preserve_index=False), location, compression='zstd')
+
+
+backtest_task = BacktestTask()
+store_backtest_task = StoreBacktestTask()
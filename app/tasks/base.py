@@ -3,6 +3,7 @@ from celery.signals import worker_process_shutdown, worker_process_init
 from sqlalchemy import create_engine
 from sqlalchemy.pool import NullPool
 
+from app import services
 from app.database import db_session
 from config import SQLALCHEMY_DATABASE_URI
 
@@ -15,6 +16,17 @@ class BaseDBTask(Task):
             db_session.close()
 
 
+class BaseOracleTask(BaseDBTask):
+    """
+    Worker processes are reused across tasks: the oracle's graph is cleared after every run
+    """
+    def __call__(self, *args, **kwargs):
+        try:
+            return super().__call__(*args, **kwargs)
+        finally:
+            services.oracle.reset_oracle_session()
+
+
 @worker_process_shutdown.connect
 def on_fork_close_session(**kwargs):
     if db_session is not None:
@@ -25,3 +37,5 @@ def on_fork_close_session(**kwargs):
 def on_fork_open_session(**kwargs):
     engine = create_engine(SQLALCHEMY_DATABASE_URI, convert_unicode=True, poolclass=NullPool)
     db_session.bind = engine
+    services.oracle.preload_oracles()
+    db_session.remove()
@@ -0,0 +1,84 @@
+import logging
+import os
+
+from app import services
+from app.entities import TaskStatusTypes
+from app.services.ingestion import set_task_status
+from app.tasks.base import BaseDBTask
+from config import CELERY_IO_QUEUE
+
+logging.basicConfig(level=logging.DEBUG)
+
+
+class IngestTask(BaseDBTask):
+    """
+    Turns a staged upload into a new datasource version: parses and validates the file,
+    merges it with the current version and then runs the company's upload strategy.
+    """
+    name = 'ingestion_task'
+    queue = CELERY_IO_QUEUE
+
+    def run(self, upload_code):
+        ingestion_task = services.ingestion.get_task_by_code(upload_code)
+        if not ingestion_task:
+            logging.warning("No ingestion task could be found for code %s", upload_code)
+            return
+
+        logging.info("*** INGESTION STARTED! %s", upload_code)
+        set_task_status(ingestion_task, TaskStatusTypes.started, message='Ingestion started!')
+
+        company = services.company.get_by_id(ingestion_task.company_id)
+        company_configuration = company.current_configuration
+
+        interpreter = services.company.get_datasource_interpreter(company_configuration)
+        dataframe, errors = services.ingestion.load_staged_upload(ingestion_task.location, interpreter)
+        target_feature = company_configuration.configuration.target_feature
+
+        if not errors and target_feature not in list(dataframe.columns):
+            errors = [f"Required feature {target_feature} not present in the file"]
+        if errors:
+            logging.debug(f"Invalid file uploaded: {', '.join(errors)}")
+            set_task_status(ingestion_task, TaskStatusTypes.failed, message=', '.join(errors))
+            os.remove(ingestion_task.location)
+            return
+
+        set_task_status(
+            ingestion_task, TaskStatusTypes.in_progress,
+            message='Merging with the current historical data'
+        )
+        datasource = services.datasource.create_version(
+            dataframe=dataframe,
+            user_id=ingestion_task.user_id,
+            company=company,
+            company_configuration=company_configuration,
+            upload_code=upload_code,
+            filename=ingestion_task.filename
+        )
+        os.remove(ingestion_task.location)
+
+        # the panels are stored for the prediction tasks, which map them instead of interpreting the version again
+        set_task_status(ingestion_task, TaskStatusTypes.in_progress, message='Storing the interpreted panels')
+        services.datasource.get_data_dict(datasource, interpreter)
+
+        logging.info("*** INGESTION FINISHED! %s", upload_code)
+        set_task_status(ingestion_task, TaskStatusTypes.successful)
+
+        # the version is created: the status of the ingestion doesn't depend on what the strategy starts
+        upload_strategy_class = company_configuration.configuration.upload_strategy
+        try:
+            upload_strategy = services.strategies.get_upload_strategy(upload_strategy_class)
+            upload_strategy.run(datasource=datasource, company_configuration=company_configuration)
+        except Exception as e:
+            logging.exception(f"The upload strategy {upload_strategy_class} failed for upload {upload_code}: {e!r}")
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        upload_code = args[0]
+        ingestion_task = services.ingestion.get_task_by_code(upload_code)
+        set_task_status(ingestion_task, TaskStatusTypes.failed)
+        # the staged upload is only removed once it's merged, or found invalid
+        if os.path.exists(ingestion_task.location):
+            os.remove(ingestion_task.location)
+        logging.debug(f'Ingestion {upload_code} raised exception: {einfo.exception!r}\n{einfo.traceback!r}')
+
+
+ingestion_task = IngestTask()
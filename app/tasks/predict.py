@@ -1,4 +1,16 @@
+"""
+A prediction runs as a chain of stages, each one a task routed to its own queue: the light I/O stages
+(loading the request and the data, storing the result) never take the slot of a heavy machine learning
+worker. Every stage receives the context built by the previous one and returns it, with its own output,
+to the next; the data and the models themselves go through the data_dict cache and the model registry.
+A stage receiving no context does nothing, as the prediction was stopped by an earlier stage.
+
+The pipeline runs a list of prediction tasks on the same datasource, so that a batch of prediction windows
+loads the data once and trains the oracle once per distinct training cutoff. A single prediction is a batch of one.
+"""
 import logging
+import os
+import pickle
 
 from app import interpreters
 from app import services
@@ -7,53 +19,42 @@ from app.core.schemas import PredictionRequestSchema
 from app.core.utils import json_reload
 from app.entities import TaskStatusTypes
 from app.services.prediction import set_task_status
-from app.tasks.base import BaseDBTask
+from app.tasks.base import BaseDBTask, BaseOracleTask
+from config import CELERY_IO_QUEUE, CELERY_ML_QUEUE, STAGING_FOLDER
 
 logging.basicConfig(level=logging.DEBUG)
 
 
-class TrainAndPredictTask(BaseDBTask):
-    name = 'training_and_prediction_task'
-
-    def run(self, task_code, company_id, upload_code, prediction_request):
-        uploaded_file = services.datasource.get_by_upload_code(upload_code)
-        prediction_task = services.prediction.get_task_by_code(task_code)
-        if not uploaded_file:
-            logging.warning("No upload could be found for code %s", upload_code)
-            return
-
-        prediction_request, errors = PredictionRequestSchema().load(prediction_request)
-        logging.info("Prediction request %s received: %s", upload_code, prediction_request)
-        if errors:
-            logging.warning(errors)
-            set_task_status(prediction_task, TaskStatusTypes.failed)
-            raise Exception(errors)
+class PredictionStageMixin:
 
-        prediction_task = services.prediction.add_prediction_request(
-            prediction_task, json_reload(prediction_request))
-
-        logging.info("*** TASK STARTED! %s", prediction_task.task_code)
-        set_task_status(prediction_task, TaskStatusTypes.started, message='Task started!')
-
-        data_frame_content = uploaded_file.get_file()
-        company = services.company.get_by_id(company_id)
-        company_configuration = company.current_configuration
+    @staticmethod
+    def load_context(context):
+        """
+        :return: the company configuration of the context, and every prediction of the context
+                 with its prediction task and loaded prediction request
+        """
+        company = services.company.get_by_id(context['company_id'])
+        predictions = [
+            (
+                prediction,
+                services.prediction.get_task_by_code(prediction['task_code']),
+                PredictionRequestSchema().load(prediction['prediction_request'])[0]
+            )
+            for prediction in context['predictions']
+        ]
+        return company.current_configuration, predictions
 
+    @staticmethod
+    def get_data_dict(context, company_configuration):
+        datasource = services.datasource.get_by_upload_code(context['upload_code'])
         interpreter = services.company.get_datasource_interpreter(company_configuration)
-        data_dict = interpreter.from_dataframe_to_data_dict(data_frame_content)
-
-        set_task_status(
-            prediction_task, TaskStatusTypes.in_progress,
-            message='Training machine learning model'
-        )
-
-        oracle = services.oracle.get_oracle_for_configuration(company_configuration)
-        services.oracle.train(
-            oracle=oracle,
-            prediction_request=prediction_request,
-            data_dict=data_dict
-        )
+        return services.datasource.get_data_dict(datasource, interpreter)
 
+    @staticmethod
+    def stage_prediction(prediction, prediction_task, prediction_request, oracle, data_dict):
+        """
+        Predicts with the oracle, and stages its result for the last stage
+        """
         set_task_status(
             prediction_task, TaskStatusTypes.in_progress,
             message='Prediction in progress'
@@ -64,27 +65,210 @@ class TrainAndPredictTask(BaseDBTask):
             data_dict=data_dict
         )
 
+        prediction['result_location'] = os.path.join(STAGING_FOLDER, f"{prediction['task_code']}.prediction")
+        with open(prediction['result_location'], 'wb') as result_file:
+            pickle.dump(oracle_prediction_result, result_file)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        # the first stage receives the prediction requests, the others the context
+        if isinstance(args[0], dict):
+            task_codes = [prediction['task_code'] for prediction in args[0]['predictions']]
+        else:
+            task_codes = [task_code for task_code, _ in args[0]]
+        for task_code in task_codes:
+            prediction_task = services.prediction.get_task_by_code(task_code)
+            set_task_status(prediction_task, TaskStatusTypes.failed)
+        logging.debug(f'Tasks {task_codes} raised exception: {einfo.exception!r}\n{einfo.traceback!r}')
+
+
+class PreparePredictionTask(PredictionStageMixin, BaseDBTask):
+    """
+    Validates the prediction requests and builds the data_dict of the datasource, unless it's already cached
+    """
+    name = 'prediction_prepare_stage'
+    queue = CELERY_IO_QUEUE
+
+    def run(self, prediction_requests, company_id, upload_code, training_task_code=None):
+        """
+        :param list prediction_requests: the code of every prediction task, with its prediction request
+        """
+        uploaded_file = services.datasource.get_by_upload_code(upload_code)
+        prediction_tasks = [services.prediction.get_task_by_code(task_code) for task_code, _ in prediction_requests]
+        if not uploaded_file:
+            logging.warning("No upload could be found for code %s", upload_code)
+            for prediction_task in prediction_tasks:
+                set_task_status(prediction_task, TaskStatusTypes.failed, message='The datasource no longer exists')
+            return None
+
+        model_key = None
+        if training_task_code:
+            model_key = services.training.get_for_task_code(training_task_code).model_key
+            if not services.oracle.get_model_registry().get(model_key):
+                for prediction_task in prediction_tasks:
+                    set_task_status(
+                        prediction_task, TaskStatusTypes.failed,
+                        message='The trained model is no longer available, please train the oracle again'
+                    )
+                return None
+
+        predictions = []
+        for prediction_task, (_, prediction_request) in zip(prediction_tasks, prediction_requests):
+            prediction_request, errors = PredictionRequestSchema().load(prediction_request)
+            logging.info("Prediction request %s received: %s", upload_code, prediction_request)
+            if errors:
+                logging.warning(errors)
+                set_task_status(prediction_task, TaskStatusTypes.failed, message=str(errors))
+                continue
+
+            logging.info("*** TASK STARTED! %s", prediction_task.task_code)
+            set_task_status(prediction_task, TaskStatusTypes.started, message='Task started!')
+            predictions.append({
+                'task_code': prediction_task.task_code,
+                'prediction_request': json_reload(prediction_request),
+                'model_key': model_key,
+            })
+        if not predictions:
+            return None
+
+        context = {
+            'company_id': company_id,
+            'upload_code': upload_code,
+            'training_task_code': training_task_code,
+            'predictions': predictions,
+        }
+        company_configuration = services.company.get_by_id(company_id).current_configuration
+        self.get_data_dict(context, company_configuration)
+        return context
+
+
+class TrainPredictionTask(PredictionStageMixin, BaseOracleTask):
+    """
+    Trains the oracle once for every distinct training cutoff of the predictions,
+    unless the registry has a model for the same configuration, datasource and cutoff.
+    An oracle which can't save its model predicts right away, instead of being trained again by the next stage.
+    """
+    name = 'prediction_train_stage'
+    queue = CELERY_ML_QUEUE
+
+    def run(self, context):
+        if not context:
+            return None
+
+        company_configuration, predictions = self.load_context(context)
+        data_dict = None
+        unsaved_oracles = {}
+        for prediction, prediction_task, prediction_request in predictions:
+            model_key = services.oracle.get_model_key(company_configuration, context['upload_code'], prediction_request)
+            prediction['model_key'] = model_key
+            if model_key not in unsaved_oracles:
+                if services.oracle.get_model_registry().get(model_key):
+                    continue
+
+                set_task_status(
+                    prediction_task, TaskStatusTypes.in_progress,
+                    message='Training machine learning model'
+                )
+                if data_dict is None:
+                    data_dict = self.get_data_dict(context, company_configuration)
+                oracle = services.oracle.train_and_register(
+                    company_configuration=company_configuration,
+                    model_key=model_key,
+                    prediction_request=prediction_request,
+                    data_dict=data_dict
+                )
+                if services.oracle.get_model_registry().get(model_key):
+                    continue
+                unsaved_oracles[model_key] = oracle
+
+            oracle = unsaved_oracles[model_key]
+            self.stage_prediction(prediction, prediction_task, prediction_request, oracle, data_dict)
+        return context
+
+
+class PredictPredictionTask(PredictionStageMixin, BaseOracleTask):
+    """
+    Predicts with the trained models, and stages the oracle's results for the last stage.
+    The predictions already staged by the training stage are skipped.
+    """
+    name = 'prediction_predict_stage'
+    queue = CELERY_ML_QUEUE
+
+    def run(self, context):
+        if not context:
+            return None
+
+        company_configuration, predictions = self.load_context(context)
+        predictions = [
+            (prediction, prediction_task, prediction_request)
+            for prediction, prediction_task, prediction_request in predictions if 'result_location' not in prediction
+        ]
+        if not predictions:
+            return context
+        data_dict = self.get_data_dict(context, company_configuration)
+
+        oracles = {}
+        for prediction, prediction_task, prediction_request in predictions:
+            model_key = prediction['model_key']
+            if model_key not in oracles:
+                oracles[model_key] = services.oracle.load_trained_oracle(company_configuration, model_key)
+            if oracles[model_key] is None and context.get('training_task_code'):
+                # the model of the training was evicted in the meantime, it can't be trained again with its request
+                set_task_status(
+                    prediction_task, TaskStatusTypes.failed,
+                    message='The trained model is no longer available, please train the oracle again'
+                )
+                continue
+            if oracles[model_key] is None:
+                # the model was evicted in the meantime
+                oracles[model_key] = services.oracle.train_and_register(
+                    company_configuration=company_configuration,
+                    model_key=model_key,
+                    prediction_request=prediction_request,
+                    data_dict=data_dict
+                )
+
+            self.stage_prediction(prediction, prediction_task, prediction_request, oracles[model_key], data_dict)
+        return context
+
+
+class StorePredictionTask(PredictionStageMixin, BaseDBTask):
+    """
+    Interprets the oracle's results and stores them, one result for every prediction task which got one
+    """
+    name = 'prediction_store_stage'
+    queue = CELERY_IO_QUEUE
+
+    def run(self, context):
+        if not context:
+            return None
+
+        company_configuration, predictions = self.load_context(context)
         prediction_result_interpreter = interpreters.prediction.get_prediction_interpreter(company_configuration)
-        interpreted_prediction_result = prediction_result_interpreter(oracle_prediction_result)
 
-        logging.info("*** TASK FINISHED! %s", prediction_task.task_code)
-        set_task_status(prediction_task, TaskStatusTypes.successful)
+        for prediction, prediction_task, _ in predictions:
+            if 'result_location' not in prediction:
+                continue
+            with open(prediction['result_location'], 'rb') as result_file:
+                oracle_prediction_result = pickle.load(result_file)
+            os.remove(prediction['result_location'])
 
-        prediction_result_model = PredictionResult(
-            company_id=company_id,
-            task_code=prediction_task.task_code,
-            result=json_reload(interpreted_prediction_result),
-            prediction_task_id=prediction_task.id
-        )
+            interpreted_prediction_result = prediction_result_interpreter(oracle_prediction_result)
 
-        services.prediction.insert_result(prediction_result_model)
-        return
+            prediction_result_model = PredictionResult(
+                company_id=context['company_id'],
+                task_code=prediction_task.task_code,
+                result=json_reload(interpreted_prediction_result),
+                prediction_task_id=prediction_task.id
+            )
 
-    def on_failure(self, exc, task_id, args, kwargs, einfo):
-        task_code = args[0]
-        prediction_task = services.prediction.get_task_by_code(task_code)
-        set_task_status(prediction_task, TaskStatusTypes.failed)
-        logging.debug(f'Task {task_code} raised exception: {einfo.exception!r}\n{einfo.traceback!r}')
+            services.prediction.insert_result(prediction_result_model)
+
+            # the result is stored first, the tasks waiting for this one get a copy of it
+            logging.info("*** TASK FINISHED! %s", prediction_task.task_code)
+            set_task_status(prediction_task, TaskStatusTypes.successful)
 
 
-training_and_prediction_task = TrainAndPredictTask()
+prepare_prediction_task = PreparePredictionTask()
+train_prediction_task = TrainPredictionTask()
+predict_prediction_task = PredictPredictionTask()
+store_prediction_task = StorePredictionTask()
@@ -0,0 +1,22 @@
+import logging
+
+from app import services
+from app.tasks.base import BaseDBTask
+from config import CELERY_IO_QUEUE
+
+logging.basicConfig(level=logging.DEBUG)
+
+
+class SweepTimedOutTasks(BaseDBTask):
+    """
+    Runs periodically on the celery beat schedule: fails the tasks whose worker was lost,
+    e.g. killed before it could report the failure, so that they don't hold their slot and followers forever
+    """
+    name = 'sweep_timed_out_tasks'
+    queue = CELERY_IO_QUEUE
+
+    def run(self):
+        services.prediction.fail_timed_out_tasks()
+
+
+sweep_timed_out_tasks = SweepTimedOutTasks()
@@ -0,0 +1,70 @@
+import logging
+
+from app import services
+from app.core.schemas import TrainingRequestSchema
+from app.entities import TaskStatusTypes
+from app.services.training import set_task_status
+from app.tasks.base import BaseOracleTask
+from config import CELERY_ML_QUEUE
+
+logging.basicConfig(level=logging.DEBUG)
+
+
+class TrainTask(BaseOracleTask):
+    """
+    Trains the company's oracle on a datasource version and keeps the model in the registry,
+    so that any number of prediction tasks can use it afterwards.
+    """
+    name = 'training_task'
+    queue = CELERY_ML_QUEUE
+
+    def run(self, task_code):
+        training_task = services.training.get_for_task_code(task_code)
+        if not training_task:
+            logging.warning("No training task could be found for code %s", task_code)
+            return
+
+        training_request, errors = TrainingRequestSchema().load(training_task.training_request or {})
+        if errors:
+            logging.warning(errors)
+            set_task_status(training_task, TaskStatusTypes.failed, message=str(errors))
+            return
+
+        logging.info("*** TRAINING STARTED! %s", task_code)
+        set_task_status(training_task, TaskStatusTypes.started, message='Training started!')
+
+        datasource = services.datasource.get_by_id(training_task.datasource_id)
+        company = services.company.get_by_id(training_task.company_id)
+        company_configuration = company.current_configuration
+
+        model_key = services.oracle.get_model_key(company_configuration, datasource.upload_code, training_request)
+        if not services.oracle.get_model_registry().get(model_key):
+            interpreter = services.company.get_datasource_interpreter(company_configuration)
+            data_dict = services.datasource.get_data_dict(datasource, interpreter)
+
+            set_task_status(
+                training_task, TaskStatusTypes.in_progress,
+                message='Training machine learning model'
+            )
+            services.oracle.train_and_register(
+                company_configuration=company_configuration,
+                model_key=model_key,
+                prediction_request=training_request,
+                data_dict=data_dict
+            )
+            if not services.oracle.get_model_registry().get(model_key):
+                set_task_status(training_task, TaskStatusTypes.failed, message="The oracle can't save its model")
+                return
+
+        services.training.set_model_key(training_task, model_key)
+        logging.info("*** TRAINING FINISHED! %s", task_code)
+        set_task_status(training_task, TaskStatusTypes.successful)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        task_code = args[0]
+        training_task = services.training.get_for_task_code(task_code)
+        set_task_status(training_task, TaskStatusTypes.failed)
+        logging.debug(f'Training {task_code} raised exception: {einfo.exception!r}\n{einfo.traceback!r}')
+
+
+training_task = TrainTask()
@@ -0,0 +1,76 @@
+import logging
+
+from flask import Blueprint, g, url_for, request, abort, jsonify
+
+from app import services
+from app.core.auth import requires_access_token
+from app.core.content import ApiResponse
+from app.core.schemas import BacktestRequestSchema
+from app.core.utils import parse_request_data, json_reload
+
+backtest_blueprint = Blueprint('backtest', __name__)
+
+
+@backtest_blueprint.route('/', methods=['POST'])
+@requires_access_token
+@parse_request_data
+def submit():
+    """
+    Evaluates the oracle on the current datasource, training it at every step_days from start_time
+    to end_time and comparing its predictions with the data that followed each cutoff
+    """
+    company_id = g.user.company.id
+    datasource = g.user.company.current_datasource
+    if not datasource:
+        return jsonify(errors={'datasource': ['No datasource uploaded yet']}), 400
+
+    backtest_request, errors = BacktestRequestSchema().load(g.json)
+    if errors:
+        return jsonify(errors=errors), 400
+    # the oracle needs data before the first cutoff, and the predictions are scored against the data after the last
+    if backtest_request['start_time'] <= datasource.start_date.date():
+        errors['start_time'] = ['The first cutoff has to be after the start of the datasource']
+    if backtest_request['end_time'] >= datasource.end_date.date():
+        errors['end_time'] = ['The last cutoff has to be before the end of the datasource']
+    if errors:
+        return jsonify(errors=errors), 400
+
+    task_code = services.prediction.generate_task_code()
+    backtest_task = services.backtest.create_new_task(
+        task_code=task_code,
+        company_id=company_id,
+        user_id=g.user.id,
+        datasource_id=datasource.id,
+        backtest_request=json_reload(backtest_request)
+    )
+    services.backtest.queue_backtest(backtest_task)
+
+    response = ApiResponse(
+        content_type=request.accept_mimetypes.best,
+        next=url_for('customer.dashboard'),
+        status_code=202,
+        context={
+            'task_code': task_code,
+            'task_status': url_for('backtest.get_single_task', task_code=task_code, _external=True),
+        }
+    )
+
+    return response()
+
+
+@backtest_blueprint.route('/<string:task_code>', methods=['GET'])
+@requires_access_token
+def get_single_task(task_code):
+    backtest_task = services.backtest.get_task_by_code(task_code)
+    if not backtest_task:
+        logging.debug(f"No backtest task found for code {task_code}")
+        abort(404, 'No task found!')
+    if not backtest_task.company_id == g.user.company_id:
+        abort(403)
+
+    response = ApiResponse(
+        content_type=request.accept_mimetypes.best,
+        context=backtest_task,
+    )
+
+    return response()
@@ -5,15 +5,14 @@ from datetime import timedelta, datetime
 import pandas as pd
 from flask import (
     Blueprint, jsonify, render_template, g, request, abort, Response,
-    flash, redirect, url_for, current_app
+    flash, redirect, url_for
 )
 
 from app import services, ApiResponse
 from app.core.auth import requires_access_token
-from app.core.models import DataSource
+from app.core.preview import preview_to_dataframe, preview_statistics_to_dataframe
 from app.core.utils import handle_error, allowed_extension, generate_upload_code
 from app.entities import CompanyConfigurationEntity, PredictionTaskEntity
-from app.entities.datasource import UploadTypes
 from app.interpreters.prediction import (
     prediction_result_to_dataframe_with_error,
     calculate_average_factors_percentage,
@@ -81,9 +80,18 @@ def view_datasource(datasource_id):
     context = {
         'current_datasource': datasource,
         'profile': {'email': g.user.email},
-        'prediction_task_list': services.prediction.get_task_for_datasource_id(datasource.id)
+        'prediction_task_list': services.prediction.get_task_for_datasource_id(datasource.id),
+        'preview': None
     }
 
+    if datasource.preview:
+        context['preview'] = {
+            'row_count': datasource.preview['row_count'],
+            'head': preview_to_dataframe(datasource.preview, 'head'),
+            'tail': preview_to_dataframe(datasource.preview, 'tail'),
+            'statistics': preview_statistics_to_dataframe(datasource.preview),
+        }
+
     return render_template('datasource/detail.html', **context)
 
 
@@ -127,7 +135,7 @@ def view_prediction(task_code):
     prediction.datasource = datasource
 
     if prediction.is_completed:
-        elapsed = prediction.statuses[-1].last_update - prediction.created_at
+        elapsed = prediction.finished_at - prediction.created_at
     else:
         elapsed = datetime.utcnow() - prediction.created_at
 
@@ -153,7 +161,9 @@ def view_prediction(task_code):
         target_feature = g.user.company.current_configuration.configuration.target_feature
 
         if latest_date_in_datasource > latest_date_in_results:
-            actuals_dataframe = services.datasource.get_dataframe(g.user.company.current_datasource)
+            actuals_dataframe = services.datasource.get_dataframe(
+                g.user.company.current_datasource, columns=[target_feature]
+            )
             actuals_dataframe.index = actuals_dataframe.index.tz_localize('UTC')
             actuals_dataframe = actuals_dataframe.resample(DEFAULT_TIME_RESOLUTION).sum()
             result_dataframe['actuals'] = actuals_dataframe[target_feature]
@@ -173,7 +183,7 @@ def view_prediction(task_code):
                 result_dataframe.index[0].strftime(DATETIME_FORMAT),
                 result_dataframe.index[-1].strftime(DATETIME_FORMAT)
             ],
-            'status': prediction.statuses[-1].state,
+            'status': prediction.status,
             'prediction_result': prediction.prediction_result,
             'factors': percent_factors
         }
@@ -282,6 +292,7 @@ def datasource_upload():
 
     interpreter = services.company.get_datasource_interpreter(company_configuration)
     uploaded_dataframe, errors = interpreter.from_csv_to_dataframe(uploaded_file)
+    uploaded_file.close()
     target_feature = company_configuration.configuration.target_feature
     if errors:
         logging.debug(f"Invalid file uploaded: {', '.join(errors)}")
@@ -291,18 +302,17 @@ def datasource_upload():
         return handle_error(400, f"Required feature {target_feature} not present in the file")
 
     upload_code = generate_upload_code()
-    saved_path = os.path.join(current_app.config['TEMPORARY_CSV_FOLDER'], f"{upload_code}.csv")
+    uploaded_dataframe = uploaded_dataframe.sort_index(ascending=True)
+    services.ingestion.stage_dataframe(uploaded_dataframe, upload_code)
 
-    current_datasource_dataframe = pd.DataFrame()
-    if user.company.current_datasource:
-        data_source = services.datasource.get_by_upload_code(user.company.current_datasource.upload_code)
-        current_datasource_dataframe = data_source._model.get_file()
-
-    uploaded_dataframe.to_csv(saved_path)
+    current_datasource = company.current_datasource
+    current_datasource_tail = None
+    if current_datasource and current_datasource.preview:
+        current_datasource_tail = preview_to_dataframe(current_datasource.preview, 'tail')
 
     context = {
-        'current_datasource_dataframe': current_datasource_dataframe.sort_index(ascending=True),
-        'uploaded_dataframe': uploaded_dataframe.sort_index(ascending=True),
+        'current_datasource_tail': current_datasource_tail,
+        'uploaded_dataframe': uploaded_dataframe,
         'upload_code': upload_code,
         'company_configuration': company_configuration.configuration
     }
@@ -315,7 +325,6 @@ def datasource_upload():
 def datasource_confirm():
     user = g.user
     company = user.company
-    company_configuration = company.current_configuration
 
     try:
         upload_code = request.form['upload_code']
@@ -324,66 +333,34 @@ def datasource_confirm():
         flash("An error occurred while confirming the data source")
         return redirect(url_for('customer.list_datasources'), 400)
 
-    csv_path = os.path.join(
-        current_app.config['TEMPORARY_CSV_FOLDER'], f"{request.form.get('upload_code')}.csv"
-    )
-    csv_file = open(csv_path, 'r')
-    interpreter = services.company.get_datasource_interpreter(company_configuration)
-    uploaded_dataframe, errors = interpreter.from_csv_to_dataframe(csv_file)
-
-    features = list(uploaded_dataframe.columns)
-
-    if user.company.current_datasource:
-        data_source = services.datasource.get_by_upload_code(user.company.current_datasource.upload_code)
-        existing_data_frame = data_source._model.get_file()
-        cumulative_dataframe = pd.concat([existing_data_frame, uploaded_dataframe])
-    else:
-        cumulative_dataframe = uploaded_dataframe
-
-    saved_path = os.path.join(current_app.config['UPLOAD_FOLDER'], upload_code + '.hdf5')
-    cumulative_dataframe = cumulative_dataframe.reset_index()
-    cumulative_dataframe = cumulative_dataframe.drop_duplicates()
-    cumulative_dataframe = cumulative_dataframe.set_index(interpreter.INDEX_COLUMN)
-    cumulative_dataframe.to_hdf(saved_path, key=current_app.config['HDF5_STORE_INDEX'])
+    # a confirmation submitted twice gets the ingestion started by the first one
+    ingestion_task = services.ingestion.get_task_by_code(upload_code)
+    if ingestion_task and ingestion_task.company_id != company.id:
+        abort(403)
 
-    original = True if len(user.company.data_sources) == 0 else False
-
-    cumulative_dataframe = cumulative_dataframe.sort_index(ascending=True)
-
-    target_feature = company_configuration.configuration.target_feature
-    upload = DataSource(
-        user_id=user.id,
-        company_id=user.company_id,
-        upload_code=upload_code,
-        type=UploadTypes.FILESYSTEM,
-        location=saved_path,
-        filename=upload_code,
-        start_date=cumulative_dataframe.index[0].to_pydatetime(),
-        end_date=cumulative_dataframe.index[-1].to_pydatetime(),
-        is_original=original,
-        features=', '.join(features),
-        target_feature=target_feature,
-    )
-
-    datasource = services.datasource.insert(upload)
-
-    temporary_csv = os.path.join(current_app.config['TEMPORARY_CSV_FOLDER'], '{}.csv'.format(upload_code))
-    try:
-        os.remove(temporary_csv)
-    except OSError as e:
-        logging.warning(
-            f"Trying to remove the original file {upload_code}.csv which doesn't exists while confirming the datasource"
+    if not ingestion_task:
+        staged_location = services.ingestion.get_staging_location(
+            upload_code, services.ingestion.STAGED_DATAFRAME_EXTENSION
         )
-
-    upload_strategy_class = company_configuration.configuration.upload_strategy
-    upload_strategy = services.strategies.get_upload_strategy(upload_strategy_class)
-    upload_strategy.run(datasource=datasource, company_configuration=company_configuration)
+        if not os.path.exists(staged_location):
+            logging.error(f"Trying to confirm an upload {upload_code} which was discarded")
+            flash("An error occurred while confirming the data source")
+            return redirect(url_for('customer.list_datasources'), 400)
+
+        ingestion_task = services.ingestion.start_ingestion(
+            upload_code=upload_code,
+            company_id=company.id,
+            user_id=user.id,
+            filename=upload_code,
+            location=staged_location
+        )
+    flash("Your historical data is being processed, it will be available shortly", category='success')
 
     response = ApiResponse(
         content_type=request.accept_mimetypes.best,
-        context=datasource,
+        context=ingestion_task,
         next=url_for('customer.list_datasources'),
-        status_code=201
+        status_code=202
     )
 
     return response()
@@ -392,13 +369,15 @@ def datasource_confirm():
 @customer_blueprint.route('/datasource/discard/<string:upload_code>')
 @requires_access_token
 def datasource_discard(upload_code):
-    temporary_csv = os.path.join(current_app.config['TEMPORARY_CSV_FOLDER'], f'{upload_code}.csv')
+    staged_location = services.ingestion.get_staging_location(
+        upload_code, services.ingestion.STAGED_DATAFRAME_EXTENSION
+    )
 
     try:
-        os.remove(temporary_csv)
+        os.remove(staged_location)
     except OSError:
         logging.warning(
-            f"trying to remove a non existent csv source {upload_code} user_id {g.user.id} company_id {g.user.company_id}"
+            f"trying to remove a non existent staged upload {upload_code} user_id {g.user.id} company_id {g.user.company_id}"
         )
 
     return redirect(url_for('customer.list_datasources'))
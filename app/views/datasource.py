@@ -1,16 +1,12 @@
 import logging
-import os
 
-import pandas as pd
-from flask import Blueprint, request, abort, current_app, url_for, g, flash
+from flask import Blueprint, request, abort, url_for, g, flash
 from werkzeug.utils import secure_filename
 
 from app import services
 from app.core.auth import requires_access_token
 from app.core.content import ApiResponse
-from app.core.models import DataSource
 from app.core.utils import allowed_extension, generate_upload_code, handle_error
-from app.entities.datasource import UploadTypes
 
 datasource_blueprint = Blueprint('datasource', __name__)
 
@@ -53,6 +49,32 @@ def get(datasource_id):
     return response()
 
 
+@datasource_blueprint.route('/<string:datasource_id>/statistics')
+@requires_access_token
+def statistics(datasource_id):
+    datasource = services.datasource.get_by_upload_code(datasource_id)
+    if not datasource:
+        logging.debug(f"No datasource was found for id {datasource_id}")
+        abort(404, 'No data source found!')
+    if not datasource.company_id == g.user.company_id:
+        abort(403)
+
+    response = ApiResponse(
+        content_type=request.accept_mimetypes.best,
+        context={
+            'upload_code': datasource.upload_code,
+            'row_count': datasource.row_count,
+            'start_date': datasource.start_date,
+            'end_date': datasource.end_date,
+            'frequency': datasource.frequency,
+            'entities': datasource.entities,
+            'columns': services.datasource.get_column_statistics(datasource),
+        }
+    )
+
+    return response()
+
+
 @datasource_blueprint.route('/', methods=['POST'])
 @requires_access_token
 def upload():
@@ -74,59 +96,43 @@ def upload():
 
     upload_code = generate_upload_code()
     filename = services.datasource.generate_filename(upload_code, secure_filename(uploaded_file.filename))
+    location = services.ingestion.stage_upload(uploaded_file, upload_code)
 
-    interpreter = services.company.get_datasource_interpreter(company_configuration)
-    target_feature = company_configuration.configuration.target_feature
-    data_frame, errors = interpreter.from_csv_to_dataframe(uploaded_file)
-
-    if errors:
-        logging.debug(f"Invalid file uploaded: {', '.join(errors)}")
-        return handle_error(400, ', '.join(errors))
-
-    if not target_feature in list(data_frame.columns):
-        return handle_error(400, f"Required feature {target_feature} not in {uploaded_file.filename}")
-
-    features = list(data_frame.columns)
-
-    if user.company.current_datasource:
-        data_source = services.datasource.get_by_upload_code(user.company.current_datasource.upload_code)
-        existing_data_frame = data_source._model.get_file()
-        data_frame = pd.concat([existing_data_frame, data_frame])
-
-    saved_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename + '.hdf5')
-    data_frame = data_frame.reset_index()
-    data_frame = data_frame.drop_duplicates()
-    data_frame = data_frame.set_index(interpreter.INDEX_COLUMN)
-    data_frame = data_frame.sort_index(ascending=True)
-    data_frame.to_hdf(saved_path, key=current_app.config['HDF5_STORE_INDEX'])
-
-    original = True if len(company.data_sources) == 0 else False
-
-    upload = DataSource(
-        user_id=user.id,
-        company_id=company.id,
+    services.ingestion.start_ingestion(
         upload_code=upload_code,
-        type=UploadTypes.FILESYSTEM,
-        location=saved_path,
+        company_id=company.id,
+        user_id=user.id,
         filename=filename,
-        start_date=data_frame.index[0].to_pydatetime(),
-        end_date=data_frame.index[-1].to_pydatetime(),
-        is_original=original,
-        features=', '.join(features),
-        target_feature=target_feature,
+        location=location
+    )
+
+    response = ApiResponse(
+        content_type=request.accept_mimetypes.best,
+        context={
+            'upload_code': upload_code,
+            'task_status': url_for('datasource.ingestion_status', upload_code=upload_code, _external=True),
+            'datasource': url_for('datasource.get', datasource_id=upload_code, _external=True)
+        },
+        next=url_for('customer.list_datasources'),
+        status_code=202
     )
 
-    datasource = services.datasource.insert(upload)
+    return response()
+
 
-    upload_strategy_class = company_configuration.configuration.upload_strategy
-    upload_strategy = services.strategies.get_upload_strategy(upload_strategy_class)
-    upload_strategy.run(datasource=datasource, company_configuration=company_configuration)
+@datasource_blueprint.route('/ingestion/<string:upload_code>')
+@requires_access_token
+def ingestion_status(upload_code):
+    ingestion_task = services.ingestion.get_task_by_code(upload_code)
+    if not ingestion_task:
+        logging.debug(f"No ingestion task was found for code {upload_code}")
+        abort(404, 'No ingestion task found!')
+    if not ingestion_task.company_id == g.user.company_id:
+        abort(403)
 
     response = ApiResponse(
         content_type=request.accept_mimetypes.best,
-        context=datasource,
-        next=url_for('customer.list_datasources'),
-        status_code=201
+        context=ingestion_task,
     )
 
     return response()
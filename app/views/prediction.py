@@ -1,14 +1,17 @@
+import json
 import logging
+import time
 
-from flask import Blueprint, jsonify, url_for, g, request, abort
+from flask import Blueprint, Response, jsonify, url_for, g, request, abort
 
 from app import services
 from app.core.auth import requires_access_token
 from app.core.content import ApiResponse
-from app.core.schemas import PredictionRequestSchema
+from app.core.schemas import PredictionRequestSchema, BatchPredictionRequestSchema, TaskStatusesRequestSchema
 from app.core.utils import parse_request_data
+from app.database import db_session
 from app.entities import TaskStatusTypes
-from app.tasks.predict import training_and_prediction_task
+from config import TASK_EVENTS_KEEPALIVE, TASK_EVENTS_MAX_WAIT, TASK_EVENTS_STREAM_DURATION
 
 predict_blueprint = Blueprint('prediction', __name__)
 
@@ -25,6 +28,12 @@ def submit():
     if errors:
         return jsonify(errors=errors), 400
 
+    training_task = None
+    if prediction_request['use_latest_training']:
+        training_task = services.training.get_latest_successful_for_datasource(datasource_id)
+        if not training_task:
+            return jsonify(errors={'use_latest_training': ['No successful training found for the datasource']}), 400
+
     task_code = services.prediction.generate_task_code()
     logging.warning("Generated task code was %s", task_code)
 
@@ -37,9 +46,10 @@ def submit():
     )
 
     services.prediction.set_task_status(prediction_task, TaskStatusTypes.queued)
-    upload_code = g.user.company.current_datasource.upload_code
-    training_and_prediction_task.apply_async(
-        (task_code, company_id, upload_code, prediction_request)
+    services.prediction.start_prediction(
+        task_code, prediction_request,
+        training_task_code=training_task.task_code if training_task else None,
+        force=prediction_request['force']
     )
 
     response = ApiResponse(
@@ -55,6 +65,123 @@ def submit():
     return response()
 
 
+@predict_blueprint.route('/batch', methods=['POST'])
+@requires_access_token
+@parse_request_data
+def submit_batch():
+    """
+    Predicts a list of windows on the current datasource: the data is loaded once, and the oracle is trained once
+    for every distinct start time. Every window gets its own prediction task and result.
+    """
+    company_id = g.user.company.id
+    datasource_id = g.user.company.current_datasource.id
+    batch_request, errors = BatchPredictionRequestSchema().load(g.json)
+    if errors:
+        return jsonify(errors=errors), 400
+
+    training_task = None
+    if batch_request['use_latest_training']:
+        training_task = services.training.get_latest_successful_for_datasource(datasource_id)
+        if not training_task:
+            return jsonify(errors={'use_latest_training': ['No successful training found for the datasource']}), 400
+
+    batch_code = services.prediction.generate_task_code()
+    task_codes = []
+    prediction_requests = []
+    for number, window in enumerate(batch_request['windows'], start=1):
+        task_code = services.prediction.generate_task_code()
+        prediction_request = dict(window, name=f"{batch_request['name']}-{number}")
+        prediction_task = services.prediction.create_prediction_task(
+            task_name=prediction_request['name'],
+            task_code=task_code,
+            company_id=company_id,
+            user_id=g.user.id,
+            datasource_id=datasource_id,
+            batch_code=batch_code,
+        )
+        services.prediction.set_task_status(prediction_task, TaskStatusTypes.queued)
+        task_codes.append(task_code)
+        prediction_requests.append(prediction_request)
+
+    services.prediction.start_batch_prediction(
+        task_codes, prediction_requests,
+        training_task_code=training_task.task_code if training_task else None,
+        force=batch_request['force']
+    )
+
+    response = ApiResponse(
+        content_type=request.accept_mimetypes.best,
+        next=url_for('customer.dashboard'),
+        context={
+            'batch_code': batch_code,
+            'batch_status': url_for('prediction.get_batch', batch_code=batch_code, _external=True),
+            'tasks': [
+                {
+                    'task_code': task_code,
+                    'task_status': url_for('prediction.get_single_task', task_code=task_code, _external=True),
+                    'result': url_for('prediction.result', task_code=task_code, _external=True)
+                }
+                for task_code in task_codes
+            ]
+        }
+    )
+
+    return response()
+
+
+@predict_blueprint.route('/batch/<string:batch_code>', methods=['GET'])
+@requires_access_token
+def get_batch(batch_code):
+    prediction_tasks = services.prediction.get_tasks_by_batch_code(batch_code)
+    if not prediction_tasks:
+        logging.debug(f"No batch found for code {batch_code}")
+        abort(404, 'No batch found!')
+    if not prediction_tasks[0].company_id == g.user.company_id:
+        abort(403)
+
+    response = ApiResponse(
+        content_type=request.accept_mimetypes.best,
+        context={'batch_code': batch_code, 'tasks': prediction_tasks},
+    )
+
+    return response()
+
+
+@predict_blueprint.route('/statuses', methods=['POST'])
+@requires_access_token
+@parse_request_data
+def get_statuses():
+    """
+    The current status of many tasks in one call, without their status history.
+    The codes which aren't tasks of the company are listed as not found.
+    """
+    statuses_request, errors = TaskStatusesRequestSchema().load(g.json)
+    if errors:
+        return jsonify(errors=errors), 400
+
+    task_codes = list(dict.fromkeys(statuses_request['task_codes']))
+    statuses = services.prediction.get_statuses_by_task_codes(g.user.company_id, task_codes)
+
+    tasks = []
+    for task_code in task_codes:
+        if task_code not in statuses:
+            continue
+        task_status = statuses[task_code]
+        tasks.append({
+            'task_code': task_code,
+            'status': task_status['status'],
+            'is_completed': task_status['is_completed'],
+            'result': url_for(
+                'prediction.result', task_code=task_code, _external=True
+            ) if task_status['has_result'] else None,
+        })
+
+    return jsonify(
+        tasks=tasks,
+        not_found=[task_code for task_code in task_codes if task_code not in statuses]
+    )
+
+
 @predict_blueprint.route('/', methods=['GET'])
 @requires_access_token
 def get_tasks():
@@ -65,19 +192,102 @@ def get_tasks():
 @requires_access_token
 @parse_request_data
 def get_single_task(task_code):
+    """
+    With ?wait=<seconds>, the response of a task which isn't completed yet is held
+    until its next status is set, or for at most that long
+    """
+    wait = min(request.args.get('wait', 0, type=float), TASK_EVENTS_MAX_WAIT)
+    subscription = services.prediction.get_task_events().subscribe(task_code) if wait > 0 else None
+    try:
+        prediction_task = get_company_task(task_code)
+        if subscription and not prediction_task.is_completed:
+            # the connection isn't kept while waiting
+            db_session.remove()
+            if subscription.get(wait):
+                prediction_task = get_company_task(task_code)
+    finally:
+        if subscription:
+            subscription.close()
+
+    response = ApiResponse(
+        content_type=request.accept_mimetypes.best,
+        context=prediction_task,
+    )
+
+    return response()
+
+
+@predict_blueprint.route('/<string:task_code>/events', methods=['GET'])
+@requires_access_token
+def stream_task_events(task_code):
+    """
+    Streams the statuses of a task as server-sent events: the ones it already has, then every new one
+    as soon as it's set, until the task is completed. The last status of a successful task links to its result.
+    The stream is closed after TASK_EVENTS_STREAM_DURATION seconds, and a client reconnecting
+    with the Last-Event-ID header only gets the statuses it didn't receive.
+    """
+    subscription = services.prediction.get_task_events().subscribe(task_code)
+    if not subscription:
+        abort(503, 'The events of the task are unavailable, please poll the task instead')
+    try:
+        prediction_task = get_company_task(task_code)
+    except Exception:
+        subscription.close()
+        raise
+
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_event_id = 0
+    events = [
+        services.prediction.get_status_event(status)
+        for status in prediction_task.statuses if status.id > last_event_id
+    ]
+    result_url = url_for('prediction.result', task_code=task_code, _external=True)
+    is_completed = prediction_task.is_completed
+
+    def stream():
+        sent_event_id = last_event_id
+        deadline = time.monotonic() + TASK_EVENTS_STREAM_DURATION
+        try:
+            for event in events:
+                sent_event_id = max(sent_event_id, event['id'])
+                yield format_status_event(event, result_url)
+            while not is_completed and time.monotonic() < deadline:
+                event = subscription.get(TASK_EVENTS_KEEPALIVE)
+                if event is None:
+                    yield ': keepalive\n\n'
+                    continue
+                if event['id'] <= sent_event_id:
+                    continue
+                sent_event_id = event['id']
+                yield format_status_event(event, result_url)
+                if event['is_completed']:
+                    break
+        finally:
+            subscription.close()
+
+    # the statuses are read: the stream doesn't need the request or the database anymore
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+def get_company_task(task_code):
     prediction_task = services.prediction.get_task_by_code(task_code)
     if not prediction_task:
         logging.debug(f"No task found for code {task_code}")
         abort(404, 'No task found!')
     if not prediction_task.company_id == g.user.company_id:
         abort(403)
+    return prediction_task
 
-    response = ApiResponse(
-        content_type=request.accept_mimetypes.best,
-        context=prediction_task,
-    )
 
-    return response()
+def format_status_event(event, result_url):
+    if event['state'] == TaskStatusTypes.successful.value:
+        event = dict(event, result=result_url)
+    return f"id: {event['id']}\nevent: status\ndata: {json.dumps(event)}\n\n"
 
 
 @predict_blueprint.route('/result', methods=['GET'])
@@ -0,0 +1,70 @@
+import logging
+
+from flask import Blueprint, g, url_for, request, abort, jsonify
+
+from app import services
+from app.core.auth import requires_access_token
+from app.core.content import ApiResponse
+from app.core.schemas import TrainingRequestSchema
+from app.core.utils import parse_request_data, json_reload
+from app.tasks.train import training_task
+
+training_blueprint = Blueprint('training', __name__)
+
+
+@training_blueprint.route('/', methods=['POST'])
+@requires_access_token
+@parse_request_data
+def submit():
+    """
+    Trains the oracle on the current datasource. Predictions can then use the trained model
+    by setting use_latest_training, instead of training the oracle again.
+    """
+    company_id = g.user.company.id
+    datasource = g.user.company.current_datasource
+    if not datasource:
+        return jsonify(errors={'datasource': ['No datasource uploaded yet']}), 400
+
+    training_request, errors = TrainingRequestSchema().load(g.json)
+    if errors:
+        return jsonify(errors=errors), 400
+
+    task_code = services.prediction.generate_task_code()
+    services.training.create_new_task(
+        task_code=task_code,
+        company_id=company_id,
+        user_id=g.user.id,
+        datasource_id=datasource.id,
+        training_request=json_reload(training_request)
+    )
+    training_task.apply_async((task_code,))
+
+    response = ApiResponse(
+        content_type=request.accept_mimetypes.best,
+        next=url_for('customer.dashboard'),
+        status_code=202,
+        context={
+            'task_code': task_code,
+            'task_status': url_for('training.get_single_task', task_code=task_code, _external=True),
+        }
+    )
+
+    return response()
+
+
+@training_blueprint.route('/<string:task_code>', methods=['GET'])
+@requires_access_token
+def get_single_task(task_code):
+    training_task = services.training.get_for_task_code(task_code)
+    if not training_task:
+        logging.debug(f"No training task found for code {task_code}")
+        abort(404, 'No task found!')
+    if not training_task.company_id == g.user.company_id:
+        abort(403)
+
+    response = ApiResponse(
+        content_type=request.accept_mimetypes.best,
+        context=training_task,
+    )
+
+    return response()
@@ -11,4 +11,4 @@ def create_superuser():
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.DEBUG)
-    app.run(debug=True, host=app.config['HOST'], port=app.config['PORT'])
+    app.run(debug=True, threaded=True, host=app.config['HOST'], port=app.config['PORT'])
@@ -16,15 +16,36 @@ HOST = os.getenv('HOST')
 SERVER_NAME = os.getenv('SERVER_NAME')
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND')
+# light tasks (ingestion, loading data, storing results) and machine learning tasks run on separate workers
+CELERY_IO_QUEUE = os.getenv('CELERY_IO_QUEUE', 'io')
+CELERY_ML_QUEUE = os.getenv('CELERY_ML_QUEUE', 'ml')
+# the redis the task statuses are published to, for the clients following a task
+TASK_EVENTS_URL = os.getenv('TASK_EVENTS_URL', CELERY_BROKER_URL)
+# seconds between two keepalive comments of an event stream, and the longest wait of a long-polling request:
+# it has to stay below the timeout of the web workers (30 seconds, see api-server.service)
+TASK_EVENTS_KEEPALIVE = int(os.getenv('TASK_EVENTS_KEEPALIVE', 15))
+TASK_EVENTS_MAX_WAIT = min(int(os.getenv('TASK_EVENTS_MAX_WAIT', 25)), 25)
+# seconds an event stream is kept open, the client reconnects from its last event afterwards
+TASK_EVENTS_STREAM_DURATION = int(os.getenv('TASK_EVENTS_STREAM_DURATION', 300))
 SQLALCHEMY_TRACK_MODIFICATIONS = os.getenv('SQLALCHEMY_DATABASE_URI')
 SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI')
 UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER')
-TEMPORARY_CSV_FOLDER = os.path.join(UPLOAD_FOLDER, "csv")
+STAGING_FOLDER = os.path.join(UPLOAD_FOLDER, "staging")
+ROW_INDEX_FOLDER = os.path.join(UPLOAD_FOLDER, "index")
+DATA_DICT_CACHE_FOLDER = os.path.join(UPLOAD_FOLDER, "cache")
+MODEL_REGISTRY_FOLDER = os.path.join(UPLOAD_FOLDER, "models")
+BACKTEST_FOLDER = os.path.join(UPLOAD_FOLDER, "backtests")
 ALLOWED_EXTENSIONS = eval(os.getenv('ALLOWED_EXTENSIONS'))
 SECRET_KEY = os.getenv('SECRET_KEY')
 TOKEN_EXPIRATION = int(os.getenv('TOKEN_EXPIRATION'))
 HDF5_STORE_INDEX = os.getenv('HDF5_STORE_INDEX')
 MAXIMUM_DAYS_FORECAST = int(os.getenv('MAXIMUM_DAYS_FORECAST'))
+# the predictions sent to the workers at once, by default and for every company, the others wait to be dispatched
+MAX_CONCURRENT_TASKS_PER_COMPANY = int(os.getenv('MAX_CONCURRENT_TASKS_PER_COMPANY', 1))
+PREDICTION_DISPATCH_LIMIT = int(os.getenv('PREDICTION_DISPATCH_LIMIT', 2))
+# a prediction running for longer is assumed lost: it's failed by the next sweep, every TASK_SWEEP_INTERVAL seconds
+PREDICTION_TASK_TIMEOUT = int(os.getenv('PREDICTION_TASK_TIMEOUT', 6 * 60 * 60))
+TASK_SWEEP_INTERVAL = int(os.getenv('TASK_SWEEP_INTERVAL', 5 * 60))
 DEFAULT_EMAIL_FROM_ADDRESS = os.getenv('DEFAULT_EMAIL_FROM_ADDRESS')
 MAILGUN_URL = os.getenv('MAILGUN_URL')
 MAILGUN_API_KEY = os.getenv('MAILGUN_API_KEY')
@@ -34,3 +55,9 @@ DATETIME_TZ_FORMAT = os.getenv('DATETIME_TZ_FORMAT')
 SUPERUSER_EMAIL = os.getenv('SUPERUSER_EMAIL')
 SUPERUSER_PASSWORD = os.getenv('SUPERUSER_PASSWORD')
 DEFAULT_TIME_RESOLUTION = '15T'
+CSV_CHUNK_SIZE = int(os.getenv('CSV_CHUNK_SIZE', 100000))
+DATA_DICT_CACHE_SIZE = int(os.getenv('DATA_DICT_CACHE_SIZE', 2 * 1024 ** 3))
+MODEL_REGISTRY_SIZE = int(os.getenv('MODEL_REGISTRY_SIZE', 10 * 1024 ** 3))
+# the number of tasks the cutoffs of a backtest are split into: they run one after the other,
+# and the predictions dispatched in the meantime go in between
+BACKTEST_CHUNKS = int(os.getenv('BACKTEST_CHUNKS', 4))
@@ -0,0 +1,31 @@
+"""parquet upload type
+
+Revision ID: 5e81b0c4d2a9
+Revises: a3c9d1e7f0b2
+Create Date: 2018-04-12 10:30:27.590417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e81b0c4d2a9'
+down_revision = 'a3c9d1e7f0b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ALTER TYPE ... ADD VALUE can't run inside a transaction block
+    op.execute('COMMIT')
+    op.execute("ALTER TYPE uploadtypes ADD VALUE IF NOT EXISTS 'PARQUET'")
+
+
+def downgrade():
+    # postgres can't drop a value from an enum type, so we recreate it
+    op.execute("UPDATE data_source SET type = 'FILESYSTEM' WHERE type = 'PARQUET'")
+    op.execute("ALTER TYPE uploadtypes RENAME TO uploadtypes_old")
+    op.execute("CREATE TYPE uploadtypes AS ENUM ('FILESYSTEM', 'BLOBSTORE')")
+    op.execute("ALTER TABLE data_source ALTER COLUMN type TYPE uploadtypes USING type::text::uploadtypes")
+    op.execute("DROP TYPE uploadtypes_old")
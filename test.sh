@@ -5,7 +5,7 @@ trap "kill 0" EXIT
 docker-compose up -d
 export APP_CONFIG=test.env
 PGPASSWORD=postgres psql -h localhost -U postgres -tc "SELECT 1 FROM pg_database WHERE datname = 'test'" | grep -q 1 || psql -U postgres -h localhost -c "CREATE DATABASE test"
-PYTHONOPTIMIZE=1 celery -A test.test_app.celery worker -E --loglevel=info --concurrency=1 --max-tasks-per-child=1 &
+PYTHONOPTIMIZE=1 celery -A test.test_app.celery worker -E --loglevel=info -Q io,ml --concurrency=1 --max-memory-per-child=4000000 &
 sleep 3  # give celery time to start
 pytest $@ --ignore=src/
 kill %1
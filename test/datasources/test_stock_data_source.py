@@ -4,6 +4,7 @@ import pandas as pd
 from flask import url_for
 
 from app import interpreters
+from app.entities import TaskStatusTypes
 from test.functional.base_test_class import BaseTestClass
 
 HERE = os.path.join(os.path.dirname(__file__))
@@ -162,6 +163,7 @@ class TestStockDataSource(BaseTestClass):
             )
             assert resp.status_code == 302  # in order to redirect to the dashboard
             assert resp.json
+            assert self.wait_for_ingestion(resp.json['upload_code']) == TaskStatusTypes.successful.value
 
 
 def test_from_oldmutual_csv_to_dataframe():
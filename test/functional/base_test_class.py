@@ -1,5 +1,6 @@
 import json
 import os
+import time
 
 from flask import url_for
 from flask_testing import TestCase
@@ -10,6 +11,7 @@ from config import SUPERUSER_EMAIL, SUPERUSER_PASSWORD
 from test.test_app import APP
 
 from app.database import db_session, engine
+from app.entities import TaskStatusTypes
 from app.entities.base import EntityDeclarativeBase
 
 
@@ -232,3 +234,15 @@ class BaseTestClass(TestCase):
             url_for('authentication.logout')
         )
         assert resp.status_code == 200
+
+    def wait_for_ingestion(self, upload_code):
+        status = None
+        while status not in [TaskStatusTypes.successful.value, TaskStatusTypes.failed.value]:
+            time.sleep(1)
+            resp = self.client.get(
+                url_for('datasource.ingestion_status', upload_code=upload_code),
+                headers={'Accept': 'application/json'}
+            )
+            assert resp.status_code == 200
+            status = resp.json['status']
+        return status
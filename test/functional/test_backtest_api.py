@@ -0,0 +1,71 @@
+import json
+import os
+import time
+
+from flask import url_for
+
+from app.entities import TaskStatusTypes
+from test.functional.base_test_class import BaseTestClass
+
+HERE = os.path.join(os.path.dirname(__file__))
+
+
+class TestBacktestAPI(BaseTestClass):
+    TESTING = True
+
+    def setUp(self):
+        super().setUp()
+        self.create_superuser()
+        self.login_superuser()
+        self.register_company()
+        self.register_user()
+        self.set_company_configuration()
+        self.logout()
+
+    def test_backtest(self):
+        self.login()
+
+        with open(os.path.join(HERE, '../resources/test_stock_standardised.csv'), 'rb') as test_upload_file:
+            resp = self.client.post(
+                url_for('datasource.upload'),
+                content_type='multipart/form-data',
+                data={'upload': (test_upload_file, 'test_stock_standardised.csv')},
+            )
+            assert resp.status_code == 202
+            assert self.wait_for_ingestion(resp.json['upload_code']) == TaskStatusTypes.successful.value
+
+        resp = self.client.post(
+            url_for('backtest.submit'),
+            content_type='application/json',
+            data=json.dumps({"start_time": "2017-09-29", "end_time": "2017-09-01"}),
+            headers={'Authorization': self.token}
+        )
+        assert resp.status_code == 400
+
+        resp = self.client.post(
+            url_for('backtest.submit'),
+            content_type='application/json',
+            data=json.dumps({"start_time": "2000-01-03", "end_time": "2017-09-29"}),
+            headers={'Authorization': self.token}
+        )
+        assert resp.status_code == 400
+        assert list(resp.json['errors']) == ['start_time']
+
+        resp = self.client.post(
+            url_for('backtest.submit'),
+            content_type='application/json',
+            data=json.dumps({"start_time": "2017-09-01", "end_time": "2017-09-29", "step_days": 14}),
+            headers={'Authorization': self.token}
+        )
+        assert resp.status_code == 202
+        task_code = resp.json['task_code']
+
+        resp = self.client.get(url_for('backtest.get_single_task', task_code=task_code))
+        while resp.json['status'] not in ['SUCCESSFUL', 'FAILED']:
+            time.sleep(2)
+            resp = self.client.get(url_for('backtest.get_single_task', task_code=task_code))
+
+        assert resp.json['status'] == TaskStatusTypes.successful.value
+        metrics = resp.json['metrics']
+        assert [cutoff['cutoff'] for cutoff in metrics['cutoffs']] == ['2017-09-01', '2017-09-15', '2017-09-29']
+        assert metrics['count'] > 0
@@ -2,6 +2,8 @@ import os
 
 from flask import url_for
 
+from app import services
+from app.entities import TaskStatusTypes
 from test.functional.base_test_class import BaseTestClass
 
 HERE = os.path.join(os.path.dirname(__file__))
@@ -151,6 +153,13 @@ class TestDataSourceUpload(BaseTestClass):
             )
             assert resp.status_code == 302  # in order to redirect to the dashboard
             assert resp.json
+            upload_code = resp.json['upload_code']
+
+            assert self.wait_for_ingestion(upload_code) == TaskStatusTypes.successful.value
+            resp = self.client.get(
+                url_for('datasource.get', datasource_id=upload_code),
+                headers={'Accept': 'application/json'}
+            )
 
             """
             Response looks like:
@@ -178,9 +187,64 @@ class TestDataSourceUpload(BaseTestClass):
             )
             assert resp.status_code == 302  # in order to redirect to the dashboard
             assert resp.json
+            upload_code = resp.json['upload_code']
+
+            assert self.wait_for_ingestion(upload_code) == TaskStatusTypes.successful.value
+            resp = self.client.get(
+                url_for('datasource.get', datasource_id=upload_code),
+                headers={'Accept': 'application/json'}
+            )
             assert resp.json['start_date'] == '2015-08-15T00:00:11+00:00'
             assert resp.json['end_date'] == '2017-08-15T03:21:14+00:00'
 
+    def test_interleaved_uploads_build_on_each_other(self):
+        user = services.user.get_by_email(self.USER_EMAIL)
+        company_configuration = services.company.get_by_id(user.company_id).current_configuration
+        interpreter = services.company.get_datasource_interpreter(company_configuration)
+        dataframe, errors = interpreter.from_csv_to_dataframe(os.path.join(HERE, '../resources/test_data.csv'))
+        assert not errors
+
+        # both ingestions read the company before any of them creates its version
+        companies = [services.company.get_by_id(user.company_id) for _ in range(2)]
+        halves = [dataframe.iloc[:len(dataframe) // 2], dataframe.iloc[len(dataframe) // 2:]]
+        versions = [
+            services.datasource.create_version(
+                dataframe=half,
+                user_id=user.id,
+                company=company,
+                company_configuration=company_configuration,
+                upload_code=upload_code,
+                filename=f'{upload_code}.csv'
+            )
+            for company, half, upload_code in zip(companies, halves, ['first', 'second'])
+        ]
+
+        first_version, second_version = versions
+        assert first_version.is_original and not second_version.is_original
+        assert second_version.segments == first_version.segments + [second_version.location]
+        assert services.company.get_by_id(user.company_id).current_datasource.upload_code == 'second'
+
+    def test_confirming_an_upload_twice_starts_a_single_ingestion(self):
+        user = services.user.get_by_email(self.USER_EMAIL)
+        company_configuration = services.company.get_by_id(user.company_id).current_configuration
+        interpreter = services.company.get_datasource_interpreter(company_configuration)
+        dataframe, errors = interpreter.from_csv_to_dataframe(os.path.join(HERE, '../resources/test_data.csv'))
+        assert not errors
+        upload_code = 'confirmed_upload'
+        services.ingestion.stage_dataframe(dataframe, upload_code)
+
+        self.login()
+        for _ in range(2):
+            resp = self.client.post(
+                url_for('customer.datasource_confirm'),
+                data={'upload_code': upload_code},
+                headers={'Accept': 'application/json'}
+            )
+            assert resp.status_code == 202
+            assert resp.json['upload_code'] == upload_code
+
+        assert self.wait_for_ingestion(upload_code) == TaskStatusTypes.successful.value
+
     def test_user_can_delete_a_datasource(self):
         self.login()
         with open(os.path.join(HERE, '../resources/test_data.csv'), 'rb') as test_upload_file:
@@ -193,6 +257,7 @@ class TestDataSourceUpload(BaseTestClass):
             assert resp.status_code == 302  # in order to redirect to the dashboard
             assert resp.json
             original_upload_code = resp.json['upload_code']
+            assert self.wait_for_ingestion(original_upload_code) == TaskStatusTypes.successful.value
 
         with open(os.path.join(HERE, '../resources/test_data.csv'), 'rb') as test_upload_file:
             resp = self.client.post(
@@ -204,6 +269,11 @@ class TestDataSourceUpload(BaseTestClass):
             assert resp.status_code == 302  # in order to redirect to the dashboard
             assert resp.json
             second_upload_code = resp.json['upload_code']
+            assert self.wait_for_ingestion(second_upload_code) == TaskStatusTypes.successful.value
+
+        # the latest version is the current datasource
+        resp = self.client.get(url_for('datasource.current'), headers={'Accept': 'application/json'})
+        assert resp.json['upload_code'] == second_upload_code
 
         # users can't delete the original data source
         resp = self.client.post(
@@ -231,3 +301,7 @@ class TestDataSourceUpload(BaseTestClass):
         )
 
         assert resp.status_code == 302
+
+        # and the previous version becomes the current datasource again
+        resp = self.client.get(url_for('datasource.current'), headers={'Accept': 'application/json'})
+        assert resp.json['upload_code'] == original_upload_code
@@ -6,6 +6,7 @@ import time
 from flask import url_for
 
 from app import services, interpreters
+from app.entities import TaskStatusTypes
 from app.interpreters.prediction import metacrocubot_prediction_interpreter
 from test.functional.base_test_class import BaseTestClass
 
@@ -35,9 +36,10 @@ class TestPredictionAPI(BaseTestClass):
                 data={'upload': (test_upload_file, 'test_stock_standardised.csv')},
             )
 
-            assert resp.status_code == 201
+            assert resp.status_code == 202
             upload_code = resp.json['upload_code']
             assert upload_code
+            assert self.wait_for_ingestion(upload_code) == TaskStatusTypes.successful.value
 
         resp = self.client.post(
             url_for('prediction.submit'),
@@ -96,6 +98,8 @@ class TestPredictionAPI(BaseTestClass):
         )
 
         assert len(resp.json['statuses']) == 5  # must have queued, started, 2 in progress, and successful
+        assert resp.json['started_at'] and resp.json['finished_at']
+        assert resp.json['started_at'] <= resp.json['finished_at']
 
         # check the result
         resp = self.client.get(
@@ -144,10 +148,11 @@ class TestPredictionAPI(BaseTestClass):
                 data={'upload': (test_upload_file, 'test_stock_standardised.csv')},
             )
 
-            assert resp.status_code == 201
+            assert resp.status_code == 202
             upload_code = resp.json['upload_code']
-            company_id = resp.json['company_id']
             assert upload_code
+            assert self.wait_for_ingestion(upload_code) == TaskStatusTypes.successful.value
+            company_id = services.datasource.get_by_upload_code(upload_code).company_id
         self.logout()
 
         company_configuration = services.company.get_configuration_for_company_id(company_id)
@@ -180,3 +185,253 @@ class TestPredictionAPI(BaseTestClass):
         )
 
         interpreted_prediction = metacrocubot_prediction_interpreter(prediction)
+
+    def test_predict_a_batch_of_windows(self):
+        self.login()
+
+        with open(os.path.join(HERE, '../resources/test_stock_standardised.csv'), 'rb') as test_upload_file:
+            resp = self.client.post(
+                url_for('datasource.upload'),
+                content_type='multipart/form-data',
+                data={'upload': (test_upload_file, 'test_stock_standardised.csv')},
+            )
+            assert resp.status_code == 202
+            assert self.wait_for_ingestion(resp.json['upload_code']) == TaskStatusTypes.successful.value
+
+        resp = self.client.post(
+            url_for('prediction.submit_batch'),
+            content_type='application/json',
+            data=json.dumps({
+                "name": "TESTBATCH",
+                "windows": [
+                    {"start_time": "2017-09-28T00:00:00", "end_time": "2017-10-28T00:00:00"},
+                    {"start_time": "2017-09-29T00:00:00", "end_time": "2017-10-29T00:00:00"},
+                    {"start_time": "2017-09-29T00:00:00", "end_time": "2017-10-15T00:00:00"},
+                ]
+            }),
+            headers={'Authorization': self.token}
+        )
+        assert resp.status_code == 200
+        assert len(resp.json['tasks']) == 3
+        batch_code = resp.json['batch_code']
+
+        tasks = self.client.get(url_for('prediction.get_batch', batch_code=batch_code)).json['tasks']
+        while not all(task['is_completed'] for task in tasks):
+            time.sleep(2)
+            tasks = self.client.get(url_for('prediction.get_batch', batch_code=batch_code)).json['tasks']
+
+        assert [task['status'] for task in tasks] == [TaskStatusTypes.successful.value] * 3
+        for task in tasks:
+            resp = self.client.get(url_for('prediction.result', task_code=task['task_code']))
+            assert resp.status_code == 200
+            assert resp.json['result']
+
+    def test_identical_predictions_are_coalesced(self):
+        self.login()
+
+        with open(os.path.join(HERE, '../resources/test_stock_standardised.csv'), 'rb') as test_upload_file:
+            resp = self.client.post(
+                url_for('datasource.upload'),
+                content_type='multipart/form-data',
+                data={'upload': (test_upload_file, 'test_stock_standardised.csv')},
+            )
+            assert resp.status_code == 202
+            assert self.wait_for_ingestion(resp.json['upload_code']) == TaskStatusTypes.successful.value
+
+        task_codes = []
+        for name in ['TESTPREDICTION', 'TESTPREDICTION-RETRY']:
+            resp = self.client.post(
+                url_for('prediction.submit'),
+                content_type='application/json',
+                data=json.dumps({
+                    "name": name,
+                    "start_time": "2017-09-29T00:00:00",
+                    "end_time": "2017-10-29T00:00:00"
+                }),
+                headers={'Authorization': self.token}
+            )
+            assert resp.status_code == 200
+            task_codes.append(resp.json['task_code'])
+
+        tasks = [self.client.get(url_for('prediction.get_single_task', task_code=code)).json for code in task_codes]
+        assert tasks[1]['leader_task_code'] == task_codes[0]
+        while not all(task['is_completed'] for task in tasks):
+            time.sleep(2)
+            tasks = [self.client.get(url_for('prediction.get_single_task', task_code=code)).json for code in task_codes]
+
+        assert [task['status'] for task in tasks] == [TaskStatusTypes.successful.value] * 2
+        results = [self.client.get(url_for('prediction.result', task_code=code)).json['result'] for code in task_codes]
+        assert results[0] == results[1]
+
+    def test_lost_predictions_are_failed_with_their_followers(self):
+        self.login()
+
+        with open(os.path.join(HERE, '../resources/test_stock_standardised.csv'), 'rb') as test_upload_file:
+            resp = self.client.post(
+                url_for('datasource.upload'),
+                content_type='multipart/form-data',
+                data={'upload': (test_upload_file, 'test_stock_standardised.csv')},
+            )
+            assert resp.status_code == 202
+            upload_code = resp.json['upload_code']
+            assert self.wait_for_ingestion(upload_code) == TaskStatusTypes.successful.value
+
+        user = services.user.get_by_email(self.USER_EMAIL)
+        datasource = services.datasource.get_by_upload_code(upload_code)
+        task_codes = [services.prediction.generate_task_code() for _ in range(2)]
+        for task_code in task_codes:
+            task = services.prediction.create_prediction_task(
+                'TESTPREDICTION', task_code, user.company_id, user.id, datasource.id
+            )
+            services.prediction.set_task_status(task, TaskStatusTypes.queued)
+
+        # the first task was sent to a worker which was killed, the second one waits for it
+        leader, follower = [services.prediction.get_task_by_code(task_code)._model for task_code in task_codes]
+        leader.update(dispatched_at=datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=1))
+        follower.update(leader_task_code=leader.task_code)
+
+        services.prediction.fail_timed_out_tasks()
+
+        for task_code in task_codes:
+            task = self.client.get(url_for('prediction.get_single_task', task_code=task_code)).json
+            assert task['status'] == TaskStatusTypes.failed.value
+
+    def test_successful_predictions_are_reused_unless_forced(self):
+        self.login()
+
+        with open(os.path.join(HERE, '../resources/test_stock_standardised.csv'), 'rb') as test_upload_file:
+            resp = self.client.post(
+                url_for('datasource.upload'),
+                content_type='multipart/form-data',
+                data={'upload': (test_upload_file, 'test_stock_standardised.csv')},
+            )
+            assert resp.status_code == 202
+            assert self.wait_for_ingestion(resp.json['upload_code']) == TaskStatusTypes.successful.value
+
+        prediction_request = {
+            "name": "TESTPREDICTION",
+            "start_time": "2017-09-29T00:00:00",
+            "end_time": "2017-10-29T00:00:00"
+        }
+        task_codes = []
+        for request in [prediction_request, dict(prediction_request, name='AGAIN'), dict(prediction_request, force=True)]:
+            resp = self.client.post(
+                url_for('prediction.submit'),
+                content_type='application/json',
+                data=json.dumps(request),
+                headers={'Authorization': self.token}
+            )
+            assert resp.status_code == 200
+            task_code = resp.json['task_code']
+            task = self.client.get(url_for('prediction.get_single_task', task_code=task_code)).json
+            while not task['is_completed']:
+                time.sleep(2)
+                task = self.client.get(url_for('prediction.get_single_task', task_code=task_code)).json
+            assert task['status'] == TaskStatusTypes.successful.value
+            task_codes.append(task_code)
+
+        statuses = [
+            len(self.client.get(url_for('prediction.get_single_task', task_code=code)).json['statuses'])
+            for code in task_codes
+        ]
+        # queued and successful: the second prediction didn't run
+        assert statuses[1] == 2
+        assert statuses[0] > 2 and statuses[2] > 2
+        results = [self.client.get(url_for('prediction.result', task_code=code)).json['result'] for code in task_codes]
+        assert results[0] == results[1]
+
+    def test_task_statuses_are_pushed(self):
+        self.login()
+
+        with open(os.path.join(HERE, '../resources/test_stock_standardised.csv'), 'rb') as test_upload_file:
+            resp = self.client.post(
+                url_for('datasource.upload'),
+                content_type='multipart/form-data',
+                data={'upload': (test_upload_file, 'test_stock_standardised.csv')},
+            )
+            assert resp.status_code == 202
+            assert self.wait_for_ingestion(resp.json['upload_code']) == TaskStatusTypes.successful.value
+
+        resp = self.client.post(
+            url_for('prediction.submit'),
+            content_type='application/json',
+            data=json.dumps({
+                "name": "TESTPREDICTION",
+                "start_time": "2017-09-29T00:00:00",
+                "end_time": "2017-10-29T00:00:00"
+            }),
+            headers={'Authorization': self.token}
+        )
+        task_code = resp.json['task_code']
+
+        # long polling: every response comes with a new status, or once the task is completed
+        task = self.client.get(url_for('prediction.get_single_task', task_code=task_code, wait=30)).json
+        while not task['is_completed']:
+            task = self.client.get(url_for('prediction.get_single_task', task_code=task_code, wait=30)).json
+        assert task['status'] == TaskStatusTypes.successful.value
+
+        resp = self.client.get(url_for('prediction.stream_task_events', task_code=task_code))
+        assert resp.mimetype == 'text/event-stream'
+        events = [
+            json.loads(line[len('data: '):]) for line in resp.data.decode().splitlines() if line.startswith('data: ')
+        ]
+        assert [event['state'] for event in events] == [status['state'] for status in task['statuses']]
+        assert events[-1]['result'] == url_for('prediction.result', task_code=task_code, _external=True)
+
+        resp = self.client.get(
+            url_for('prediction.stream_task_events', task_code=task_code),
+            headers={'Last-Event-ID': str(events[-2]['id'])}
+        )
+        assert resp.data.decode().count('event: status') == 1
+
+    def test_statuses_of_many_tasks(self):
+        self.login()
+
+        with open(os.path.join(HERE, '../resources/test_stock_standardised.csv'), 'rb') as test_upload_file:
+            resp = self.client.post(
+                url_for('datasource.upload'),
+                content_type='multipart/form-data',
+                data={'upload': (test_upload_file, 'test_stock_standardised.csv')},
+            )
+            assert resp.status_code == 202
+            assert self.wait_for_ingestion(resp.json['upload_code']) == TaskStatusTypes.successful.value
+
+        resp = self.client.post(
+            url_for('prediction.submit'),
+            content_type='application/json',
+            data=json.dumps({
+                "name": "TESTPREDICTION",
+                "start_time": "2017-09-29T00:00:00",
+                "end_time": "2017-10-29T00:00:00"
+            }),
+            headers={'Authorization': self.token}
+        )
+        task_code = resp.json['task_code']
+
+        resp = self.client.post(
+            url_for('prediction.get_statuses'),
+            content_type='application/json',
+            data=json.dumps({'task_codes': []}),
+            headers={'Authorization': self.token}
+        )
+        assert resp.status_code == 400
+
+        tasks = []
+        while not tasks or not tasks[0]['is_completed']:
+            resp = self.client.post(
+                url_for('prediction.get_statuses'),
+                content_type='application/json',
+                data=json.dumps({'task_codes': [task_code, 'unknown', task_code]}),
+                headers={'Authorization': self.token}
+            )
+            assert resp.status_code == 200
+            assert resp.json['not_found'] == ['unknown']
+            tasks = resp.json['tasks']
+            time.sleep(2)
+
+        assert tasks == [{
+            'task_code': task_code,
+            'status': TaskStatusTypes.successful.value,
+            'is_completed': True,
+            'result': url_for('prediction.result', task_code=task_code, _external=True),
+        }]
@@ -133,9 +133,10 @@ class TestTriggerTaskOnUpload(BaseTestClass):
                 data={'upload': (test_upload_file, 'test_stock_standardised.csv')},
             )
 
-            assert resp.status_code == 201
+            assert resp.status_code == 202
             upload_code = resp.json['upload_code']
             assert upload_code
+            assert self.wait_for_ingestion(upload_code) == TaskStatusTypes.successful.value
 
         time.sleep(3)
 
@@ -0,0 +1,113 @@
+import json
+import os
+import time
+
+from flask import url_for
+
+from app.entities import TaskStatusTypes
+from test.functional.base_test_class import BaseTestClass
+
+HERE = os.path.join(os.path.dirname(__file__))
+
+
+class TestTrainingAPI(BaseTestClass):
+    TESTING = True
+
+    def setUp(self):
+        super().setUp()
+        self.create_superuser()
+        self.login_superuser()
+        self.register_company()
+        self.register_user()
+        self.set_company_configuration()
+        self.logout()
+
+    def wait_for_task(self, endpoint, task_code):
+        resp = self.client.get(url_for(endpoint, task_code=task_code))
+        task_status = resp.json['status']
+        while task_status not in ['SUCCESSFUL', 'FAILED']:
+            time.sleep(2)
+            resp = self.client.get(url_for(endpoint, task_code=task_code))
+            task_status = resp.json['status']
+        return resp.json
+
+    def test_training_goes_through_its_statuses(self):
+        self.login()
+
+        with open(os.path.join(HERE, '../resources/test_stock_standardised.csv'), 'rb') as test_upload_file:
+            resp = self.client.post(
+                url_for('datasource.upload'),
+                content_type='multipart/form-data',
+                data={'upload': (test_upload_file, 'test_stock_standardised.csv')},
+            )
+            assert resp.status_code == 202
+            assert self.wait_for_ingestion(resp.json['upload_code']) == TaskStatusTypes.successful.value
+
+        resp = self.client.post(
+            url_for('training.submit'),
+            content_type='application/json',
+            data=json.dumps({"start_time": "2017-09-29T00:00:00"}),
+            headers={'Authorization': self.token}
+        )
+        assert resp.status_code == 202
+        training_task = self.wait_for_task('training.get_single_task', resp.json['task_code'])
+
+        assert [status['state'] for status in training_task['statuses']] == [
+            TaskStatusTypes.queued.value,
+            TaskStatusTypes.started.value,
+            TaskStatusTypes.in_progress.value,
+            TaskStatusTypes.successful.value,
+        ]
+        assert training_task['status'] == TaskStatusTypes.successful.value
+
+    def test_predict_with_the_latest_training(self):
+        self.login()
+
+        with open(os.path.join(HERE, '../resources/test_stock_standardised.csv'), 'rb') as test_upload_file:
+            resp = self.client.post(
+                url_for('datasource.upload'),
+                content_type='multipart/form-data',
+                data={'upload': (test_upload_file, 'test_stock_standardised.csv')},
+            )
+            assert resp.status_code == 202
+            assert self.wait_for_ingestion(resp.json['upload_code']) == TaskStatusTypes.successful.value
+
+        # there's nothing to predict with yet
+        prediction_request = {
+            "name": "TESTPREDICTION",
+            "start_time": "2017-09-29T00:00:00",
+            "end_time": "2017-01-02T00:00:00",
+            "use_latest_training": True
+        }
+        resp = self.client.post(
+            url_for('prediction.submit'),
+            content_type='application/json',
+            data=json.dumps(prediction_request),
+            headers={'Authorization': self.token}
+        )
+        assert resp.status_code == 400
+
+        resp = self.client.post(
+            url_for('training.submit'),
+            content_type='application/json',
+            data=json.dumps({"start_time": "2017-09-29T00:00:00"}),
+            headers={'Authorization': self.token}
+        )
+        assert resp.status_code == 202
+        training_task = self.wait_for_task('training.get_single_task', resp.json['task_code'])
+        assert training_task['status'] == TaskStatusTypes.successful.value
+        assert training_task['model_key']
+
+        for _ in range(2):
+            # forced, or the second prediction would get the result of the first one
+            resp = self.client.post(
+                url_for('prediction.submit'),
+                content_type='application/json',
+                data=json.dumps(dict(prediction_request, force=True)),
+                headers={'Authorization': self.token}
+            )
+            assert resp.status_code == 200
+            prediction_task = self.wait_for_task('prediction.get_single_task', resp.json['task_code'])
+            assert prediction_task['status'] == TaskStatusTypes.successful.value
+            # queued, started, prediction in progress and successful: no training
+            assert len(prediction_task['statuses']) == 4
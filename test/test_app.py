@@ -2,5 +2,19 @@ from app import create_app, make_celery
 
 APP = create_app('config')
 celery = make_celery(APP)
-from app.tasks.predict import training_and_prediction_task
-celery.tasks.register(training_and_prediction_task)
+from app.tasks.predict import (
+    prepare_prediction_task, train_prediction_task, predict_prediction_task, store_prediction_task
+)
+celery.tasks.register(prepare_prediction_task)
+celery.tasks.register(train_prediction_task)
+celery.tasks.register(predict_prediction_task)
+celery.tasks.register(store_prediction_task)
+from app.tasks.train import training_task
+celery.tasks.register(training_task)
+from app.tasks.ingest import ingestion_task
+celery.tasks.register(ingestion_task)
+from app.tasks.backtest import backtest_task, store_backtest_task
+celery.tasks.register(backtest_task)
+celery.tasks.register(store_backtest_task)
+from app.tasks.sweep import sweep_timed_out_tasks
+celery.tasks.register(sweep_timed_out_tasks)
@@ -0,0 +1,70 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.backtest import get_cutoffs, split_cutoffs, score_prediction, compute_metrics, compute_metrics_by_cutoff
+
+
+def make_actuals():
+    index = pd.DatetimeIndex([pd.Timestamp('2018-01-01 07:00') + pd.Timedelta(days=day) for day in range(10)])
+    return pd.DataFrame({
+        'AAPL': np.arange(10, dtype='float32'),
+        'MSFT': np.arange(10, dtype='float32') * 10,
+    }, index=index)
+
+
+def make_datapoints(day, values):
+    return [{
+        'timestamp': f'2018-01-{day:02d} 07:00:00+00:00',
+        'prediction': [
+            {'symbol': symbol, 'value': value, 'lower': value - 1, 'upper': value + 1}
+            for symbol, value in values.items()
+        ]
+    }]
+
+
+def test_cutoffs_are_dealt_out_between_the_chunks():
+    cutoffs = get_cutoffs(datetime.date(2018, 1, 1), datetime.date(2018, 1, 29), 7)
+
+    assert cutoffs == [datetime.date(2018, 1, day) for day in (1, 8, 15, 22, 29)]
+    assert split_cutoffs(cutoffs, 2) == [cutoffs[0::2], cutoffs[1::2]]
+    assert split_cutoffs(cutoffs[:1], 4) == [cutoffs[:1]]
+
+
+def test_predictions_are_scored_against_the_actuals():
+    cutoff = datetime.date(2018, 1, 2)
+    scores = score_prediction(cutoff, make_datapoints(3, {'AAPL': 2.5, 'MSFT': 20.0, 'GOOG': 1.0}), make_actuals())
+
+    assert list(scores['actual'][:2]) == [2.0, 20.0]
+    assert np.isnan(scores['actual'][2])
+
+    metrics = compute_metrics(scores)
+    assert metrics['count'] == 2
+    assert metrics['missing_actuals'] == 1
+    assert metrics['mae'] == pytest.approx(0.25)
+    assert metrics['rmse'] == pytest.approx(np.sqrt(0.125))
+    assert metrics['bias'] == pytest.approx(0.25)
+    assert metrics['coverage'] == 1.0
+
+
+def test_predictions_are_matched_to_the_nearest_actual_within_the_tolerance():
+    datapoints = make_datapoints(3, {'AAPL': 2.0})
+    datapoints[0]['timestamp'] = '2018-01-03 09:00:00+00:00'
+
+    assert np.isnan(score_prediction(datetime.date(2018, 1, 2), datapoints, make_actuals())['actual'][0])
+    scores = score_prediction(datetime.date(2018, 1, 2), datapoints, make_actuals(), pd.Timedelta(days=1))
+    assert scores['actual'][0] == 2.0
+
+
+def test_metrics_are_computed_for_every_cutoff():
+    scores = pd.concat([
+        score_prediction(datetime.date(2018, 1, 2), make_datapoints(3, {'AAPL': 3.0}), make_actuals()),
+        score_prediction(datetime.date(2018, 1, 9), make_datapoints(11, {'AAPL': 20.0}), make_actuals()),
+    ], ignore_index=True)
+
+    by_cutoff = compute_metrics_by_cutoff(scores)
+    assert [metrics['cutoff'] for metrics in by_cutoff] == ['2018-01-02', '2018-01-09']
+    assert [metrics['mae'] for metrics in by_cutoff] == [1.0, None]
+    assert by_cutoff[1]['missing_actuals'] == 1
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.core.cache import DataDictCache
+from app.interpreters.datasource import GymDataSourceInterpreter
+
+HERE = os.path.join(os.path.dirname(__file__))
+
+
+def _data_dict():
+    interpreter = GymDataSourceInterpreter()
+    dataframe, _ = interpreter.from_csv_to_dataframe(os.path.join(HERE, '../resources/test_data.csv'))
+    return interpreter.from_dataframe_to_data_dict(dataframe)
+
+
+def test_cached_data_dict_is_loaded_back(tmpdir):
+    cache = DataDictCache(str(tmpdir), max_size=1024 ** 3)
+    key = cache.make_key('upload_code', GymDataSourceInterpreter())
+    data_dict = _data_dict()
+
+    assert cache.get(key) is None
+    cache.set(key, data_dict)
+    cached_data_dict = cache.get(key)
+
+    assert list(cached_data_dict) == list(data_dict)
+    for feature, dataframe in data_dict.items():
+        pd.testing.assert_frame_equal(cached_data_dict[feature], dataframe)
+
+    cache.discard('upload_code')
+    assert cache.get(key) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmpdir):
+    data_dict = _data_dict()
+    cache = DataDictCache(str(tmpdir), max_size=1024 ** 3)
+    cache.set('first', data_dict)
+    entry_size = sum(entry.stat().st_size for entry in os.scandir(os.path.join(str(tmpdir), 'first')))
+
+    cache.max_size = 2 * entry_size
+    os.utime(os.path.join(str(tmpdir), 'first'), (0, 0))
+    cache.set('second', data_dict)
+    os.utime(os.path.join(str(tmpdir), 'second'), (1, 1))
+    cache.get('first')
+    cache.set('third', data_dict)
+
+    assert cache.get('first') is not None
+    assert cache.get('second') is None
+    assert cache.get('third') is not None
+
+
+def test_cached_panels_are_views_over_the_mapped_cube(tmpdir):
+    index = pd.DatetimeIndex(
+        ['2018-01-01 07:00', '2018-01-02 07:00', '2018-01-03 07:00', '2018-01-04 07:00'], tz='UTC', name='DateStamps'
+    )
+    columns = pd.Index(['AAA', 'BBB', 'CCC'], name='Ticker')
+    data_dict = {
+        'Returns': pd.DataFrame(np.arange(12, dtype='float32').reshape(4, 3), index=index, columns=columns),
+        'Shares': pd.DataFrame(np.arange(12, dtype='float64').reshape(4, 3), index=index, columns=columns),
+        'Specific Risk': pd.DataFrame(np.ones((4, 3), dtype='float32'), index=index, columns=columns),
+    }
+    cache = DataDictCache(str(tmpdir), max_size=1024 ** 3)
+    cache.set('upload_code_StockDataSourceInterpreter', data_dict)
+
+    cached_data_dict = cache.get('upload_code_StockDataSourceInterpreter')
+
+    for feature, dataframe in data_dict.items():
+        pd.testing.assert_frame_equal(cached_data_dict[feature], dataframe)
+    location = os.path.join(str(tmpdir), 'upload_code_StockDataSourceInterpreter')
+    assert np.load(os.path.join(location, 'float32.npy'), mmap_mode='r').shape == (4, 3, 2)
+    assert _mapped_filename(cached_data_dict['Specific Risk'].to_numpy()) == os.path.join(location, 'float32.npy')
+
+
+def _mapped_filename(array):
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return array.filename
+        array = getattr(array, 'base', None)
@@ -0,0 +1,62 @@
+import os
+
+import pandas as pd
+
+from app.interpreters.datasource import GymDataSourceInterpreter
+
+HERE = os.path.join(os.path.dirname(__file__))
+
+
+class SmallChunksGymDataSourceInterpreter(GymDataSourceInterpreter):
+    CHUNK_SIZE = 5
+
+
+def test_chunked_parsing_returns_the_whole_file():
+    csv_path = os.path.join(HERE, '../resources/test_data.csv')
+    dataframe, errors = SmallChunksGymDataSourceInterpreter().from_csv_to_dataframe(csv_path)
+
+    assert not errors
+    assert len(dataframe) == 17
+    assert list(dataframe.columns) == GymDataSourceInterpreter.COLUMNS
+    pd.testing.assert_frame_equal(
+        dataframe, pd.read_csv(csv_path, index_col='date', parse_dates=True, dtype=GymDataSourceInterpreter.DTYPES)
+    )
+    assert dataframe['is_weekend'].dtype == 'int8'
+    assert dataframe['temperature'].dtype == 'float32'
+
+
+def test_chunked_parsing_stops_at_the_first_invalid_chunk(tmpdir):
+    csv_path = os.path.join(HERE, '../resources/test_data.csv')
+    dataframe = pd.read_csv(csv_path)
+    dataframe.loc[7, 'date'] = '2999-01-01 17:00:11-07:00'
+    invalid_csv_path = str(tmpdir.join('future_data.csv'))
+    dataframe.to_csv(invalid_csv_path, index=False)
+
+    interpreter = SmallChunksGymDataSourceInterpreter()
+    chunks = list(interpreter.iter_csv_chunks(invalid_csv_path))
+
+    assert len(chunks) == 1
+    assert interpreter.errors == ['Contains data in the future!']
+
+
+class SmallChunksTickerDataSourceInterpreter(GymDataSourceInterpreter):
+    COLUMNS = ['Ticker', 'Returns']
+    INDEX_COLUMN = 'DateStamps'
+    ENTITY_COLUMN = 'Ticker'
+    DTYPES = {'Ticker': 'category', 'Returns': 'float32'}
+    CHUNK_SIZE = 2
+
+
+def test_categorical_columns_survive_chunked_parsing(tmpdir):
+    csv_path = str(tmpdir.join('tickers.csv'))
+    pd.DataFrame({
+        'DateStamps': ['2017-01-02', '2017-01-02', '2017-01-03', '2017-01-03', '2017-01-04'],
+        'Ticker': ['AAPL', 'MSFT', 'AAPL', 'GOOG', 'MSFT'],
+        'Returns': [0.1, 0.2, 0.3, 0.4, 0.5],
+    }).to_csv(csv_path, index=False)
+
+    dataframe, errors = SmallChunksTickerDataSourceInterpreter().from_csv_to_dataframe(csv_path)
+
+    assert not errors
+    assert dataframe['Ticker'].dtype == 'category'
+    assert sorted(dataframe['Ticker'].cat.categories) == ['AAPL', 'GOOG', 'MSFT']
@@ -0,0 +1,73 @@
+import os
+
+import pandas as pd
+
+from app.core.merge import RowIndex, merge_upload, content_hash
+from app.core.storage import HDF5SegmentStorage, read_segments
+from app.interpreters.datasource import GymDataSourceInterpreter
+
+HERE = os.path.join(os.path.dirname(__file__))
+
+
+def test_only_new_and_changed_rows_are_merged(tmpdir):
+    dataframe, _ = GymDataSourceInterpreter().from_csv_to_dataframe(os.path.join(HERE, '../resources/test_data.csv'))
+    row_index = RowIndex(str(tmpdir.join('index.hdf5')))
+    row_index.append(dataframe.iloc[:10], None, 'first_upload')
+
+    upload = dataframe.iloc[5:].copy()
+    upload.iloc[1, upload.columns.get_loc('number_people')] += 1
+
+    merge = merge_upload(upload, None, row_index)
+
+    assert row_index.upload_code == 'first_upload'
+    assert (merge.new, merge.changed, merge.unchanged) == (len(dataframe) - 10, 1, 4)
+    pd.testing.assert_frame_equal(merge.delta, pd.concat([upload.iloc[1:2], upload.iloc[5:]]))
+
+    base_segment = str(tmpdir.join('base.hdf5'))
+    delta_segment = str(tmpdir.join('delta.hdf5'))
+    HDF5SegmentStorage().write(dataframe.iloc[:10], base_segment)
+    HDF5SegmentStorage().write(merge.delta, delta_segment)
+
+    merged_dataframe = read_segments([base_segment, delta_segment])
+
+    assert len(merged_dataframe) == len(dataframe)
+    assert merged_dataframe['number_people'].iloc[6] == dataframe['number_people'].iloc[6] + 1
+
+
+def test_rows_are_keyed_on_the_entity_column(tmpdir):
+    index = pd.DatetimeIndex(['2018-01-01', '2018-01-01', '2018-01-02'], name='date')
+    dataframe = pd.DataFrame({'Ticker': ['AAPL', 'MSFT', 'AAPL'], 'close': [1.0, 2.0, 3.0]}, index=index)
+    row_index = RowIndex(str(tmpdir.join('index.hdf5')))
+    row_index.append(dataframe, 'Ticker', 'first_upload')
+
+    upload = pd.DataFrame(
+        {'Ticker': ['MSFT', 'GOOG', 'GOOG'], 'close': [2.5, 4.0, 5.0]},
+        index=pd.DatetimeIndex(['2018-01-01', '2018-01-02', '2018-01-02'], name='date')
+    )
+    merge = merge_upload(upload, 'Ticker', row_index)
+
+    assert (merge.new, merge.changed, merge.unchanged) == (1, 1, 0)
+    assert merge.delta['close'].tolist() == [2.5, 5.0]
+
+
+def test_versions_with_the_same_content_have_the_same_hash():
+    index = pd.DatetimeIndex(['2018-01-01', '2018-01-01', '2018-01-02'], name='date')
+    dataframe = pd.DataFrame({'Ticker': ['AAPL', 'MSFT', 'AAPL'], 'close': [1.0, 2.0, 3.0]}, index=index)
+    first_hash = content_hash(dataframe)
+
+    assert content_hash(dataframe.copy()) == first_hash
+    assert content_hash(dataframe.iloc[:0], first_hash) == first_hash
+
+    changed = dataframe.copy()
+    changed.iloc[0, changed.columns.get_loc('close')] = 1.5
+    assert content_hash(changed) != first_hash
+    assert content_hash(dataframe.iloc[2:], content_hash(dataframe.iloc[:2])) != first_hash
+
+
+def test_uploads_on_different_versions_without_a_hash_have_different_hashes():
+    index = pd.DatetimeIndex(['2018-01-01', '2018-01-02'], name='date')
+    delta = pd.DataFrame({'Ticker': ['AAPL', 'AAPL'], 'close': [1.0, 2.0]}, index=index)
+
+    # versions created before the hashes are chained by their upload code
+    assert content_hash(delta, 'first_upload_code') != content_hash(delta, 'second_upload_code')
+    assert content_hash(delta.iloc[:0], 'first_upload_code') == 'first_upload_code'
@@ -0,0 +1,46 @@
+import datetime
+import os
+from types import SimpleNamespace
+
+from app.core.registry import ModelRegistry
+from app.services import oracle as oracle_service
+
+CONFIGURATION = {
+    'oracle_class': 'test.unit.test_oracle.SavingOracle',
+    'calendar_name': 'NYSE',
+    'scheduling': {},
+    'oracle': {'model': {'model_save_path': '/tmp/crocubot', 'n_epochs': 1}},
+}
+
+
+class SavingOracle:
+
+    def __init__(self, calendar_name, scheduling_configuration, oracle_configuration):
+        self.model_save_path = oracle_configuration['model']['model_save_path']
+
+    def train(self, data, current_timestamp):
+        pass
+
+    def save(self):
+        with open(os.path.join(self.model_save_path, 'model.ckpt'), 'wb') as model_file:
+            model_file.write(b'0')
+
+    def load(self):
+        if not os.path.exists(os.path.join(self.model_save_path, 'model.ckpt')):
+            raise FileNotFoundError(self.model_save_path)
+
+
+def test_trained_models_are_saved_in_their_registry_entry(tmpdir, monkeypatch):
+    registry = ModelRegistry(str(tmpdir), max_size=1024)
+    monkeypatch.setattr(oracle_service, 'get_model_registry', lambda: registry)
+    company_configuration = SimpleNamespace(configuration=CONFIGURATION)
+    prediction_request = {'start_time': datetime.datetime(2018, 4, 20)}
+    model_key = oracle_service.get_model_key(company_configuration, 'upload_code', prediction_request)
+
+    oracle_service.train_and_register(company_configuration, model_key, prediction_request, data_dict={})
+
+    location = registry.get(model_key)
+    assert os.path.exists(os.path.join(location, 'model.ckpt'))
+    assert oracle_service.load_trained_oracle(company_configuration, model_key).model_save_path == location
+    # the configuration of the company is left as it is
+    assert CONFIGURATION['oracle']['model']['model_save_path'] == '/tmp/crocubot'
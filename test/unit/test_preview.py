@@ -0,0 +1,37 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.core.merge import deduplicate
+from app.core.preview import build_preview, update_preview
+from app.interpreters.datasource import GymDataSourceInterpreter
+
+HERE = os.path.join(os.path.dirname(__file__))
+
+
+def test_updated_preview_matches_the_preview_of_the_merged_data():
+    dataframe, _ = GymDataSourceInterpreter().from_csv_to_dataframe(os.path.join(HERE, '../resources/test_data.csv'))
+    base = dataframe.iloc[:10]
+    upload = dataframe.iloc[5:].copy()
+    # overwrite the rows holding the highest temperature, so that the maximum must be recomputed
+    upload.loc[upload['temperature'] >= base['temperature'].max(), 'temperature'] = base['temperature'].min()
+    merged = deduplicate(pd.concat([base, upload])).sort_index()
+
+    start_date, end_date = upload.index.min(), upload.index.max()
+    preview = update_preview(
+        build_preview(base),
+        removed_rows=base.loc[start_date:end_date],
+        added_rows=merged.loc[start_date:end_date],
+        entity_column=None,
+        read_column=lambda column: merged[column]
+    )
+
+    expected_preview = build_preview(merged)
+    assert preview['row_count'] == expected_preview['row_count']
+    assert preview['start_date'] == expected_preview['start_date']
+    assert preview['end_date'] == expected_preview['end_date']
+    assert preview['head'] == expected_preview['head']
+    assert preview['tail'] == expected_preview['tail']
+    for column, statistics in expected_preview['statistics'].items():
+        assert preview['statistics'][column] == pytest.approx(statistics), column
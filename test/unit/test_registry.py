@@ -0,0 +1,35 @@
+import datetime
+import os
+
+from app.core.registry import ModelRegistry
+
+CONFIGURATION = {'oracle_class': 'alphai_crocubot_oracle.oracle.CrocubotOracle', 'oracle': {'n_epochs': 10}}
+
+
+def test_model_key_depends_on_configuration_version_and_cutoff():
+    cutoff = datetime.date(2018, 4, 20)
+    key = ModelRegistry.make_key(CONFIGURATION, 'upload_code', cutoff)
+
+    assert key == ModelRegistry.make_key(dict(reversed(list(CONFIGURATION.items()))), 'upload_code', cutoff)
+    assert key != ModelRegistry.make_key(dict(CONFIGURATION, oracle={'n_epochs': 20}), 'upload_code', cutoff)
+    assert key != ModelRegistry.make_key(CONFIGURATION, 'other_upload_code', cutoff)
+    assert key != ModelRegistry.make_key(CONFIGURATION, 'upload_code', datetime.date(2018, 4, 21))
+
+
+def test_registered_models_are_evicted_when_the_registry_is_full(tmpdir):
+    registry = ModelRegistry(str(tmpdir), max_size=1024)
+    cutoff = datetime.date(2018, 4, 20)
+
+    for upload_code in ['first', 'second']:
+        location = registry.reserve()
+        with open(os.path.join(location, 'model.ckpt'), 'wb') as model_file:
+            model_file.write(b'0' * 600)
+        registry.register(location, ModelRegistry.make_key(CONFIGURATION, upload_code, cutoff))
+        os.utime(os.path.join(str(tmpdir), ModelRegistry.make_key(CONFIGURATION, upload_code, cutoff)), (0, 0))
+
+    assert registry.get(ModelRegistry.make_key(CONFIGURATION, 'first', cutoff)) is None
+    location = registry.get(ModelRegistry.make_key(CONFIGURATION, 'second', cutoff))
+    assert os.path.exists(os.path.join(location, 'model.ckpt'))
+
+    registry.discard('second')
+    assert registry.get(ModelRegistry.make_key(CONFIGURATION, 'second', cutoff)) is None
@@ -0,0 +1,20 @@
+import os
+
+import pandas as pd
+
+from app import services
+from app.interpreters.datasource import GymDataSourceInterpreter
+
+HERE = os.path.join(os.path.dirname(__file__))
+
+
+def test_staged_dataframe_is_loaded_back_with_its_types(tmpdir, monkeypatch):
+    monkeypatch.setattr(services.ingestion, 'STAGING_FOLDER', str(tmpdir))
+    interpreter = GymDataSourceInterpreter()
+    dataframe, _ = interpreter.from_csv_to_dataframe(os.path.join(HERE, '../resources/test_data.csv'))
+
+    location = services.ingestion.stage_dataframe(dataframe, 'upload_code')
+    staged_dataframe, errors = services.ingestion.load_staged_upload(location, interpreter)
+
+    assert not errors
+    pd.testing.assert_frame_equal(staged_dataframe, dataframe)
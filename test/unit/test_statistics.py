@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from app.core.preview import build_preview
+from app.core.statistics import build_column_statistics, infer_frequency, finest_frequency
+
+
+def make_stock_dataframe():
+    dates = pd.date_range('2017-01-02', periods=10, freq='D', name='Date').repeat(3)
+    return pd.DataFrame({
+        'Ticker': ['AAPL', 'MSFT', 'GOOG'] * 10,
+        'Returns': [0.1, np.nan, -0.2] * 10,
+    }, index=dates)
+
+
+def test_column_statistics_are_built_from_the_preview():
+    dataframe = make_stock_dataframe()
+    entities = sorted(dataframe['Ticker'].unique())
+
+    column_statistics = {
+        statistics['column']: statistics
+        for statistics in build_column_statistics(build_preview(dataframe), dataframe.dtypes, 'Ticker', entities)
+    }
+
+    assert column_statistics['Ticker']['distinct_count'] == 3
+    assert column_statistics['Returns']['count'] == 20
+    assert column_statistics['Returns']['null_count'] == 10
+    assert column_statistics['Returns']['min'] == -0.2
+    assert column_statistics['Returns']['max'] == 0.1
+
+
+def test_frequency_is_the_most_common_interval():
+    dataframe = make_stock_dataframe()
+
+    assert pd.Timestamp(0) + to_offset(infer_frequency(dataframe.index)) == pd.Timestamp(0) + pd.Timedelta(days=1)
+    assert finest_frequency('D', None, '15min') == '15min'
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from app.interpreters.datasource import StockDataSourceInterpreter
+
+
+def make_stock_dataframe():
+    dates = pd.date_range('2017-01-02', periods=20, freq='B', name='DateStamps').repeat(3)
+    dataframe = pd.DataFrame({
+        'Ticker': pd.Categorical(['AAPL', 'MSFT', 'GOOG'] * 20),
+        'Returns': np.arange(60, dtype='float32'),
+        'Shares': np.arange(60, dtype='float64') * 1000,
+    }, index=dates)
+    # a ticker missing on a day must show up as a gap in the panel
+    return dataframe.drop(dataframe.index[4])
+
+
+def test_data_dict_matches_one_pivot_per_feature():
+    dataframe = make_stock_dataframe()
+
+    data_dict = StockDataSourceInterpreter().from_dataframe_to_data_dict(dataframe)
+
+    expected_dataframe = dataframe.copy()
+    expected_dataframe.index = expected_dataframe.index.map(lambda t: t.replace(hour=7)).tz_localize('UTC')
+    expected_dataframe['Ticker'] = expected_dataframe['Ticker'].astype(str)
+    assert set(data_dict) == {'Returns', 'Shares'}
+    for feature, panel in data_dict.items():
+        pd.testing.assert_frame_equal(panel, expected_dataframe.pivot(columns='Ticker', values=feature))
@@ -0,0 +1,35 @@
+import os
+
+import pandas as pd
+
+from app.core.storage import HDF5SegmentStorage, ParquetSegmentStorage, read_segments
+from app.interpreters.datasource import GymDataSourceInterpreter
+
+HERE = os.path.join(os.path.dirname(__file__))
+
+
+def test_segments_are_merged_in_a_single_sorted_view(tmpdir):
+    dataframe, _ = GymDataSourceInterpreter().from_csv_to_dataframe(os.path.join(HERE, '../resources/test_data.csv'))
+
+    base_segment = str(tmpdir.join('base.hdf5'))
+    delta_segment = str(tmpdir.join('delta.hdf5'))
+    HDF5SegmentStorage().write(dataframe.iloc[:10], base_segment)
+    HDF5SegmentStorage().write(dataframe.iloc[5:].iloc[::-1], delta_segment)
+
+    merged_dataframe = read_segments([base_segment, delta_segment])
+
+    pd.testing.assert_frame_equal(merged_dataframe, dataframe)
+
+
+def test_parquet_segments_can_be_read_by_column_and_date_range(tmpdir):
+    dataframe, _ = GymDataSourceInterpreter().from_csv_to_dataframe(os.path.join(HERE, '../resources/test_data.csv'))
+    location = str(tmpdir.join('segment'))
+    ParquetSegmentStorage().write(dataframe, location)
+
+    start_date = dataframe.index[3]
+    end_date = dataframe.index[8]
+    selected_dataframe = read_segments([location], columns=['number_people'], start_date=start_date, end_date=end_date)
+
+    pd.testing.assert_frame_equal(
+        selected_dataframe, dataframe.loc[start_date:end_date, ['number_people']], check_index_type=False
+    )